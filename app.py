@@ -1,12 +1,28 @@
 import streamlit as st
 import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import httpx
+import pandas as pd
 import yaml
 from yaml.loader import SafeLoader
 import streamlit_authenticator as stauth
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from backend.utils import get_current_date_str
 
 API_URL = os.getenv("API_URL", "http://localhost:8001")
+API_KEY = os.getenv("APP_API_KEY", "insecure_dev_key")
+# Quanto tempo uma resposta do backend é reaproveitada entre reruns/sessões (segundos)
+NEWS_TTL = int(os.getenv("FRONTEND_NEWS_TTL", "120"))
+CHAT_TTL = int(os.getenv("FRONTEND_CHAT_TTL", "600"))
+STATS_TTL = int(os.getenv("FRONTEND_STATS_TTL", "300"))
+HISTORY_QUERY = "segurança"
+HISTORY_PAGE_SIZE = 20
+# Intervalo em que o histórico confere o feed /events (local: não consulta o backend)
+FEED_CHECK_SECONDS = int(os.getenv("FRONTEND_FEED_CHECK_SECONDS", "10"))
 
 # Configuração da Página
 st.set_page_config(
@@ -16,35 +32,164 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- BACKEND CLIENT ---
+class ApiError(Exception):
+    """Resposta não-200 do backend (exceções não entram no cache do st.cache_data)."""
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"{status_code}: {text[:200]}")
+        self.status_code = status_code
+        self.text = text
+
+
+@st.cache_resource
+def get_client() -> httpx.Client:
+    # Um pool por processo do Streamlit: conexões keep-alive reaproveitadas entre reruns e sessões
+    return httpx.Client(
+        base_url=API_URL,
+        headers={"X-API-Key": API_KEY},
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+
+
+class Revalidator:
+    """Last ETag + decoded body per request: an unchanged answer comes back as a bodiless 304."""
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def put(self, key, etag: str, data):
+        with self.lock:
+            self.entries[key] = (etag, data)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+@st.cache_resource
+def get_revalidator() -> Revalidator:
+    return Revalidator()
+
+
+def _get_json(path: str, params: dict, timeout: float = 30.0):
+    key = (path, tuple(sorted(params.items())))
+    stored = get_revalidator().get(key)
+    headers = {"If-None-Match": stored[0]} if stored else None
+    response = get_client().get(path, params=params, headers=headers, timeout=timeout)
+    if response.status_code == 304 and stored:
+        return stored[1]
+    if response.status_code != 200:
+        raise ApiError(response.status_code, response.text)
+    data = response.json()
+    if "etag" in response.headers:
+        get_revalidator().put(key, response.headers["etag"], data)
+    return data
+
+
+@st.cache_data(ttl=NEWS_TTL, show_spinner=False)
+def fetch_news(q: str, limit: int = 20, offset: int = 0, mode: str = "hybrid"):
+    return _get_json("/news", {"q": q, "limit": limit, "offset": offset, "mode": mode})
+
+
+@st.cache_data(ttl=CHAT_TTL, show_spinner=False)
+def fetch_analysis(q: str):
+    return _get_json("/chat", {"q": q}, timeout=60.0).get("response")
+
+
+@st.cache_data(ttl=STATS_TTL, show_spinner=False)
+def fetch_stats(dimension: str, days: int):
+    # Servido das tabelas de rollup: não puxa o arquivo bruto de notícias
+    return _get_json("/stats", {"dimension": dimension, "days": days}, timeout=10.0)
+
+
+class NewsFeed:
+    """Listens to /events in a background thread; `version` grows with every new matching article."""
+    def __init__(self, client: httpx.Client, params: dict):
+        self.client = client
+        self.params = params
+        self.version = 0
+        self.last_title = None
+        threading.Thread(target=self._listen, daemon=True, name="news-feed").start()
+
+    def _listen(self):
+        delay = 1.0
+        while True:
+            try:
+                timeout = httpx.Timeout(30.0, read=None)  # heartbeats arrive every ~15s
+                with self.client.stream("GET", "/events", params=self.params, timeout=timeout) as response:
+                    if response.status_code != 200:
+                        raise ApiError(response.status_code, "")
+                    delay = 1.0
+                    for line in response.iter_lines():
+                        if line.startswith("data:"):
+                            self.last_title = json.loads(line[5:]).get("title")
+                            self.version += 1
+            except Exception:
+                pass
+            time.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+
+@st.cache_resource
+def get_history_feed() -> NewsFeed:
+    # Um ouvinte por processo do Streamlit, compartilhado pelas sessões
+    return NewsFeed(get_client(), {"q": HISTORY_QUERY})
+
+
+def run_concurrently(*calls):
+    """Runs (func, *args) tuples in parallel threads; returns results/exceptions in order."""
+    ctx = get_script_run_ctx()
+
+    def run(call):
+        # The cached functions need the session's script context inside worker threads
+        add_script_run_ctx(threading.current_thread(), ctx)
+        func, *args = call
+        try:
+            return func(*args)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        return list(pool.map(run, calls))
+
+
 # --- AUTHENTICATION CONFIGURATION ---
-config = None
+@st.cache_data
+def load_auth_config():
+    """Parsed once per process; st.cache_data hands each rerun its own copy (the Authenticator mutates it)."""
+    # 1. Tentar carregar de st.secrets (Produção/Streamlit Cloud)
+    try:
+        if 'credentials' in st.secrets:
+            # CONVERSÃO CRÍTICA: st.secrets é imutável. O Authenticador precisa escrever nele.
+            # Convertemos para um dict padrão do Python recursivamente.
+            def to_dict(obj):
+                return {k: to_dict(v) if isinstance(v, dict) else v for k, v in obj.items()}
+
+            return to_dict(st.secrets)
+    except Exception:
+        # Se st.secrets falhar (ex: não existe arquivo secrets.toml local),
+        # apenas ignoramos e tentamos o arquivo yaml abaixo.
+        pass
+
+    # 2. Se não houver secrets, tentar carregar arquivo local (Desenvolvimento)
+    with open('auth_config.yaml') as file:
+        return yaml.load(file, Loader=SafeLoader)
+
 
-# 1. Tentar carregar de st.secrets (Produção/Streamlit Cloud)
 try:
-    if 'credentials' in st.secrets:
-        # CONVERSÃO CRÍTICA: st.secrets é imutável. O Authenticador precisa escrever nele.
-        # Convertemos para um dict padrão do Python recursivamente.
-        def to_dict(obj):
-            return {k: to_dict(v) if isinstance(v, dict) else v for k, v in obj.items()}
-        
-        config = to_dict(st.secrets)
-except Exception:
-    # Se st.secrets falhar (ex: não existe arquivo secrets.toml local),
-    # apenas ignoramos e tentamos o arquivo yaml abaixo.
-    pass
-
-# 2. Se não houver secrets, tentar carregar arquivo local (Desenvolvimento)
-if not config:
-    try:
-        with open('auth_config.yaml') as file:
-            config = yaml.load(file, Loader=SafeLoader)
-    except FileNotFoundError:
-        st.error("❌ Erro Crítico: Configuração de autenticação não encontrada.")
-        st.info("Para resolver no Streamlit Cloud: Adicione o conteúdo de 'auth_config.yaml' na seção 'Secrets' do painel.")
-        st.stop()
-    except Exception as e:
-        st.error(f"❌ Erro ao ler config local: {e}")
-        st.stop()
+    config = load_auth_config()
+except FileNotFoundError:
+    st.error("❌ Erro Crítico: Configuração de autenticação não encontrada.")
+    st.info("Para resolver no Streamlit Cloud: Adicione o conteúdo de 'auth_config.yaml' na seção 'Secrets' do painel.")
+    st.stop()
+except Exception as e:
+    st.error(f"❌ Erro ao ler config local: {e}")
+    st.stop()
 
 try:
     authenticator = stauth.Authenticate(
@@ -122,8 +267,98 @@ if st.session_state.get('authentication_status'):
     st.title("🚔 Agente de Notícias: Segurança Pública DF")
     st.markdown(f"*Data: {get_current_date_str()}*")
 
+    def _refresh_history():
+        fetch_news.clear()
+        st.session_state["history_pages"] = 1
+
+    def _more_history():
+        st.session_state["history_pages"] += 1
+
+    @st.fragment(run_every=FEED_CHECK_SECONDS)
+    def history_view():
+        # Fragmento: "Carregar mais" / "Atualizar" reexecutam só esta aba.
+        # A cada FEED_CHECK_SECONDS confere o feed /events; só vai ao backend se chegou notícia nova
+        st.header("Arquivo de Inteligência (Via API)")
+        feed = get_history_feed()
+        seen = st.session_state.setdefault("feed_version", feed.version)
+        if feed.version != seen:
+            st.session_state["feed_version"] = feed.version
+            fetch_news.clear()
+            st.toast(f"🆕 {feed.version - seen} notícia(s) nova(s): {feed.last_title}")
+        st.button("Atualizar Lista", on_click=_refresh_history)
+
+        pages = st.session_state.setdefault("history_pages", 1)
+        last_page = []
+        try:
+            for page in range(pages):
+                # Cada página fica no cache; só a nova vai ao backend
+                last_page = fetch_news(HISTORY_QUERY, HISTORY_PAGE_SIZE, page * HISTORY_PAGE_SIZE, "keyword")
+                if page == 0 and not last_page:
+                    st.info(f"Nenhuma informação arquivada encontrada para '{HISTORY_QUERY}'.")
+                for n in last_page:
+                    with st.container():
+                        st.markdown(f"""
+                        <div class="news-card">
+                            <h3>{n['title']}</h3>
+                            <p style="color:gray; font-size:0.8rem;">📅 {n['publishedAt']}</p>
+                            <p>{n['snippet']}</p>
+                            <a href="{n['url']}" target="_blank">🔗 Link Original</a>
+                        </div>
+                        """, unsafe_allow_html=True)
+        except ApiError:
+            st.error("Falha ao buscar histórico.")
+            return
+        except Exception:
+            st.warning("Backend offline ou inacessível.")
+            return
+
+        if len(last_page) == HISTORY_PAGE_SIZE:
+            st.button("Carregar mais", on_click=_more_history)
+
+    @st.fragment
+    def stats_view():
+        st.header("Volume de Ocorrências Noticiadas")
+        dimensoes = {
+            "Total": "total",
+            "Região Administrativa": "region",
+            "Tipo de Crime": "crime_type",
+            "Força de Segurança": "agency",
+            "Fonte": "source",
+        }
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            dimensao_label = st.selectbox("Agrupar por", list(dimensoes))
+        with col2:
+            dias = st.slider("Período (dias)", min_value=7, max_value=180, value=30, step=1)
+
+        try:
+            stats = fetch_stats(dimensoes[dimensao_label], dias)
+        except ApiError as e:
+            st.error(f"Falha ao buscar estatísticas: {e.status_code}")
+            return
+        except Exception as e:
+            st.warning(f"Backend offline ou inacessível: {e}")
+            return
+
+        if not stats["totals"]:
+            st.info("Ainda não há dados agregados para este período.")
+        else:
+            serie = pd.DataFrame(stats["series"])
+            tabela = serie.pivot_table(index="day", columns="value", values="count", fill_value=0)
+            st.subheader("Tendência diária")
+            st.line_chart(tabela)
+
+            totais = pd.DataFrame(stats["totals"]).set_index("value")
+            st.subheader("Distribuição no período")
+            st.bar_chart(totais["count"])
+            totais["variação"] = totais["recent"] - totais["previous"]
+            st.dataframe(
+                totais.rename(columns={"count": "total", "recent": "2ª metade", "previous": "1ª metade"}),
+                use_container_width=True,
+            )
+
     # Tabs
-    tab1, tab2 = st.tabs(["🔍 Buscar Notícias", "📂 Histórico salvo"])
+    tab1, tab2, tab3 = st.tabs(["🔍 Buscar Notícias", "📂 Histórico salvo", "📊 Estatísticas"])
 
     with tab1:
         col1, col2 = st.columns([3, 1])
@@ -135,77 +370,49 @@ if st.session_state.get('authentication_status'):
             buscar_btn = st.button("Investigar 🔎", use_container_width=True)
 
         if buscar_btn and query:
+            # Guardado na sessão: outras interações (abas, slider) redesenham o último relatório sem nova busca
+            st.session_state["investigation"] = query
+
+        investigation = st.session_state.get("investigation")
+        if investigation:
             with st.spinner("O Agente (API) está em campo buscando informações..."):
-                try:
-                    # Chama a API Backend com Autenticação
-                    headers = {"X-API-Key": os.getenv("APP_API_KEY", "insecure_dev_key")}
-                    response = httpx.get(f"{API_URL}/news", params={"q": query}, headers=headers, timeout=30.0)
-                    if response.status_code == 200:
-                        news_items = response.json()
-                        st.markdown("### 📝 Relatório de Inteligência (Backend)")
-                        
-                        if not news_items:
-                            st.warning("Nenhuma notícia recente encontrada.")
-                        
-                        for item in news_items:
-                            with st.expander(f"{item['title']} ({item['source']})"):
-                                st.write(item['snippet'])
-                                st.markdown(f"[Ler completa]({item['url']})")
-                                st.caption(f"Publicado em: {item['publishedAt']}")
-                        
-                        # Análise AI via Groq (novo endpoint)
-                        st.divider()
-                        st.subheader("🤖 Análise de Inteligência (Groq Llama 3)")
-                        with st.spinner("Analisando dados com LLM..."):
-                            try:
-                                # O agente já faz a busca internamente se necessário, mas podemos passar a query de análise
-                                # Ou passar os dados recuperados para ele resumir.
-                                # Como o Agente Groq está configurado com Tool Use de busca, podemos apenas passar a query original.
-                                chat_response = httpx.get(f"{API_URL}/chat", params={"q": query}, headers=headers, timeout=60.0)
-                                if chat_response.status_code == 200:
-                                    # O endpoint retorna {"response": ...}
-                                    analysis = chat_response.json().get("response")
-                                    st.markdown(analysis)
-                                else:
-                                    st.error("Erro ao gerar análise.")
-                            except Exception as e:
-                                st.error(f"Erro no módulo de inteligência: {e}")
-
-                    else:
-                        st.error(f"Erro na API: {response.status_code}")
-                        # --- DEBUG INFO ---
-                        with st.expander("🕵️‍♂️ Detalhes Técnicos (Debug)"):
-                            st.write(f"**URL Tentada:** `{API_URL}/news`")
-                            st.write(f"**Status Code:** {response.status_code}")
-                            st.text(f"Resposta Raw: {response.text}")
-                            st.write(f"**API Key (Parcial):** {headers.get('X-API-Key')[:4]}***")
-
-                except Exception as e:
-                    st.error(f"Erro de conexão com o backend: {e}")
+                # /news e /chat em paralelo: o agente faz a própria busca, não depende da lista
+                news_items, analysis = run_concurrently((fetch_news, investigation), (fetch_analysis, investigation))
 
-    with tab2:
-        st.header("Arquivo de Inteligência (Via API)")
-        if st.button("Atualizar Lista"):
-            st.rerun()
-            
-        try:
-            response = httpx.get(f"{API_URL}/news", params={"q": "segurança"}, timeout=10.0)
-            if response.status_code == 200:
-                noticias = response.json()
-                if noticias:
-                    for n in noticias:
-                        with st.container():
-                            st.markdown(f"""
-                            <div class="news-card">
-                                <h3>{n['title']}</h3>
-                                <p style="color:gray; font-size:0.8rem;">📅 {n['publishedAt']}</p>
-                                <p>{n['snippet']}</p>
-                                <a href="{n['url']}" target="_blank">🔗 Link Original</a>
-                            </div>
-                            """, unsafe_allow_html=True)
-                else:
-                    st.info("Nenhuma informação arquivada encontrada para 'segurança'.")
+            if isinstance(news_items, ApiError):
+                st.error(f"Erro na API: {news_items.status_code}")
+                # --- DEBUG INFO ---
+                with st.expander("🕵️‍♂️ Detalhes Técnicos (Debug)"):
+                    st.write(f"**URL Tentada:** `{API_URL}/news`")
+                    st.write(f"**Status Code:** {news_items.status_code}")
+                    st.text(f"Resposta Raw: {news_items.text}")
+                    st.write(f"**API Key (Parcial):** {API_KEY[:4]}***")
+            elif isinstance(news_items, Exception):
+                st.error(f"Erro de conexão com o backend: {news_items}")
             else:
-                st.error("Falha ao buscar histórico.")
-        except:
-            st.warning("Backend offline ou inacessível.")
+                st.markdown("### 📝 Relatório de Inteligência (Backend)")
+
+                if not news_items:
+                    st.warning("Nenhuma notícia recente encontrada.")
+
+                for item in news_items:
+                    with st.expander(f"{item['title']} ({item['source']})"):
+                        st.write(item['snippet'])
+                        st.markdown(f"[Ler completa]({item['url']})")
+                        st.caption(f"Publicado em: {item['publishedAt']}")
+
+                # Análise AI via Groq (novo endpoint)
+                st.divider()
+                st.subheader("🤖 Análise de Inteligência (Groq Llama 3)")
+                if isinstance(analysis, ApiError):
+                    st.error("Erro ao gerar análise.")
+                elif isinstance(analysis, Exception):
+                    st.error(f"Erro no módulo de inteligência: {analysis}")
+                else:
+                    st.markdown(analysis)
+
+    with tab2:
+        history_view()
+
+    with tab3:
+        stats_view()
@@ -0,0 +1,181 @@
+"""
+Controle de admissão da API: chaves, cotas por chave e concorrência por rota.
+
+Chaves (X-API-Key), em APP_API_KEYS, separadas por vírgula:
+
+    APP_API_KEYS="streamlit=chave1:600:8,parceiro=chave2:60:2"
+                  nome=chave[:req_por_minuto[:simultâneas]]   (0 ou ausente = sem limite)
+
+APP_API_KEY continua valendo como a chave "default", sem cota.
+
+Cada classe de rota (chat = LLM, lenta; news = consultas ao arquivo) tem um
+limite de requisições em execução e uma fila curta com prazo. Acima disso a
+resposta é imediata: 503 + Retry-After quando o serviço está saturado, 429 +
+Retry-After quando a chave estourou a própria cota. Como as rotas síncronas
+rodam no threadpool do Starlette (40 threads), manter chat + news bem abaixo
+disso deixa /news e o health check estáveis sob uma rajada de /chat.
+
+Os limites são por processo (cada worker do uvicorn aplica os seus).
+"""
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional
+
+from .metrics import counter
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+
+@dataclass
+class RouteClass:
+    name: str
+    concurrency: int
+    queue: int  # requisições que podem esperar por um slot
+    queue_timeout: float  # segundos de espera antes do 503
+
+
+# Rotas fora do mapa (métricas, jobs, export, debug) não passam pelo limite
+ROUTE_CLASSES = {
+    "chat": RouteClass(
+        "chat",
+        int(os.getenv("ADMISSION_CHAT_CONCURRENCY", "4")),
+        int(os.getenv("ADMISSION_CHAT_QUEUE", "8")),
+        float(os.getenv("ADMISSION_CHAT_QUEUE_TIMEOUT", "5")),
+    ),
+    "news": RouteClass(
+        "news",
+        int(os.getenv("ADMISSION_NEWS_CONCURRENCY", "16")),
+        int(os.getenv("ADMISSION_NEWS_QUEUE", "64")),
+        float(os.getenv("ADMISSION_NEWS_QUEUE_TIMEOUT", "1")),
+    ),
+}
+ROUTES = {"/chat": "chat", "/news": "news", "/stats": "news"}
+
+ADMISSION_REJECTED = counter(
+    "admission_rejected_total", "Requisições recusadas pelo controle de admissão", ("route_class", "reason")
+)
+
+
+# --- Keys and quotas -------------------------------------------------------------
+@dataclass
+class ApiKey:
+    name: str
+    requests_per_minute: int = 0
+    max_concurrent: int = 0
+    # Token bucket (capacidade = requisições de um minuto) e requisições em andamento
+    tokens: float = field(default=0.0, repr=False)
+    refilled_at: float = field(default=0.0, repr=False)
+    in_flight: int = field(default=0, repr=False)
+
+    def __post_init__(self):
+        self.tokens = float(self.requests_per_minute)
+        self.refilled_at = time.monotonic()
+
+    def take(self) -> float:
+        """Consumes one request from the quota. Returns 0, or seconds until one is available."""
+        if not self.requests_per_minute:
+            return 0.0
+        now = time.monotonic()
+        rate = self.requests_per_minute / 60.0
+        self.tokens = min(float(self.requests_per_minute), self.tokens + (now - self.refilled_at) * rate)
+        self.refilled_at = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / rate
+
+    def refund(self):
+        """Gives back the token of a request that was refused (429/503) after take()."""
+        if self.requests_per_minute:
+            self.tokens = min(float(self.requests_per_minute), self.tokens + 1.0)
+
+
+def parse_api_keys(spec: Optional[str], default_key: Optional[str] = None) -> Dict[str, ApiKey]:
+    """'nome=chave[:rpm[:simultâneas]],...' -> {chave: ApiKey}"""
+    keys: Dict[str, ApiKey] = {}
+    if default_key:
+        keys[default_key] = ApiKey("default")
+    for entry in (spec or "").split(","):
+        if not entry.strip():
+            continue
+        try:
+            name, rest = entry.strip().split("=", 1)
+            secret, *limits = rest.split(":")
+            rpm, concurrent = (list(map(int, limits)) + [0, 0])[:2]
+        except ValueError:
+            logger.error(f"APP_API_KEYS: entrada inválida ignorada ('{entry.split('=')[0]}=...')")
+            continue
+        keys[secret] = ApiKey(name.strip(), rpm, concurrent)
+    return keys
+
+
+# --- Route limits ----------------------------------------------------------------
+class RouteLimiter:
+    """Concurrency slots with a bounded FIFO wait queue.
+
+    A released slot is handed straight to the oldest waiter, so late arrivals
+    cannot overtake the queue. Everything runs on the event loop: no locks.
+    """
+
+    def __init__(self, route_class: RouteClass):
+        self.route_class = route_class
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        # Média móvel do tempo de serviço, para estimar o Retry-After
+        self.avg_seconds = 1.0
+
+    async def acquire(self) -> bool:
+        if self.in_flight < self.route_class.concurrency and not self.waiters:
+            self.in_flight += 1
+            return True
+        if len(self.waiters) >= self.route_class.queue:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.route_class.queue_timeout)
+        except BaseException:
+            # Client went away while queued: a slot handed over meanwhile goes to the next one
+            if waiter.done() and not waiter.cancelled():
+                self._pass_on()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+                self.waiters.remove(waiter)
+        # Handed a slot, possibly just as the deadline expired: keep it
+        return not waiter.cancelled()
+
+    def release(self, seconds: float):
+        self.avg_seconds += 0.2 * (seconds - self.avg_seconds)
+        self._pass_on()
+
+    def _pass_on(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)  # slot passes on; in_flight unchanged
+                return
+        self.in_flight -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog is likely served."""
+        backlog = self.in_flight + len(self.waiters)
+        return max(1, math.ceil(self.avg_seconds * backlog / max(self.route_class.concurrency, 1)))
+
+
+_limiters = {name: RouteLimiter(rc) for name, rc in ROUTE_CLASSES.items()}
+
+
+def route_limiter(path: str) -> Optional[RouteLimiter]:
+    name = ROUTES.get(path)
+    return _limiters[name] if name else None
+
+
+def rejected(route_class: str, reason: str):
+    ADMISSION_REJECTED.labels(route_class, reason).inc()
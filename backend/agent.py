@@ -5,21 +5,29 @@ from groq import Groq, RateLimitError
 from ddgs import DDGS
 from dotenv import load_dotenv
 from .logging_config import setup_logging
+from .analyzer import analyze
+from .storage import get_storage
+from .content import get_contents
+from .metrics import LLM_LATENCY, LLM_ERRORS
+from .profiling import span
 
 load_dotenv()
 logger = setup_logging()
 
+EVIDENCE_CHARS = int(os.getenv("AGENT_EVIDENCE_CHARS", "800"))
+
 
 # --- Ferramenta de Busca ---
 def buscar_noticias_seguranca_df(query: str):
     """
     Busca notícias recentes sobre segurança pública e forças policiais no Distrito Federal.
     """
-    logger.info(f"Buscando por '{query} Distrito Federal'")
+    query = analyze(query).external_query()
+    logger.info(f"Buscando por '{query}'")
     with DDGS() as ddgs:
         results = list(
             ddgs.text(
-                f"{query} Distrito Federal",
+                query,
                 region="br-pt",
                 safesearch="off",
                 max_results=5,
@@ -36,6 +44,27 @@ def buscar_noticias_seguranca_df(query: str):
         return noticias_formatadas
 
 
+def buscar_arquivo_local(query: str):
+    """
+    Busca semântica no arquivo de notícias já coletadas (banco local).
+    """
+    logger.info(f"Buscando no arquivo local por '{query}'")
+    results = get_storage().semantic_search(query, limit=5)
+    if not results:
+        return "Nenhuma notícia arquivada corresponde a esta busca."
+
+    # Texto completo (quando já baixado) como evidência, limitado para caber no contexto
+    contents = get_contents([n.id for n in results])
+    noticias_formatadas = ""
+    for i, n in enumerate(results, 1):
+        noticias_formatadas += f"[{i}] Título: {n.title}\nLink: {n.url}\nData: {n.published:%d/%m/%Y}\nResumo: {n.snippet}\n"
+        if n.id in contents:
+            noticias_formatadas += f"Trecho: {contents[n.id][:EVIDENCE_CHARS]}\n"
+        noticias_formatadas += "\n"
+
+    return noticias_formatadas
+
+
 # Configuração da Ferramenta para o Groq (OpenAI format)
 tools = [
     {
@@ -54,9 +83,32 @@ tools = [
                 "required": ["query"],
             },
         },
-    }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "buscar_arquivo_local",
+            "description": "Busca por significado no arquivo de notícias já coletadas sobre segurança no DF",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "O que procurar no arquivo (ex: 'homicídios em Ceilândia')",
+                    }
+                },
+                "required": ["query"],
+            },
+        },
+    },
 ]
 
+# Dispatch das ferramentas disponíveis ao modelo
+tool_functions = {
+    "buscar_noticias_seguranca_df": buscar_noticias_seguranca_df,
+    "buscar_arquivo_local": buscar_arquivo_local,
+}
+
 
 # --- Fallback: Gemini ---
 def get_gemini_response(user_query, context_data=None):
@@ -72,12 +124,14 @@ def get_gemini_response(user_query, context_data=None):
     try:
         client = genai.Client(api_key=api_key)
         # Mapping 'gemini-flash-lite-latest' request to stable 'gemini-1.5-flash'
-        response = client.models.generate_content(
-            model="gemini-1.5-flash", contents=prompt
-        )
+        with LLM_LATENCY.labels("gemini", "fallback").time(), span("llm:gemini"):
+            response = client.models.generate_content(
+                model="gemini-1.5-flash", contents=user_query
+            )
         return f"[Mojo Fallback - Gemini] {response.text}"
     except Exception as e:
         logger.error(f"Gemini fallback failed: {e}")
+        LLM_ERRORS.labels("gemini").inc()
         return "Erro crítico: Ambos os sistemas de IA (Groq e Gemini) falharam."
 
 
@@ -94,7 +148,7 @@ def get_agent_response(user_query, api_key=None):
     model_name = "llama-3.3-70b-versatile"
 
     instrucoes = """Você é um Agente Pesquisador de Segurança Pública do DF.
-    Use a função de busca para encontrar fatos reais.
+    Use a função de busca para encontrar fatos reais e o arquivo local para o histórico já coletado.
     Responda sempre em tópicos, citando os links das fontes.
     Se encontrar notícias relevantes, sugira que elas sejam salvas no banco de dados.
     """
@@ -106,13 +160,14 @@ def get_agent_response(user_query, api_key=None):
 
     try:
         # 1. Primeira chamada ao modelo
-        completion = client.chat.completions.create(
-            model=model_name,
-            messages=messages,
-            tools=tools,
-            tool_choice="auto",
-            max_tokens=4096,
-        )
+        with LLM_LATENCY.labels("groq", "tools").time(), span("llm:groq:tools"):
+            completion = client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                tools=tools,
+                tool_choice="auto",
+                max_tokens=4096,
+            )
 
         response_message = completion.choices[0].message
         tool_calls = response_message.tool_calls
@@ -124,11 +179,12 @@ def get_agent_response(user_query, api_key=None):
             for tool_call in tool_calls:
                 function_name = tool_call.function.name
 
-                if function_name == "buscar_noticias_seguranca_df":
+                if function_name in tool_functions:
                     function_args = json.loads(tool_call.function.arguments)
-                    function_response = buscar_noticias_seguranca_df(
-                        query=function_args.get("query")
-                    )
+                    with span(f"tool:{function_name}"):
+                        function_response = tool_functions[function_name](
+                            query=function_args.get("query")
+                        )
 
                     messages.append(
                         {
@@ -139,15 +195,17 @@ def get_agent_response(user_query, api_key=None):
                         }
                     )
 
-            second_response = client.chat.completions.create(
-                model=model_name, messages=messages
-            )
+            with LLM_LATENCY.labels("groq", "answer").time(), span("llm:groq:answer"):
+                second_response = client.chat.completions.create(
+                    model=model_name, messages=messages
+                )
             return second_response.choices[0].message.content
 
         return response_message.content
 
     except (RateLimitError, Exception) as e:
         logger.warning(f"Groq Error ({type(e).__name__}): {e}. Switching to Fallback.")
+        LLM_ERRORS.labels("groq").inc()
         # Se falhar, tentamos o Gemini.
         # Nota: Se a falha for DEPOIS de buscar ferramentas (contexto), perdemos o contexto na implementação simples.
         # Melhor seria passar o histórico, mas para fallback simples, passamos a query.
@@ -0,0 +1,141 @@
+"""
+Alertas de buscas salvas.
+
+Uso:
+    python -m backend.alerts --add "Tiroteio Sol Nascente" --q "tiroteio" --region "Sol Nascente"
+    python -m backend.alerts --list
+    python -m backend.alerts --owner default --after 0   # alertas gerados
+
+Cada regra (`alert_rules`) tem termos (todos devem aparecer no título/resumo;
+mesmo analisador do /news: sem acento/caixa, stopwords, sinônimos) e/ou tags (region, agency, crime_type). As regras ativas são
+compiladas juntas no FilterIndex de backend/events.py (Aho-Corasick + mapa de
+tags), e cada lote salvo por save_rows é casado uma vez contra todas elas: o
+custo é proporcional ao texto do lote, não a regras x arquivo. Os casamentos
+vão para `alerts`, servidos por GET /alerts. Regras e alertas ficam no backend
+de armazenamento (backend/storage.py): com PostgreSQL, todos os nós da API
+veem as mesmas regras, seja qual for o nó que ingeriu o lote.
+"""
+import json
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .analyzer import analyze
+from .database import init_db
+from .enrichment import TAG_KINDS, canonical_tag
+from .events import FilterIndex, match_event
+from .storage import get_storage
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+ALERTS_PAGE_SIZE = 100
+
+
+class AlertRule(NamedTuple):
+    id: int
+    terms: Tuple[Tuple[str, ...], ...]  # AnalyzedQuery.match_groups()
+    tags: Tuple[Tuple[str, str], ...]
+
+
+def create_rule(owner: str, name: str, q: Optional[str] = None, filters: Optional[Dict[str, str]] = None) -> Dict:
+    filters = {kind: canonical_tag(kind, value) for kind, value in (filters or {}).items() if value}
+    if not (q and analyze(q).terms) and not filters:
+        raise ValueError("A regra precisa de termos ou de ao menos um filtro")
+    return get_storage().create_alert_rule(owner, name, q, filters)
+
+
+def list_rules(owner: Optional[str] = None) -> List[Dict]:
+    return get_storage().list_alert_rules(owner)
+
+
+def delete_rule(rule_id: int, owner: Optional[str] = None) -> bool:
+    """Removes the rule and its alerts. False when it does not exist (or belongs to someone else)."""
+    return get_storage().delete_alert_rule(rule_id, owner)
+
+
+# --- Matching (ingest side) --------------------------------------------------------
+_compiled: Tuple[tuple, Optional[FilterIndex]] = ((), None)
+_compiled_lock = threading.Lock()
+
+
+def _rule_index() -> Optional[FilterIndex]:
+    """Compiled index of every rule; recompiled only when the set of rules changed (in any process/node)."""
+    global _compiled
+    rows = get_storage().list_alert_rules()
+    # Rules are immutable (create/delete only): the (id, ...) rows identify the rule set
+    signature = tuple((r["id"], r["query"], *(r[kind] for kind in TAG_KINDS)) for r in rows)
+    with _compiled_lock:
+        if signature != _compiled[0]:
+            rules = [
+                AlertRule(
+                    r["id"],
+                    tuple(map(tuple, analyze(r["query"]).match_groups())) if r["query"] else (),
+                    tuple((kind, r[kind]) for kind in TAG_KINDS if r[kind]),
+                )
+                for r in rows
+            ]
+            _compiled = (signature, FilterIndex(rules) if rules else None)
+        return _compiled[1]
+
+
+def record_alerts(events: List[Dict]) -> int:
+    """Matches newly saved articles (backend.events.article_event) against every rule. Returns alerts written."""
+    if not events:
+        return 0
+    index = _rule_index()
+    if index is None:
+        return 0
+    now = datetime.now().isoformat()
+    matches = [(rule.id, event["id"], now) for event in events for rule in match_event(index, event)]
+    if matches:
+        get_storage().insert_alerts(matches)
+        logger.info(f"🔔 {len(matches)} alert(s) for {len(events)} new article(s)")
+    return len(matches)
+
+
+# --- Reading ---------------------------------------------------------------------
+def get_alerts(owner: Optional[str] = None, rule_id: Optional[int] = None, after: int = 0,
+               limit: int = ALERTS_PAGE_SIZE) -> List[Dict]:
+    """Alerts with id > `after` (oldest first, so `after` = last id seen pages forward)."""
+    storage = get_storage()
+    rows = storage.alerts_page(owner, rule_id, after, limit)
+    articles = {n.id: n for n in storage.get_by_ids(list({r["news_id"] for r in rows}))}
+    alerts = []
+    for r in rows:
+        article = articles.get(r["news_id"])
+        if article is not None:
+            alerts.append({**r, "title": article.title, "url": article.url, "publishedAt": article.publishedAt,
+                           "source": article.source, "snippet": article.snippet})
+    return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regras de alerta (buscas salvas)")
+    parser.add_argument("--owner", default="default", help="Dono das regras (nome da chave de API)")
+    parser.add_argument("--add", metavar="NOME", help="Cria uma regra com --q e/ou filtros")
+    parser.add_argument("--q", help="Termos que devem aparecer")
+    for kind in TAG_KINDS:
+        parser.add_argument(f"--{kind.replace('_', '-')}", dest=kind)
+    parser.add_argument("--delete", type=int, metavar="ID", help="Remove a regra e seus alertas")
+    parser.add_argument("--list", action="store_true", help="Lista as regras")
+    parser.add_argument("--after", type=int, default=0, help="Mostra os alertas com id maior que este")
+    args = parser.parse_args()
+
+    init_db()
+    if args.add:
+        filters = {kind: getattr(args, kind) for kind in TAG_KINDS}
+        print(json.dumps(create_rule(args.owner, args.add, args.q, filters), ensure_ascii=False))
+    elif args.delete is not None:
+        print(json.dumps({"deleted": delete_rule(args.delete, args.owner)}))
+    elif args.list:
+        for rule in list_rules(args.owner):
+            print(json.dumps(rule, ensure_ascii=False))
+    else:
+        for alert in get_alerts(args.owner, after=args.after):
+            print(json.dumps(alert, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Analisador de consultas compartilhado por cache, banco e coletores.
+
+Uso:
+    from backend.analyzer import analyze
+    a = analyze("  PMDF na Taguá ")
+    a.key                 # "pmdf taguatinga": chave de cache / deduplicação
+    a.like_groups()       # padrões LIKE sobre index_text() (SQLite)
+    a.match_groups()      # os mesmos, como substrings (filtros de /events e alertas)
+    a.fts_query()         # MATCH do FTS5 (texto completo, SQLite)
+    a.tsquery()           # to_tsquery (PostgreSQL)
+    a.external_query()    # "pmdf na tagua distrito federal": texto enviado às buscas externas
+
+Etapas: caixa e acentos (utils.fold), tokens alfanuméricos, sinônimos (siglas e
+gíria do DF -> termo canônico, frase mais longa primeiro) e stopwords.
+"Ceilândia", " ceilandia " e "CEILÂNDIA" viram o mesmo `key`, assim como
+"Polícia Militar tagua" e "pmdf Taguatinga". Nas buscas locais cada termo casa
+com qualquer uma das suas variantes (pmdf OU "policia militar"). As buscas
+externas (GDELT, DuckDuckGo, NewsAPI) recebem o texto do usuário só sem
+acento/caixa, mais o contexto do DF: os sinônimos do DF não reescrevem uma
+consulta sobre outro lugar ("PM São Paulo").
+
+CONCEPTS são grupos mais largos (homicídio ~ assassinato) usados só no espaço
+vetorial (backend/semantic.py): a busca por palavra continua literal.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .utils import fold
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "na", "no", "nas", "nos",
+    "um", "uma", "para", "por", "com", "que", "se", "ao", "aos", "the", "of", "in",
+}
+
+# Mesma coisa, outro nome: termo canônico -> variações (já sem acento/caixa)
+SYNONYMS: Dict[str, List[str]] = {
+    # Sem "pm" sozinho: a PM de qualquer estado não é a PMDF
+    "pmdf": ["pm df", "policia militar"],
+    "pcdf": ["pc df", "policia civil"],
+    "cbmdf": ["bombeiros", "corpo de bombeiros"],
+    "policia federal": ["pf"],
+    "prf": ["policia rodoviaria federal"],
+    "ppdf": ["policia penal"],
+    "detran": ["detran df"],
+    "ssp": ["ssp df", "secretaria de seguranca publica"],
+    "bope": ["batalhao de operacoes especiais"],
+    "distrito federal": ["df"],
+    "taguatinga": ["tagua"],
+    "samambaia": ["samamba"],
+    "recanto das emas": ["recanto"],
+    "boletim de ocorrencia": ["bo"],
+    "viatura": ["vtr"],
+}
+
+# Termos que a imprensa usa de forma intercambiável. Cada grupo vira um
+# "conceito" compartilhado no espaço vetorial (homicídio ~ assassinato).
+CONCEPTS = {
+    "homicidio": ["homicidio", "homicidios", "assassinato", "assassinatos", "assassinado", "assassinada", "matou", "morto", "morta", "executado", "executada"],
+    "roubo": ["roubo", "roubos", "assalto", "assaltos", "assaltante", "assaltantes", "roubado", "roubada"],
+    "furto": ["furto", "furtos", "furtado", "furtada"],
+    "trafico": ["trafico", "traficante", "traficantes", "drogas", "entorpecentes", "cocaina", "maconha", "crack"],
+    "tiroteio": ["tiroteio", "tiroteios", "disparos", "baleado", "baleada", "tiros"],
+    "feminicidio": ["feminicidio", "feminicidios"],
+    "violencia_domestica": ["maria da penha", "violencia domestica", "agressao", "agrediu"],
+    "prisao": ["preso", "presa", "presos", "prisao", "detido", "detida", "capturado", "flagrante"],
+    "policia_civil": ["pcdf", "policia civil", "delegacia"],
+    "policia_militar": ["pmdf", "policia militar", "batalhao"],
+}
+
+# Termos mais curtos casam só a palavra inteira: "pc" não deve trazer "PCC"
+PREFIX_MIN_CHARS = 4
+# Contexto das buscas externas (o arquivo é do DF)
+EXTERNAL_CONTEXT = "distrito federal"
+
+
+def _compile_synonyms() -> Tuple[Dict[Tuple[str, ...], str], Dict[str, Tuple[str, ...]], int]:
+    canonical: Dict[Tuple[str, ...], str] = {}
+    variants: Dict[str, Tuple[str, ...]] = {}
+    for term, forms in SYNONYMS.items():
+        variants[term] = (term, *forms)
+        for form in variants[term]:
+            canonical[tuple(form.split())] = term
+    return canonical, variants, max(len(words) for words in canonical)
+
+
+_CANONICAL, _VARIANTS, _MAX_PHRASE = _compile_synonyms()
+
+
+def _prefix(words: str) -> bool:
+    return len(words.rsplit(" ", 1)[-1]) >= PREFIX_MIN_CHARS
+
+
+def index_text(*parts: Optional[str]) -> str:
+    """Searchable form of an article's text: folded tokens between spaces (" roubo em ceilandia ")."""
+    return " " + " ".join(TOKEN_RE.findall(fold(" ".join(p for p in parts if p)))) + " "
+
+
+class AnalyzedQuery(NamedTuple):
+    text: str  # como digitado, espaços normalizados
+    terms: Tuple[str, ...]  # canônicos, na ordem; um termo pode ter várias palavras
+
+    @property
+    def key(self) -> str:
+        return " ".join(self.terms)
+
+    def variants(self, term: str) -> Tuple[str, ...]:
+        return _VARIANTS.get(term, (term,))
+
+    def like_groups(self) -> List[List[str]]:
+        """LIKE patterns over index_text(), one list per term (any pattern of the list matches)."""
+        return [
+            [f"% {v}%" if _prefix(v) else f"% {v} %" for v in self.variants(term)]
+            for term in self.terms
+        ]
+
+    def match_groups(self) -> List[List[str]]:
+        """like_groups() as plain substrings of index_text(), for the Aho-Corasick filters (backend/events.py)."""
+        return [
+            [f" {v}" if _prefix(v) else f" {v} " for v in self.variants(term)]
+            for term in self.terms
+        ]
+
+    def fts_query(self, any_term: bool = False) -> str:
+        """FTS5 MATCH expression: every term (or any, with `any_term`), each as any of its variants."""
+        groups = [
+            "(" + " OR ".join(f'"{v}"' + ("*" if _prefix(v) else "") for v in self.variants(term)) + ")"
+            for term in self.terms
+        ]
+        return (" OR " if any_term else " AND ").join(groups)
+
+    def tsquery(self) -> str:
+        """to_tsquery expression (same shape as fts_query); tokens are [a-z0-9]+, so nothing to escape."""
+        groups = [
+            "(" + " | ".join(" <-> ".join(v.split()) + (":*" if _prefix(v) else "") for v in self.variants(term)) + ")"
+            for term in self.terms
+        ]
+        return " & ".join(groups)
+
+    def external_query(self, region: Optional[str] = None, context: str = EXTERNAL_CONTEXT) -> str:
+        """The user's folded text for search engines, with the region/context appended unless already in it.
+
+        Synonyms are not applied: they only serve the cache key and the local lookups.
+        """
+        query = " ".join(TOKEN_RE.findall(fold(self.text)))
+        present = set(self.terms)
+        for extra in (region, context):
+            extra_terms = analyze(extra or "").terms
+            if extra_terms and not present.issuperset(extra_terms):
+                query = f"{query} {' '.join(TOKEN_RE.findall(fold(extra)))}".strip()
+                present.update(extra_terms)
+        return query
+
+
+@lru_cache(maxsize=4096)
+def analyze(q: str) -> AnalyzedQuery:
+    tokens = TOKEN_RE.findall(fold(q or ""))
+    terms: List[str] = []
+    i = 0
+    while i < len(tokens):
+        # Longest synonym phrase starting here ("pm df" before a bare "pm")
+        for size in range(min(_MAX_PHRASE, len(tokens) - i), 0, -1):
+            term = _CANONICAL.get(tuple(tokens[i:i + size]))
+            if term:
+                i += size
+                break
+        else:
+            term = tokens[i]
+            i += 1
+            if term in STOPWORDS:
+                continue
+        if term not in terms:
+            terms.append(term)
+    if not terms:
+        # Only stopwords ("de"): search them rather than nothing
+        terms = list(dict.fromkeys(tokens))
+    return AnalyzedQuery(" ".join((q or "").split()), tuple(terms))
@@ -0,0 +1,315 @@
+"""
+Backfill histórico (GDELT + NewsAPI) com checkpoints retomáveis.
+
+Uso:
+    python -m backend.backfill --since 2025-10-01 --until 2026-10-01 \
+        --query "segurança pública Distrito Federal" --sources gdelt newsapi
+
+A faixa de datas é dividida em janelas; cada (fonte, janela) vira uma linha em
+`backfill_checkpoints`. Janelas concluídas são puladas ao reexecutar o mesmo
+comando, e a NewsAPI retoma da última página salva.
+
+As respostas são acumuladas e normalizadas em lote (BACKFILL_BATCH_PAYLOADS
+respostas ou BACKFILL_BATCH_MB), para o pool de normalize_payloads ter trabalho
+que compense; o checkpoint de uma janela só é gravado depois que o lote com as
+respostas dela foi salvo.
+"""
+import os
+import time
+import asyncio
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from .database import get_connection, init_db
+from .storage import get_storage
+from .fetchers import GDELT_URL, NEWSAPI_URL
+from .normalize import count_entries, normalize_payloads
+from .logging_config import setup_logging
+
+load_dotenv()
+logger = setup_logging()
+
+GDELT_MAX_RECORDS = 250
+NEWSAPI_PAGE_SIZE = 100
+MIN_SPLIT_WINDOW = timedelta(hours=1)
+MAX_RETRIES = 3
+
+# Respostas acumuladas antes de normalizar e gravar
+BACKFILL_BATCH_PAYLOADS = int(os.getenv("BACKFILL_BATCH_PAYLOADS", "32"))
+BACKFILL_BATCH_BYTES = int(float(os.getenv("BACKFILL_BATCH_MB", "8")) * 1024 * 1024)
+
+# Requisições por segundo e requisições simultâneas por fonte
+DEFAULT_LIMITS = {
+    "gdelt": {"rate": 0.2, "concurrency": 2},  # GDELT pede ~1 req / 5 s
+    "newsapi": {"rate": 1.0, "concurrency": 2},
+}
+
+
+class RateLimiter:
+    """Token bucket shared by the coroutines of one source."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _fmt(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class Backfill:
+    def __init__(self, query: str, since: datetime, until: datetime, window: timedelta,
+                 sources: List[str], limits: Optional[Dict] = None):
+        self.query = query
+        self.since, self.until, self.window = since, until, window
+        self.sources = sources
+        self.limits = {s: dict(DEFAULT_LIMITS[s], **(limits or {}).get(s, {})) for s in sources}
+        self.newsapi_key = os.getenv("NEWS_API_KEY")
+        # Same arguments -> same run_key -> resume instead of starting over
+        key_src = f"{query}|{_fmt(since)}|{_fmt(until)}|{window.total_seconds()}"
+        self.run_key = hashlib.sha256(key_src.encode()).hexdigest()[:16]
+        self.saved = 0
+        self.requests = 0
+        # Payloads waiting for normalization, and the checkpoints that wait for them
+        self._batch: List[Tuple[str, bytes]] = []
+        self._batch_bytes = 0
+        self._batch_checkpoints: List[Tuple] = []
+
+    # --- Checkpoints -------------------------------------------------------
+    def _plan(self) -> List[Tuple[str, str, str, int]]:
+        """Creates missing checkpoint rows and returns the pending (source, start, end, page).
+
+        NewsAPI windows 'skipped' for lack of NEWS_API_KEY count as pending once it is set.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        rows = []
+        for source in self.sources:
+            start = self.since
+            while start < self.until:
+                end = min(start + self.window, self.until)
+                rows.append((self.run_key, source, _fmt(start), _fmt(end)))
+                start = end
+        cursor.executemany("""
+            INSERT OR IGNORE INTO backfill_checkpoints (run_key, source, window_start, window_end, page, status, fetched, updated_at)
+            VALUES (?, ?, ?, ?, 1, 'pending', 0, NULL)
+        """, rows)
+        conn.commit()
+        retry_skipped = "newsapi" if self.newsapi_key else ""
+        cursor.execute("""
+            SELECT source, window_start, window_end, page FROM backfill_checkpoints
+            WHERE run_key = ? AND (status = 'pending' OR (status = 'skipped' AND source = ?)) AND source IN ({})
+            ORDER BY window_start
+        """.format(",".join("?" * len(self.sources))), [self.run_key, retry_skipped] + self.sources)
+        pending = [(r["source"], r["window_start"], r["window_end"], r["page"]) for r in cursor.fetchall()]
+        conn.close()
+        return pending
+
+    def _checkpoint(self, source: str, start: str, end: str, status: str, page: int = 1, fetched: int = 0):
+        conn = get_connection()
+        conn.execute("""
+            INSERT INTO backfill_checkpoints (run_key, source, window_start, window_end, page, status, fetched, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (run_key, source, window_start, window_end) DO UPDATE SET
+                page = excluded.page, status = excluded.status,
+                fetched = backfill_checkpoints.fetched + excluded.fetched, updated_at = excluded.updated_at
+        """, (self.run_key, source, start, end, page, status, fetched, datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+
+    # --- HTTP --------------------------------------------------------------
+    async def _get(self, client: httpx.AsyncClient, source: str, url: str, **kwargs) -> Optional[bytes]:
+        for attempt in range(1, MAX_RETRIES + 1):
+            await self.limiters[source].acquire()
+            self.requests += 1
+            try:
+                resp = await client.get(url, timeout=30.0, **kwargs)
+                if resp.status_code == 200:
+                    return resp.content
+                if resp.status_code == 426 or b"maximumResultsReached" in resp.content:
+                    return None  # NewsAPI: plan limit for this query/window
+                logger.warning(f"Backfill {source}: HTTP {resp.status_code} (attempt {attempt})")
+            except httpx.HTTPError as e:
+                logger.warning(f"Backfill {source}: {e} (attempt {attempt})")
+            await asyncio.sleep(2 ** attempt)
+        raise RuntimeError(f"{source} failed after {MAX_RETRIES} attempts")
+
+    # --- Ingest ------------------------------------------------------------
+    def _ingest(self, kind: str, body: bytes) -> int:
+        """Queues the body for the next batch; returns its entry count (for paging/splitting)."""
+        self._batch.append((kind, body))
+        self._batch_bytes += len(body)
+        return count_entries(kind, body)
+
+    async def _checkpoint_after_batch(self, *checkpoint):
+        """Checkpoint for a window whose payloads are in the batch: written once they are saved."""
+        self._batch_checkpoints.append(checkpoint)
+        if len(self._batch) >= BACKFILL_BATCH_PAYLOADS or self._batch_bytes >= BACKFILL_BATCH_BYTES:
+            await self._flush()
+
+    async def _flush(self):
+        async with self._flush_lock:
+            batch, checkpoints = self._batch, self._batch_checkpoints
+            self._batch, self._batch_bytes, self._batch_checkpoints = [], 0, []
+            if batch:
+                loop = asyncio.get_running_loop()
+                rows = await loop.run_in_executor(None, normalize_payloads, batch)
+                self.saved += await loop.run_in_executor(None, get_storage().save_rows, rows)
+            for checkpoint in checkpoints:
+                self._checkpoint(*checkpoint)
+
+    async def _run_gdelt(self, client, start: str, end: str, queue: asyncio.Queue):
+        start_dt, end_dt = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        params = {
+            "query": f"{self.query} sourcecountry:BR",
+            "mode": "artlist",
+            "format": "json",
+            "maxrecords": str(GDELT_MAX_RECORDS),
+            "sort": "datedesc",
+            "startdatetime": start_dt.strftime("%Y%m%d%H%M%S"),
+            "enddatetime": end_dt.strftime("%Y%m%d%H%M%S"),
+        }
+        body = await self._get(client, "gdelt", GDELT_URL, params=params)
+        count = self._ingest("gdelt", body) if body else 0
+        if count >= GDELT_MAX_RECORDS and end_dt - start_dt > MIN_SPLIT_WINDOW:
+            # Window saturated: GDELT has no paging, so split it and fetch both halves
+            mid = start_dt + (end_dt - start_dt) / 2
+            for a, b in ((start_dt, mid), (mid, end_dt)):
+                self._checkpoint("gdelt", _fmt(a), _fmt(b), "pending")
+                queue.put_nowait(("gdelt", _fmt(a), _fmt(b), 1))
+            self.total += 2
+            await self._checkpoint_after_batch("gdelt", start, end, "split", 1, count)
+        else:
+            await self._checkpoint_after_batch("gdelt", start, end, "done", 1, count)
+
+    async def _run_newsapi(self, client, start: str, end: str, page: int):
+        if not self.newsapi_key:
+            self._checkpoint("newsapi", start, end, "skipped")
+            return
+        while True:
+            params = {
+                "q": self.query, "language": "pt", "sortBy": "publishedAt",
+                "from": start, "to": end, "pageSize": NEWSAPI_PAGE_SIZE, "page": page,
+            }
+            body = await self._get(client, "newsapi", NEWSAPI_URL, params=params,
+                                   headers={"X-Api-Key": self.newsapi_key})
+            count = self._ingest("newsapi", body) if body else 0
+            if count < NEWSAPI_PAGE_SIZE:
+                await self._checkpoint_after_batch("newsapi", start, end, "done", page, count)
+                return
+            page += 1
+            await self._checkpoint_after_batch("newsapi", start, end, "pending", page, count)
+
+    async def _worker(self, source: str, client, queue: asyncio.Queue):
+        while True:
+            task = await queue.get()
+            try:
+                _, start, end, page = task
+                if source == "gdelt":
+                    await self._run_gdelt(client, start, end, queue)
+                else:
+                    await self._run_newsapi(client, start, end, page)
+            except Exception as e:
+                # Stays 'pending' in the checkpoint table: picked up on the next run
+                logger.error(f"Backfill {source} window {task[1]} failed: {e}")
+            finally:
+                self.done_windows += 1
+                queue.task_done()
+
+    async def _report(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self._log_progress()
+
+    def _log_progress(self):
+        total = self.total
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        rate = self.done_windows / elapsed
+        remaining = max(total - self.done_windows, 0)
+        eta = f"{remaining / rate / 60:.1f} min" if rate else "?"
+        logger.info(
+            f"📦 Backfill {self.run_key}: {self.done_windows}/{total} windows, {self.saved} new articles "
+            f"({self.saved / elapsed:.1f} art/s, {self.requests} requests), ETA {eta}"
+        )
+
+    async def run(self, report_interval: float = 15.0, transport: httpx.AsyncBaseTransport = None) -> Dict:
+        pending = self._plan()
+        self.total = len(pending)
+        logger.info(f"📦 Backfill {self.run_key}: {self.total} pending windows for {', '.join(self.sources)}")
+        self.limiters = {s: RateLimiter(self.limits[s]["rate"]) for s in self.sources}
+        self.started, self.done_windows = time.monotonic(), 0
+        self._flush_lock = asyncio.Lock()
+        queues = {s: asyncio.Queue() for s in self.sources}
+        for task in pending:
+            queues[task[0]].put_nowait(task)
+
+        limits = httpx.Limits(max_connections=sum(v["concurrency"] for v in self.limits.values()))
+        async with httpx.AsyncClient(limits=limits, follow_redirects=True, transport=transport) as client:
+            workers = [
+                asyncio.create_task(self._worker(source, client, queues[source]))
+                for source in self.sources
+                for _ in range(self.limits[source]["concurrency"])
+            ]
+            reporter = asyncio.create_task(self._report(report_interval))
+            for q in queues.values():
+                await q.join()
+            for task in workers + [reporter]:
+                task.cancel()
+        await self._flush()
+        self._log_progress()
+        return {"run_key": self.run_key, "windows": self.done_windows, "saved": self.saved, "requests": self.requests}
+
+
+def _parse_limits(values: List[str]) -> Dict:
+    """--rate gdelt=0.2 newsapi=1 -> {"gdelt": {"rate": 0.2}, ...}"""
+    limits = {}
+    for value in values or []:
+        source, rate = value.split("=", 1)
+        limits.setdefault(source, {})["rate"] = float(rate)
+    return limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill histórico de notícias (GDELT / NewsAPI)")
+    parser.add_argument("--since", required=True, help="Data inicial (YYYY-MM-DD)")
+    parser.add_argument("--until", default=datetime.now().strftime("%Y-%m-%d"), help="Data final (YYYY-MM-DD)")
+    parser.add_argument("--query", default="segurança pública Distrito Federal")
+    parser.add_argument("--sources", nargs="+", default=["gdelt", "newsapi"], choices=sorted(DEFAULT_LIMITS))
+    parser.add_argument("--window-hours", type=float, default=24)
+    parser.add_argument("--rate", nargs="*", help="Limite por fonte em req/s, ex: gdelt=0.2 newsapi=1")
+    args = parser.parse_args()
+
+    init_db()
+    backfill = Backfill(
+        query=args.query,
+        since=datetime.fromisoformat(args.since),
+        until=datetime.fromisoformat(args.until),
+        window=timedelta(hours=args.window_hours),
+        sources=args.sources,
+        limits=_parse_limits(args.rate),
+    )
+    summary = asyncio.run(backfill.run())
+    logger.info(f"✅ Backfill finished: {summary}")
+
+
+if __name__ == "__main__":
+    main()
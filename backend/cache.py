@@ -0,0 +1,74 @@
+"""
+Cache Redis de /news com circuit breaker, um por processo (app.state.cache).
+
+O Redis é testado no startup e, depois, a cada REDIS_PROBE_SECONDS: um Redis
+que volta depois do boot passa a ser usado, e um erro numa operação abre o
+circuito até a próxima verificação. Cada worker converge sozinho, sem depender
+de um único ping no startup.
+"""
+import os
+import asyncio
+from typing import Optional, Tuple
+
+import redis
+
+from .profiling import span
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_PROBE_SECONDS = float(os.getenv("REDIS_PROBE_SECONDS", "30"))
+
+
+class RedisCache:
+    def __init__(self, url: str = REDIS_URL):
+        self.url = url
+        self.client: Optional[redis.Redis] = None
+        self.available = False
+
+    def probe(self) -> bool:
+        try:
+            if self.client is None:
+                # Raw bytes: cached values are pre-encoded /news bodies
+                self.client = redis.from_url(self.url, socket_connect_timeout=2, socket_timeout=2)
+            self.client.ping()
+            if not self.available:
+                logger.info("✅ Redis Connected")
+            self.available = True
+        except Exception as e:
+            if self.available or self.client is None:
+                logger.warning(f"⚠️ Redis Connection Failed ({e}). Cache disabled.")
+            self.available = False
+        return self.available
+
+    def _trip(self, operation: str, error: Exception):
+        logger.warning(f"Redis {operation} error ({error}); cache disabled until the next probe.")
+        self.available = False
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[bytes], int]:
+        """(value, seconds left) in one round trip; (None, 0) on miss or when unavailable."""
+        if not self.available:
+            return None, 0
+        try:
+            with span("redis:get"):
+                value, ttl = self.client.pipeline().get(key).ttl(key).execute()
+            return value, max(ttl, 0)
+        except Exception as e:
+            self._trip("read", e)
+            return None, 0
+
+    def set(self, key: str, value: bytes, ttl: int):
+        if not self.available:
+            return
+        try:
+            with span("redis:set"):
+                self.client.setex(key, ttl, value)
+        except Exception as e:
+            self._trip("write", e)
+
+    async def keep_probing(self, interval: float = REDIS_PROBE_SECONDS):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            await loop.run_in_executor(None, self.probe)
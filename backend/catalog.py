@@ -0,0 +1,229 @@
+"""
+Catálogo de consultas da ingestão agendada (tópicos x regiões x fontes).
+
+Uso:
+    python -m backend.catalog --list              # entradas, intervalo atual e rendimento
+    python -m backend.catalog --run --budget 20   # uma rodada fora do agendamento
+
+Cada entrada é uma consulta ("roubo Ceilândia") em uma fonte (google_rss,
+newsapi, gdelt, ddg), persistida em `query_catalog` com seu próprio intervalo
+(no backend de armazenamento: com PostgreSQL, um catálogo só para todos os nós).
+A cada job fetch_all, as entradas vencidas (no máximo CATALOG_BUDGET, ou seja,
+um número previsível de chamadas externas) rodam em paralelo com limite de
+concorrência por fonte. Os resultados são deduplicados entre entradas e contra
+o arquivo.
+
+Dois grupos de entradas:
+- gerais: CATALOG_TOPICS x "Distrito Federal" x CATALOG_SOURCES (28 por
+  padrão). Passam na frente no orçamento e rodam a cada GENERAL_INTERVAL_MINUTES
+  (a cadência do cron), sem intervalo adaptativo;
+- por RA: CATALOG_REGION_TOPICS x CATALOG_REGIONS x CATALOG_REGION_SOURCES (35
+  por padrão). Quem não traz nada novo tem o intervalo dobrado (até
+  CATALOG_MAX_INTERVAL_HOURS), quem rende bem volta a rodar mais cedo.
+O padrão cabe inteiro numa rodada (63 <= CATALOG_BUDGET); ao aumentar tópicos,
+regiões ou fontes, aumente o orçamento junto.
+
+GDELT e NewsAPI recebem a janela desde a última execução da entrada
+(last_run_at), então uma entrada que roda com atraso não perde o intervalo.
+"""
+import os
+import json
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from .database import init_db
+from .storage import get_storage
+from .analyzer import analyze
+from .enrichment import GAZETTEER
+from .normalize import NewsRecord
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+
+def _env_list(name: str, default: Sequence[str]) -> List[str]:
+    value = os.getenv(name)
+    return [v.strip() for v in value.split(",") if v.strip()] if value else list(default)
+
+
+# Região "Distrito Federal" = consulta geral, sem recorte de RA
+GENERAL_REGION = "Distrito Federal"
+CATALOG_TOPICS = _env_list("CATALOG_TOPICS", [
+    "segurança pública", "homicídio", "roubo", "furto", "tráfico de drogas", "violência doméstica", "operação policial",
+])
+CATALOG_SOURCES = _env_list("CATALOG_SOURCES", ["google_rss", "newsapi", "gdelt", "ddg"])
+# Por RA: uma consulta ampla na fonte sem cota (as demais já cobrem o DF todo)
+CATALOG_REGIONS = _env_list("CATALOG_REGIONS", list(GAZETTEER["region"]))
+CATALOG_REGION_TOPICS = _env_list("CATALOG_REGION_TOPICS", ["segurança pública"])
+CATALOG_REGION_SOURCES = _env_list("CATALOG_REGION_SOURCES", ["google_rss"])
+
+# Chamadas externas por rodada e paralelismo
+CATALOG_BUDGET = int(os.getenv("CATALOG_BUDGET", "64"))
+SOURCE_CONCURRENCY = {"google_rss": 4, "newsapi": 2, "gdelt": 1, "ddg": 2}
+# Fontes que aceitam a janela desde a última execução (fetch_<source>(query, since=...))
+WINDOWED_SOURCES = {"gdelt", "newsapi"}
+
+# Cadência das entradas gerais (= cron do fetch_all) e intervalo adaptativo das demais
+GENERAL_INTERVAL_MINUTES = 12 * 60
+INITIAL_INTERVAL_MINUTES = 12 * 60
+MIN_INTERVAL_MINUTES = int(float(os.getenv("CATALOG_MIN_INTERVAL_HOURS", "6")) * 60)
+MAX_INTERVAL_MINUTES = int(float(os.getenv("CATALOG_MAX_INTERVAL_HOURS", "336")) * 60)
+# Itens novos numa execução a partir dos quais a entrada é antecipada
+HIGH_YIELD_ITEMS = 3
+# Vence quem está a menos disso do horário: um cron alguns segundos adiantado não pula a rodada
+DUE_SLACK_MINUTES = 30
+
+
+def entry_id(source: str, query: str) -> str:
+    return hashlib.sha256(f"{source}|{query}".encode()).hexdigest()[:16]
+
+
+def catalog_entries(topics: Sequence[str] = None, sources: Sequence[str] = None, regions: Sequence[str] = None,
+                    region_topics: Sequence[str] = None, region_sources: Sequence[str] = None) -> List[Dict]:
+    """General (whole-DF) entries first, then the per-RA ones."""
+    groups = [(sources or CATALOG_SOURCES, topics or CATALOG_TOPICS, [GENERAL_REGION])]
+    ras = [r for r in (CATALOG_REGIONS if regions is None else regions) if r != GENERAL_REGION]
+    groups.append((region_sources or CATALOG_REGION_SOURCES, region_topics or CATALOG_REGION_TOPICS, ras))
+    entries, seen = [], set()
+    for group_sources, group_topics, group_regions in groups:
+        for source in group_sources:
+            for topic in group_topics:
+                for region in group_regions:
+                    query = f"{topic} {region}"
+                    # "homicídio" and "Homicidio " are one external call
+                    key = (source, analyze(query).key)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    entries.append({"id": entry_id(source, query), "source": source, "topic": topic,
+                                    "region": region, "query": query})
+    return entries
+
+
+def sync_catalog(entries: Optional[List[Dict]] = None, now: Optional[datetime] = None) -> int:
+    """Upserts the configured entries; entries no longer configured are disabled (history kept).
+
+    Returns the number of enabled entries.
+    """
+    entries = catalog_entries() if entries is None else entries
+    now = now or datetime.now()
+    general = sum(e["region"] == GENERAL_REGION for e in entries)
+    if general > CATALOG_BUDGET:
+        logger.warning(f"Catalog: {general} general entries exceed CATALOG_BUDGET={CATALOG_BUDGET}; "
+                       f"they will not keep their {GENERAL_INTERVAL_MINUTES // 60}h cadence")
+    get_storage().sync_catalog(entries, INITIAL_INTERVAL_MINUTES, now.isoformat())
+    return len(entries)
+
+
+def due_entries(budget: int, now: Optional[datetime] = None) -> List[Dict]:
+    """Due general (whole-DF) entries first, then the most overdue per-RA ones."""
+    now = now or datetime.now()
+    return get_storage().due_catalog_entries(budget, (now + timedelta(minutes=DUE_SLACK_MINUTES)).isoformat())
+
+
+def next_interval(current: int, new_items: int, region: str = "") -> int:
+    if region == GENERAL_REGION:
+        return GENERAL_INTERVAL_MINUTES
+    if new_items == 0:
+        return min(current * 2, MAX_INTERVAL_MINUTES)
+    if new_items >= HIGH_YIELD_ITEMS:
+        return max(current // 2, MIN_INTERVAL_MINUTES)
+    return current
+
+
+def _fan_out(fetcher, entries: List[Dict]) -> List[List[NewsRecord]]:
+    """Runs every entry's fetch; concurrency capped per source (and so in total)."""
+    sources = {e["source"] for e in entries}
+    limits = {s: threading.BoundedSemaphore(SOURCE_CONCURRENCY.get(s, 1)) for s in sources}
+
+    def run(entry: Dict) -> List[NewsRecord]:
+        fetch = getattr(fetcher, f"fetch_{entry['source']}")
+        # Window since the entry last ran: a late run still covers the gap
+        kwargs = {}
+        if entry["source"] in WINDOWED_SOURCES and entry.get("last_run_at"):
+            kwargs["since"] = datetime.fromisoformat(entry["last_run_at"])
+        with limits[entry["source"]]:
+            try:
+                return fetch(entry["query"], **kwargs)
+            except Exception as e:
+                logger.error(f"Catalog entry '{entry['query']}' ({entry['source']}) failed: {e}")
+                return []
+
+    # Enough threads for every source to use its full limit, never more
+    workers = max(1, min(len(entries), sum(SOURCE_CONCURRENCY.get(s, 1) for s in sources)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="catalog") as pool:
+        return list(pool.map(run, entries))
+
+
+def run_catalog(fetcher, budget: int = None, now: Optional[datetime] = None) -> List[NewsRecord]:
+    """One ingest round over the due catalog entries.
+
+    Returns the fetched records deduplicated across entries (saving is up to the
+    caller); each entry is rescheduled from how many of its records were new.
+    """
+    now = now or datetime.now()
+    sync_catalog(now=now)
+    entries = due_entries(CATALOG_BUDGET if budget is None else budget, now)
+    if not entries:
+        logger.info("Catalog: no entries due.")
+        return []
+
+    results = _fan_out(fetcher, entries)
+    unique: Dict[str, NewsRecord] = {}
+    for records in results:
+        for record in records:
+            unique.setdefault(record.id, record)
+    known = get_storage().existing_ids(list(unique))
+
+    # A new record is credited to the first entry (in due order) that returned it
+    credited = set(known)
+    updates = []
+    for entry, records in zip(entries, results):
+        new_items = 0
+        for record in records:
+            if record.id not in credited:
+                credited.add(record.id)
+                new_items += 1
+        interval = next_interval(entry["interval_minutes"], new_items, entry["region"])
+        updates.append((interval, (now + timedelta(minutes=interval)).isoformat(), now.isoformat(),
+                        len(records), new_items, new_items, entry["id"]))
+
+    get_storage().update_catalog_entries(updates)
+
+    fetched = sum(len(r) for r in results)
+    logger.info(
+        f"Catalog: {len(entries)} queries, {fetched} fetched, {len(unique)} unique, "
+        f"{len(unique) - len(known)} new"
+    )
+    return list(unique.values())
+
+
+def catalog_stats() -> List[Dict]:
+    return get_storage().catalog_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catálogo de consultas da ingestão")
+    parser.add_argument("--list", action="store_true", help="Mostra as entradas e o rendimento")
+    parser.add_argument("--run", action="store_true", help="Executa uma rodada e salva os resultados")
+    parser.add_argument("--budget", type=int, default=CATALOG_BUDGET, help="Máximo de chamadas externas na rodada")
+    args = parser.parse_args()
+
+    init_db()
+    if args.run:
+        from .fetchers import NewsFetcher
+
+        records = run_catalog(NewsFetcher(), budget=args.budget)
+        print(json.dumps({"unique": len(records), "saved": get_storage().save_rows(records)}))
+    if args.list or not args.run:
+        sync_catalog()
+        for row in catalog_stats():
+            print(json.dumps(row, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
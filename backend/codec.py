@@ -0,0 +1,125 @@
+"""
+Serialização JSON rápida (orjson) para /news e para o cache Redis.
+
+NewsRecords (ou qualquer tupla em NEWS_COLUMNS) já estão no formato final
+(publishedAt é texto ISO), então são codificados direto, sem passar por NewsItem. Os mesmos bytes servem
+de corpo da resposta e de valor no Redis: um cache hit devolve o corpo como
+está, sem desserializar nem revalidar.
+
+`cached_response` completa o caminho HTTP: ETag (hash do corpo) com
+If-None-Match -> 304, Cache-Control a partir do TTL da camada que respondeu e
+compressão (br se o pacote `brotli` estiver instalado, senão gzip) acima de
+COMPRESS_MIN_BYTES. Corpos comprimidos ficam num LRU pequeno indexado pelo
+ETag, então o mesmo resultado não é comprimido de novo a cada refresh.
+"""
+import os
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+import orjson
+from starlette.responses import Response
+
+from .normalize import NEWS_COLUMNS
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESSED_CACHE_SIZE = 256
+
+
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson; bytes/str content is sent as-is (pre-encoded)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        return dumps(content)
+
+
+def dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=str)
+
+
+def encode_news_rows(rows: Iterable) -> bytes:
+    """NewsRecords / tuples in NEWS_COLUMNS order -> JSON array of NewsItem-shaped objects."""
+    return orjson.dumps([dict(zip(NEWS_COLUMNS, row)) for row in rows])
+
+
+# --- HTTP caching / compression ------------------------------------------------
+def etag_for(body: bytes) -> str:
+    # Weak: the same entity is served gzip/br/identity under one validator
+    return 'W/"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:]
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _accepted(accept_encoding: str) -> set:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding)
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    accepted = _accepted(accept_encoding or "")
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+_compressed: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+_compressed_lock = threading.Lock()
+
+
+def compress_body(body: bytes, encoding: str, etag: str) -> bytes:
+    key = (etag, encoding)
+    with _compressed_lock:
+        data = _compressed.get(key)
+        if data is not None:
+            _compressed.move_to_end(key)
+            return data
+    data = brotli.compress(body, quality=5) if encoding == "br" else gzip.compress(body, compresslevel=6, mtime=0)
+    with _compressed_lock:
+        _compressed[key] = data
+        if len(_compressed) > COMPRESSED_CACHE_SIZE:
+            _compressed.popitem(last=False)
+    return data
+
+
+def cached_response(request_headers: Mapping[str, str], body: bytes, max_age: int) -> Response:
+    """Encoded JSON body -> 304 / compressed / plain response with ETag and Cache-Control."""
+    etag = etag_for(body)
+    headers = {
+        "ETag": etag,
+        # Per API key, so never stored by shared caches
+        "Cache-Control": f"private, max-age={max_age}" if max_age > 0 else "private, no-cache",
+        "Vary": "Accept-Encoding, X-API-Key",
+    }
+    if etag_matches(request_headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    encoding = choose_encoding(request_headers.get("accept-encoding")) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        body = compress_body(body, encoding, etag)
+    return ORJSONResponse(body, headers=headers)
@@ -0,0 +1,305 @@
+"""
+Download do artigo completo e extração do texto principal.
+
+Uso:
+    python -m backend.content --limit 200
+
+Os artigos mais recentes ainda sem conteúdo são baixados por um cliente httpx
+assíncrono (pool de conexões), com limite global e por domínio de requisições
+simultâneas, respeitando o robots.txt e um teto de tamanho (CONTENT_MAX_BYTES).
+Redirecionamentos são seguidos um a um, com o robots.txt e o limite do domínio
+de cada salto (os links do Google News RSS redirecionam para o portal).
+O texto principal é extraído com lxml no pool de processos de
+backend/normalize.py e gravado comprimido em `noticia_content` (zstd se o
+pacote `zstandard` estiver instalado, senão zlib), fora de `noticias`. O texto
+também alimenta o índice full-text `noticia_fts` (ranking híbrido) e os
+trechos usados como evidência pelo agente.
+
+Cada tentativa fica registrada. Recusas definitivas (robots, not_html,
+too_large, HTTP 4xx) não são repetidas; timeouts, erros de rede, 5xx e 429
+voltam à fila com espera exponencial (CONTENT_RETRY_MINUTES, dobrando) até
+CONTENT_MAX_ATTEMPTS tentativas.
+
+Também roda como job "fetch_content" após as coletas agendadas (ver main.py).
+"""
+import os
+import json
+import zlib
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+import lxml.html
+from lxml.etree import ParserError
+
+from .database import get_connection, init_db
+from .storage import get_storage
+from .normalize import NORMALIZE_WORKERS, _get_pool
+from .logging_config import setup_logging
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is always available
+    zstandard = None
+
+logger = setup_logging()
+
+CONTENT_CONCURRENCY = int(os.getenv("CONTENT_CONCURRENCY", "8"))
+CONTENT_PER_DOMAIN = int(os.getenv("CONTENT_PER_DOMAIN", "2"))
+CONTENT_MAX_BYTES = int(os.getenv("CONTENT_MAX_BYTES", str(2 * 1024 * 1024)))
+CONTENT_TIMEOUT = float(os.getenv("CONTENT_TIMEOUT", "15"))
+CONTENT_BATCH = int(os.getenv("CONTENT_BATCH", "200"))
+CONTENT_USER_AGENT = os.getenv("CONTENT_USER_AGENT", "AgenteSegPubBot/1.0")
+CONTENT_MAX_REDIRECTS = 5
+CONTENT_MAX_ATTEMPTS = int(os.getenv("CONTENT_MAX_ATTEMPTS", "5"))
+CONTENT_RETRY_MINUTES = float(os.getenv("CONTENT_RETRY_MINUTES", "30"))
+# Texto guardado por artigo e parágrafos curtos demais (legendas, botões, créditos)
+CONTENT_MAX_CHARS = 20_000
+MIN_PARAGRAPH_CHARS = 40
+
+_BOILERPLATE = "//script|//style|//noscript|//nav|//header|//footer|//aside|//form|//figure|//iframe"
+
+
+# --- Compression --------------------------------------------------------------
+def compress_text(text: str) -> Tuple[str, bytes]:
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=6).compress(data)
+    return "zlib", zlib.compress(data, 6)
+
+
+def decompress_text(codec: str, blob: bytes) -> str:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return zlib.decompress(blob).decode("utf-8")
+
+
+# --- Extraction (runs in worker processes) -------------------------------------
+def _encoding(html: bytes, declared: Optional[str]) -> Optional[str]:
+    if declared:
+        return declared
+    try:
+        html.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return None  # lxml falls back to <meta charset> / latin-1
+
+
+def extract_text(html: bytes, encoding: Optional[str] = None, max_chars: int = CONTENT_MAX_CHARS) -> str:
+    """Main article text: the block (parent element) holding the most paragraph text."""
+    try:
+        parser = lxml.html.HTMLParser(encoding=_encoding(html, encoding))
+        doc = lxml.html.document_fromstring(html, parser=parser)
+    except (ParserError, ValueError):
+        return ""
+    for element in doc.xpath(_BOILERPLATE):
+        element.drop_tree()
+    root = next(doc.iter("article"), doc)
+
+    blocks: Dict = {}
+    for p in root.iter("p"):
+        text = " ".join(p.text_content().split())
+        if len(text) >= MIN_PARAGRAPH_CHARS:
+            blocks.setdefault(p.getparent(), []).append(text)
+    if not blocks:
+        return ""
+    best = max(blocks.values(), key=lambda paragraphs: sum(map(len, paragraphs)))
+    return "\n".join(best)[:max_chars]
+
+
+# --- Download ------------------------------------------------------------------
+class RobotsCache:
+    """robots.txt per host, fetched once per run through the shared client."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.parsers: Dict[str, Optional[RobotFileParser]] = {}
+        self.locks: Dict[str, asyncio.Lock] = {}
+
+    async def allowed(self, url: str) -> bool:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        async with self.locks.setdefault(host, asyncio.Lock()):
+            if host not in self.parsers:
+                self.parsers[host] = await self._load(host)
+        parser = self.parsers[host]
+        return parser is None or parser.can_fetch(CONTENT_USER_AGENT, url)
+
+    async def _load(self, host: str) -> Optional[RobotFileParser]:
+        parser = RobotFileParser()
+        try:
+            resp = await self.client.get(f"{host}/robots.txt", timeout=5.0)
+        except httpx.HTTPError:
+            return None  # unreachable robots.txt: allowed, like urllib's robotparser
+        if resp.status_code in (401, 403):
+            parser.disallow_all = True
+        elif resp.status_code == 200:
+            parser.parse(resp.text.splitlines())
+        else:
+            return None
+        return parser
+
+
+class ContentFetcher:
+    def __init__(self, transport: httpx.AsyncBaseTransport = None, use_pool: Optional[bool] = None):
+        self.transport = transport
+        self.use_pool = NORMALIZE_WORKERS > 1 if use_pool is None else use_pool
+        self.global_limit = asyncio.Semaphore(CONTENT_CONCURRENCY)
+        self.domain_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def _download(self, client: httpx.AsyncClient, url: str) -> Tuple[str, Optional[int], bytes, Optional[str]]:
+        """(status, http_status, body, charset); for a "redirect" the last item is the target URL."""
+        async with client.stream("GET", url) as resp:
+            if resp.has_redirect_location:
+                return "redirect", resp.status_code, b"", str(resp.url.join(resp.headers["location"]))
+            if resp.status_code != 200:
+                return "http_error", resp.status_code, b"", None
+            if "html" not in resp.headers.get("content-type", "html"):
+                return "not_html", resp.status_code, b"", None
+            if int(resp.headers.get("content-length") or 0) > CONTENT_MAX_BYTES:
+                return "too_large", resp.status_code, b"", None
+            body = bytearray()
+            async for chunk in resp.aiter_bytes():
+                body += chunk
+                if len(body) > CONTENT_MAX_BYTES:
+                    return "too_large", resp.status_code, b"", None
+            return "ok", resp.status_code, bytes(body), resp.charset_encoding
+
+    async def _extract(self, html: bytes, encoding: Optional[str]) -> str:
+        if not self.use_pool:
+            return extract_text(html, encoding)
+        return await asyncio.get_running_loop().run_in_executor(_get_pool(), extract_text, html, encoding)
+
+    async def fetch_one(self, client: httpx.AsyncClient, robots: RobotsCache, news_id: str, url: str) -> Dict:
+        result = {"news_id": news_id, "status": "error", "http_status": None, "text": ""}
+        try:
+            # Redirects are followed here, not by httpx: every hop (e.g. news.google.com
+            # -> publisher) goes through that host's robots.txt and domain limit
+            for _ in range(CONTENT_MAX_REDIRECTS + 1):
+                if not await robots.allowed(url):
+                    result["status"] = "robots"
+                    return result
+                # Domain slot first: waiting on a busy domain must not hold a global slot
+                domain = urlsplit(url).netloc
+                async with self.domain_limits.setdefault(domain, asyncio.Semaphore(CONTENT_PER_DOMAIN)), self.global_limit:
+                    status, http_status, html, encoding = await self._download(client, url)
+                result.update(status=status, http_status=http_status)
+                if status != "redirect":
+                    break
+                url = encoding  # redirect target, see _download
+            else:
+                result["status"] = "too_many_redirects"
+            if status == "ok":
+                result["text"] = await self._extract(html, encoding)
+                if not result["text"]:
+                    result["status"] = "empty"
+        except Exception as e:
+            logger.warning(f"Content fetch failed for {url}: {e}")
+        return result
+
+    async def fetch_many(self, articles: List[Tuple[str, str]]) -> List[Dict]:
+        limits = httpx.Limits(max_connections=CONTENT_CONCURRENCY, max_keepalive_connections=CONTENT_CONCURRENCY)
+        async with httpx.AsyncClient(
+            transport=self.transport, limits=limits, timeout=CONTENT_TIMEOUT, follow_redirects=False,
+            headers={"User-Agent": CONTENT_USER_AGENT},
+        ) as client:
+            robots = RobotsCache(client)
+            return await asyncio.gather(*(self.fetch_one(client, robots, nid, url) for nid, url in articles))
+
+
+# --- Storage -------------------------------------------------------------------
+def pending_articles(limit: int = CONTENT_BATCH, now: Optional[datetime] = None) -> List[Tuple[str, str]]:
+    """Newest articles with no content attempt yet, or whose transient failure is due for a retry.
+
+    The articles come from the storage backend; the attempts (noticia_content) are this node's.
+    """
+    return get_storage().pending_articles(limit, (now or datetime.now()).isoformat())
+
+
+def is_transient(status: str, http_status: Optional[int]) -> bool:
+    """Network errors/timeouts, 5xx and 429 may succeed later; everything else is final."""
+    if status == "error":
+        return True
+    return status == "http_error" and (http_status is None or http_status >= 500 or http_status == 429)
+
+
+def save_contents(results: List[Dict], now: Optional[datetime] = None) -> int:
+    """Stores every attempt; transient failures get a retry_at with exponential backoff. Returns texts stored."""
+    now = now or datetime.now()
+    conn = get_connection()
+    cursor = conn.cursor()
+    placeholders = ",".join("?" * len(results))
+    attempts = dict(cursor.execute(
+        f"SELECT news_id, attempts FROM noticia_content WHERE news_id IN ({placeholders})",
+        [r["news_id"] for r in results],
+    ).fetchall())
+    stored = 0
+    for r in results:
+        attempt = attempts.get(r["news_id"], 0) + 1
+        retry_at = None
+        if is_transient(r["status"], r["http_status"]) and attempt < CONTENT_MAX_ATTEMPTS:
+            retry_at = (now + timedelta(minutes=CONTENT_RETRY_MINUTES * 2 ** (attempt - 1))).isoformat()
+        codec, blob = compress_text(r["text"]) if r["text"] else (None, None)
+        # A final row is never overwritten (e.g. by an overlapping run)
+        row = cursor.execute("""
+            INSERT INTO noticia_content
+                (news_id, status, http_status, codec, content, chars, fetched_at, attempts, retry_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(news_id) DO UPDATE SET
+                status = excluded.status, http_status = excluded.http_status, codec = excluded.codec,
+                content = excluded.content, chars = excluded.chars, fetched_at = excluded.fetched_at,
+                attempts = excluded.attempts, retry_at = excluded.retry_at
+            WHERE noticia_content.retry_at IS NOT NULL
+            RETURNING id
+        """, (r["news_id"], r["status"], r["http_status"], codec, blob, len(r["text"]), now.isoformat(),
+              attempt, retry_at)).fetchone()
+        if r["text"] and row is not None:
+            cursor.execute("INSERT INTO noticia_fts (rowid, body) VALUES (?, ?)", (row[0], r["text"]))
+            stored += 1
+    conn.commit()
+    conn.close()
+    return stored
+
+
+def get_contents(ids: List[str]) -> Dict[str, str]:
+    """news_id -> extracted text, for the ids that have it."""
+    if not ids:
+        return {}
+    conn = get_connection()
+    placeholders = ",".join("?" * len(ids))
+    rows = conn.execute(
+        f"SELECT news_id, codec, content FROM noticia_content WHERE status = 'ok' AND news_id IN ({placeholders})",
+        list(ids),
+    ).fetchall()
+    conn.close()
+    return {r["news_id"]: decompress_text(r["codec"], r["content"]) for r in rows}
+
+
+async def run(limit: int = CONTENT_BATCH, transport: httpx.AsyncBaseTransport = None,
+              use_pool: Optional[bool] = None) -> Dict:
+    articles = pending_articles(limit)
+    if not articles:
+        return {"attempted": 0, "stored": 0}
+    results = await ContentFetcher(transport=transport, use_pool=use_pool).fetch_many(articles)
+    summary: Dict = {"attempted": len(results), "stored": save_contents(results)}
+    for r in results:
+        summary[r["status"]] = summary.get(r["status"], 0) + 1
+    logger.info(f"📰 Content fetch: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baixa e extrai o texto completo dos artigos mais recentes")
+    parser.add_argument("--limit", type=int, default=CONTENT_BATCH, help="Máximo de artigos nesta execução")
+    args = parser.parse_args()
+
+    init_db()
+    print(json.dumps(asyncio.run(run(args.limit))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,41 @@
 import sqlite3
 import os
-from typing import List
+import heapq
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from .analyzer import analyze, index_text
 from .models import NewsItem
+from .normalize import NewsRecord, record_factory
 from .logging_config import setup_logging
+from . import semantic
+from .enrichment import extract_tags
+from .utils import DATA_DIR
+from .events import article_event, publish_new
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines
+    fcntl = None
 
 logger = setup_logging()
 
-# Using absolute path relative to project root or configured via env
-# For now, placing it in data/ folder similar to previous db
-DB_PATH = os.path.join("data", "historico_noticias.db")
+# Absolute, so every API worker / job worker opens the same file (DB_PATH or DATA_DIR from env)
+DB_PATH = os.path.abspath(os.getenv("DB_PATH", os.path.join(DATA_DIR, "historico_noticias.db")))
+
+# Bumped whenever init_db needs to migrate/backfill existing archives (PRAGMA user_version)
+SCHEMA_VERSION = 7
+
+# Hybrid ranking (reciprocal rank fusion + recency decay)
+RRF_K = 60
+RANK_CANDIDATES = 100
+RECENCY_HALF_LIFE_DAYS = float(os.getenv("RECENCY_HALF_LIFE_DAYS", "14"))
+
+# Lexical and vector retrieval run side by side; shared so we don't spawn threads per request
+_rank_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rank")
 
 def get_connection():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
@@ -16,11 +43,30 @@ def get_connection():
     conn.row_factory = sqlite3.Row
     return conn
 
-def init_db():
+def cold_db_path() -> str:
+    """Archive tier for old articles (see backend/retention.py)."""
+    return os.getenv("COLD_DB_PATH") or DB_PATH.replace(".db", "_cold.db")
+
+def get_archive_connection():
+    """Connection with noticias_all / noticia_tags_all views spanning the hot and cold tiers.
+
+    Views across attached databases must be TEMP, so they are (re)declared per
+    connection; without a cold file they are plain aliases of the hot tables.
+    """
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS noticias (
+    cold = cold_db_path()
+    has_cold = os.path.exists(cold)
+    if has_cold and "cold" not in {r[1] for r in conn.execute("PRAGMA database_list")}:
+        conn.execute("ATTACH DATABASE ? AS cold", (cold,))
+    for view, table in (("noticias_all", "noticias"), ("noticia_tags_all", "noticia_tags")):
+        cold_part = f" UNION ALL SELECT * FROM cold.{table}" if has_cold else ""
+        conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {view} AS SELECT * FROM main.{table}{cold_part}")
+    return conn
+
+def _create_news_tables(cursor, schema: str = "main"):
+    """noticias + noticia_tags, shared by the hot database and the cold tier."""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.noticias (
             id TEXT PRIMARY KEY,
             title TEXT,
             url TEXT,
@@ -30,6 +76,37 @@ def init_db():
             language TEXT
         )
     """)
+    # Recency listings and the retention cutoff both range over publishedAt
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_noticias_published ON noticias (publishedAt)")
+    # Entity tags (region / agency / crime_type) extracted at ingest.
+    # PK order serves the /news filters: kind + tag -> news ids.
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.noticia_tags (
+            news_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (kind, tag, news_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_noticia_tags_news ON noticia_tags (news_id)")
+
+@contextmanager
+def _startup_lock():
+    """Serializes init_db across processes: N API workers start (and migrate) at once."""
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    with open(f"{DB_PATH}.init.lock", "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)  # released when the file closes
+        yield
+
+def init_db():
+    with _startup_lock():
+        _init_db()
+
+def _init_db():
+    conn = get_connection()
+    cursor = conn.cursor()
+    _create_news_tables(cursor)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -38,16 +115,254 @@ def init_db():
             message TEXT
         )
     """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp)")
+    # Folded title + snippet for keyword search (backend/analyzer.py). Scanned newest first through
+    # the publishedAt index, so common terms stop at the first page. Keyed by news id: it keeps
+    # covering articles moved to the cold tier.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS noticia_search (
+            id TEXT PRIMARY KEY,
+            publishedAt TEXT,
+            body TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_noticia_search_published ON noticia_search (publishedAt)")
+    # Ingest order, the cursor of incremental exports (backend/export.py). noticias has a TEXT
+    # key, so its rowid is reused after deletes and renumbered by VACUUM; AUTOINCREMENT never
+    # goes back. Stays in the hot file when articles move to the cold tier.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS noticia_seq (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            news_id TEXT NOT NULL UNIQUE
+        )
+    """)
+    # Daily counters per dimension (total/source/region/agency/crime_type), kept in step
+    # with noticias inside the ingest transaction so /stats never scans the archive.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_counts (
+            dimension TEXT NOT NULL,
+            day TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, day, value)
+        ) WITHOUT ROWID
+    """)
+    # Durable job queue (fallback when Redis streams are unavailable), see backend/jobs.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT,
+            status TEXT NOT NULL,
+            dedupe_key TEXT UNIQUE,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            result TEXT,
+            error TEXT,
+            created_at TEXT,
+            started_at TEXT,
+            finished_at TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+    # Resumable progress of `python -m backend.backfill` (one row per source x date window)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+            run_key TEXT NOT NULL,
+            source TEXT NOT NULL,
+            window_start TEXT NOT NULL,
+            window_end TEXT NOT NULL,
+            page INTEGER NOT NULL DEFAULT 1,
+            status TEXT NOT NULL,
+            fetched INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT,
+            PRIMARY KEY (run_key, source, window_start, window_end)
+        )
+    """)
+    # Ingest query catalog (topic x region x source) with adaptive intervals, see backend/catalog.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS query_catalog (
+            id TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            region TEXT NOT NULL,
+            query TEXT NOT NULL,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            interval_minutes INTEGER NOT NULL,
+            next_run_at TEXT NOT NULL,
+            last_run_at TEXT,
+            runs INTEGER NOT NULL DEFAULT 0,
+            last_fetched INTEGER NOT NULL DEFAULT 0,
+            last_new INTEGER NOT NULL DEFAULT 0,
+            total_new INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_query_catalog_due ON query_catalog (enabled, next_run_at)")
+    # Last on-demand external search per query, for the /news freshness policy (backend/freshness.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS query_fetches (
+            query TEXT PRIMARY KEY,
+            fetched_at TEXT NOT NULL,
+            found INTEGER NOT NULL DEFAULT 0,
+            fetches INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # Extracted article text (backend/content.py), compressed and kept out of noticias.
+    # Explicit INTEGER PRIMARY KEY: the contentless FTS table points at it by rowid.
+    # retry_at: next attempt of a transient failure (NULL = final)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS noticia_content (
+            id INTEGER PRIMARY KEY,
+            news_id TEXT NOT NULL UNIQUE,
+            status TEXT NOT NULL,
+            http_status INTEGER,
+            codec TEXT,
+            content BLOB,
+            chars INTEGER NOT NULL DEFAULT 0,
+            fetched_at TEXT,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            retry_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS noticia_fts USING fts5(
+            body, content='', tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    # Named leases between processes sharing this file (scheduler leader), see backend/leader.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """)
+    # Saved searches and their matches on newly ingested articles, see backend/alerts.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS alert_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            owner TEXT NOT NULL,
+            name TEXT NOT NULL,
+            query TEXT,
+            region TEXT,
+            agency TEXT,
+            crime_type TEXT,
+            created_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rule_id INTEGER NOT NULL,
+            news_id TEXT NOT NULL,
+            matched_at TEXT NOT NULL,
+            UNIQUE (rule_id, news_id)
+        )
+    """)
+    # Last noticia_seq.seq written by `python -m backend.export`, per destination
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL,
+            updated_at TEXT
+        )
+    """)
+    _migrate(cursor)
     conn.commit()
     conn.close()
     logger.info("Database initialized/checked.")
+    _ensure_semantic_index()
+
+def _migrate(cursor):
+    """Backfills derived data for archives created by older versions."""
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        cursor.execute("SELECT id, title, snippet FROM noticias")
+        for row in cursor.fetchall():
+            _insert_tags(cursor, row["id"], row["title"], row["snippet"])
+    if version < 2:
+        rebuild_rollups(cursor)
+    if version < 3:
+        # Cold-tier articles too: keyword search spans both tiers
+        sources = [cursor.execute("SELECT id, title, publishedAt, snippet FROM noticias").fetchall()]
+        if os.path.exists(cold_db_path()):
+            cold = sqlite3.connect(cold_db_path())
+            sources.append(cold.execute("SELECT id, title, publishedAt, snippet FROM noticias").fetchall())
+            cold.close()
+        for rows in sources:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO noticia_search (id, publishedAt, body) VALUES (?, ?, ?)",
+                [(r[0], r[2], index_text(r[1], r[3])) for r in rows],
+            )
+    if version < 4:
+        # Hot rows keep their rowid as seq, so existing export watermarks stay valid;
+        # cold rows come after them and go out with the next incremental export
+        cursor.execute("INSERT OR IGNORE INTO noticia_seq (seq, news_id) SELECT rowid, id FROM noticias ORDER BY rowid")
+        if os.path.exists(cold_db_path()):
+            cold = sqlite3.connect(cold_db_path())
+            cold_ids = cold.execute("SELECT id FROM noticias ORDER BY publishedAt").fetchall()
+            cold.close()
+            cursor.executemany("INSERT OR IGNORE INTO noticia_seq (news_id) VALUES (?)", cold_ids)
+    if version < 5:
+        columns = {r["name"] for r in cursor.execute("PRAGMA table_info(noticia_content)")}
+        if "retry_at" not in columns:
+            cursor.execute("ALTER TABLE noticia_content ADD COLUMN attempts INTEGER NOT NULL DEFAULT 1")
+            cursor.execute("ALTER TABLE noticia_content ADD COLUMN retry_at TEXT")
+        # Failures recorded as final by older versions: timeouts and 5xx get retried
+        cursor.execute("""
+            UPDATE noticia_content SET retry_at = fetched_at
+            WHERE status = 'error' OR (status = 'http_error' AND (http_status IS NULL OR http_status >= 500 OR http_status = 429))
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_noticia_content_retry ON noticia_content (retry_at)")
+    if version < 7:
+        # Gazetteer without the ambiguous aliases ("golpe", "gama", bare "pf"; v7: "santa maria",
+        # "planaltina", "sobradinho"): re-tag both tiers
+        _retag(cursor, cursor)
+        if os.path.exists(cold_db_path()):
+            cold = sqlite3.connect(cold_db_path())
+            _retag(cursor, cold.cursor())
+            cold.commit()
+            cold.close()
+    if version < SCHEMA_VERSION:
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def _retag(cursor, tier_cursor):
+    """Re-extracts the tags of one tier's articles; the rollups (in main, covering both tiers) follow the changes."""
+    current: Dict[str, set] = {}
+    for news_id, kind, tag in tier_cursor.execute("SELECT news_id, kind, tag FROM noticia_tags").fetchall():
+        current.setdefault(news_id, set()).add((kind, tag))
+    increments: Counter = Counter()
+    for news_id, title, published_at, snippet in tier_cursor.execute(
+        "SELECT id, title, publishedAt, snippet FROM noticias"
+    ).fetchall():
+        old, new = current.get(news_id, set()), extract_tags(f"{title} {snippet or ''}")
+        for kind, tag in old - new:
+            tier_cursor.execute("DELETE FROM noticia_tags WHERE news_id = ? AND kind = ? AND tag = ?", (news_id, kind, tag))
+            increments[(kind, published_at[:10], tag)] -= 1
+        for kind, tag in new - old:
+            tier_cursor.execute("INSERT OR IGNORE INTO noticia_tags (news_id, kind, tag) VALUES (?, ?, ?)", (news_id, kind, tag))
+            increments[(kind, published_at[:10], tag)] += 1
+    _bump_rollups(cursor, increments)
+    cursor.execute("DELETE FROM rollup_counts WHERE count <= 0")
+
+def _ensure_semantic_index():
+    """Builds the vector index from the archive (both tiers) when it is missing (first run / encoder change)."""
+    index = semantic.get_index()
+    if len(index) > 0:
+        index.maybe_build_ivf()
+        return
+    conn = get_archive_connection()
+    rows = conn.execute("SELECT id, title, snippet FROM noticias_all").fetchall()
+    conn.close()
+    if rows:
+        total = index.rebuild((r[0], semantic.embedding_text(r[1], r[2])) for r in rows)
+        logger.info(f"Semantic index rebuilt with {total} items.")
 
 def insert_log(level: str, message: str):
     """Inserts a log entry into the database."""
     try:
         conn = get_connection()
         cursor = conn.cursor()
-        from datetime import datetime
         cursor.execute("INSERT INTO logs (timestamp, level, message) VALUES (?, ?, ?)", 
                       (datetime.now().isoformat(), level, message))
         conn.commit()
@@ -56,38 +371,557 @@ def insert_log(level: str, message: str):
         # Avoid recursion or crashes in logging
         pass
 
-def save_to_db(items: List[NewsItem]):
-    conn = get_connection()
+def _insert_tags(cursor, news_id: str, title: str, snippet: str):
+    tags = extract_tags(f"{title} {snippet or ''}")
+    cursor.executemany(
+        "INSERT OR IGNORE INTO noticia_tags (news_id, kind, tag) VALUES (?, ?, ?)",
+        [(news_id, kind, tag) for kind, tag in tags],
+    )
+    return tags
+
+def _rollup_keys(row: tuple, tags) -> List[Tuple[str, str, str]]:
+    day = row[3][:10]  # publishedAt ISO -> YYYY-MM-DD
+    keys = [("total", day, "all"), ("source", day, row[4])]
+    keys.extend((kind, day, tag) for kind, tag in tags)
+    return keys
+
+def _bump_rollups(cursor, increments: Counter):
+    cursor.executemany("""
+        INSERT INTO rollup_counts (dimension, day, value, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT (dimension, day, value) DO UPDATE SET count = count + excluded.count
+    """, [(dim, day, value, n) for (dim, day, value), n in increments.items()])
+
+def rebuild_rollups(cursor):
+    """Recomputes rollup_counts from scratch (migration / repair)."""
+    cursor.execute("DELETE FROM rollup_counts")
+    cursor.execute("""
+        INSERT INTO rollup_counts (dimension, day, value, count)
+        SELECT 'total', substr(publishedAt, 1, 10), 'all', COUNT(*) FROM noticias
+        GROUP BY substr(publishedAt, 1, 10)
+    """)
+    cursor.execute("""
+        INSERT INTO rollup_counts (dimension, day, value, count)
+        SELECT 'source', substr(publishedAt, 1, 10), source, COUNT(*) FROM noticias
+        GROUP BY substr(publishedAt, 1, 10), source
+    """)
+    cursor.execute("""
+        INSERT INTO rollup_counts (dimension, day, value, count)
+        SELECT t.kind, substr(n.publishedAt, 1, 10), t.tag, COUNT(*)
+        FROM noticia_tags t JOIN noticias n ON n.id = t.news_id
+        GROUP BY t.kind, substr(n.publishedAt, 1, 10), t.tag
+    """)
+
+def _keyword_ids(
+    q: str, filters: Optional[Dict[str, str]] = None, limit: Optional[int] = None, offset: int = 0
+) -> List[str]:
+    """Ids of articles with every analyzed term of `q` (any of its variants), newest first."""
+    groups = analyze(q).like_groups()
+    if not groups:
+        return []
+    keyword_sql = " AND ".join("(" + " OR ".join("body LIKE ?" for _ in patterns) + ")" for patterns in groups)
+    tag_sql, tag_params = _tag_filter_sql(filters)
+    page_sql, page_params = ("LIMIT ? OFFSET ?", [limit, offset]) if limit is not None else ("", [])
+    conn = get_archive_connection()
+    cursor = conn.execute(
+        f"SELECT id FROM noticia_search WHERE {keyword_sql} {'AND ' + tag_sql if tag_sql else ''} "
+        f"ORDER BY publishedAt DESC {page_sql}",
+        [p for patterns in groups for p in patterns] + tag_params + page_params,
+    )
+    ids = [r[0] for r in cursor.fetchall()]
+    conn.close()
+    return ids
+
+def _tag_filter_sql(filters: Optional[Dict[str, str]]) -> Tuple[str, list]:
+    """SQL fragment restricting noticias.id to articles carrying every requested tag."""
+    if not filters:
+        return "", []
+    clauses, params = [], []
+    for kind, tag in filters.items():
+        clauses.append("id IN (SELECT news_id FROM noticia_tags_all WHERE kind = ? AND tag = ?)")
+        params += [kind, tag]
+    return " AND ".join(clauses), params
+
+def existing_ids(ids: List[str], batch_size: int = 500) -> set:
+    """Ids already in the archive (hot or cold tier)."""
+    conn = get_archive_connection()
+    found = set()
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        placeholders = ",".join("?" * len(batch))
+        found.update(r[0] for r in conn.execute(f"SELECT id FROM noticias_all WHERE id IN ({placeholders})", batch))
+    conn.close()
+    return found
+
+def save_rows(rows: List[NewsRecord], batch_size: int = 500) -> int:
+    """Bulk ingest of normalized rows (see normalize.NEWS_COLUMNS).
+
+    Only rows whose id is not in the archive yet are inserted; their tags and
+    rollup increments are written in the same transaction and they are then
+    appended to the embedding index. Returns the number of new articles.
+    """
+    # Ids moved to the cold tier count as existing too
+    conn = get_archive_connection()
     cursor = conn.cursor()
-    count = 0
+    new_rows, events = [], []
+    for start in range(0, len(rows), batch_size):
+        batch = list({row[0]: row for row in rows[start:start + batch_size]}.values())
+        if not conn.in_transaction:
+            # Take the write lock before checking which ids are new
+            cursor.execute("BEGIN IMMEDIATE")
+        placeholders = ",".join("?" * len(batch))
+        cursor.execute(f"SELECT id FROM noticias_all WHERE id IN ({placeholders})", [row[0] for row in batch])
+        existing = {r[0] for r in cursor.fetchall()}
+        fresh = [row for row in batch if row[0] not in existing]
+        if not fresh:
+            continue
+        cursor.executemany("""
+            INSERT OR IGNORE INTO main.noticias (id, title, url, publishedAt, source, snippet, language)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, fresh)
+        cursor.executemany("INSERT OR IGNORE INTO main.noticia_seq (news_id) VALUES (?)", [(row[0],) for row in fresh])
+        cursor.executemany(
+            "INSERT OR IGNORE INTO main.noticia_search (id, publishedAt, body) VALUES (?, ?, ?)",
+            [(row[0], row[3], index_text(row[1], row[5])) for row in fresh],
+        )
+        increments = Counter()
+        for row in fresh:
+            tags = _insert_tags(cursor, row[0], row[1], row[5])
+            increments.update(_rollup_keys(row, tags))
+            events.append(article_event(row, tags))
+        _bump_rollups(cursor, increments)
+        new_rows.extend(fresh)
+    conn.commit()
+    conn.close()
+
+    after_save(new_rows, events)
+    return len(new_rows)
+
+def after_save(new_rows: List[NewsRecord], events: List[Dict], index: bool = True):
+    """Post-commit side effects of an ingest, shared by every storage backend (see backend/storage.py):
+    embedding index (unless the backend syncs it itself), new-article events and alert matching."""
+    if not new_rows:
+        return
+    logger.info(f"Saved {len(new_rows)} new items to DB.")
+    if index:
+        try:
+            semantic.get_index().add(
+                [row[0] for row in new_rows],
+                [semantic.embedding_text(row[1], row[5]) for row in new_rows],
+            )
+        except Exception as e:
+            logger.error(f"Error indexing embeddings: {e}")
+    # Only after commit: subscribers may query the article right away
+    publish_new(events)
+    try:
+        from .alerts import record_alerts
+
+        record_alerts(events)
+    except Exception as e:
+        logger.error(f"Error matching alert rules: {e}")
+
+def to_records(items: List[Union[NewsRecord, NewsItem]]) -> List[NewsRecord]:
+    rows = []
     for item in items:
+        if isinstance(item, NewsRecord):
+            rows.append(item)
+            continue
         try:
-            cursor.execute("""
-                INSERT OR IGNORE INTO noticias (id, title, url, publishedAt, source, snippet, language)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (item.id, item.title, item.url, item.publishedAt.isoformat(), item.source, item.snippet, item.language))
-            if cursor.rowcount > 0: count += 1
+            rows.append(NewsRecord.from_item(item))
         except Exception as e:
-            logger.error(f"Error saving item {item.id}: {e}")
-            
+            logger.error(f"Error saving item {getattr(item, 'id', '?')}: {e}")
+    return rows
+
+def save_to_db(items: List[Union[NewsRecord, NewsItem]]) -> int:
+    return save_rows(to_records(items))
+
+# Article reads return NewsRecords (SELECT * on noticias, NEWS_COLUMNS order):
+# /news encodes them straight to JSON (backend/codec.py), the agent formats them.
+
+def _records_cursor(conn):
+    cursor = conn.cursor()
+    cursor.row_factory = record_factory
+    return cursor
+
+def search_db(
+    q: str, filters: Optional[Dict[str, str]] = None, limit: Optional[int] = None, offset: int = 0
+) -> List[NewsRecord]:
+    """Keyword search (analyzed terms as word prefixes), newest first; all matches unless `limit` is given."""
+    return get_news_by_ids(_keyword_ids(q, filters, limit, offset))
+
+def get_recent_news_db(limit: int = 50, filters: Optional[Dict[str, str]] = None, offset: int = 0) -> List[NewsRecord]:
+    conn = get_archive_connection()
+    cursor = _records_cursor(conn)
+    tag_sql, tag_params = _tag_filter_sql(filters)
+    cursor.execute(
+        f"SELECT * FROM noticias_all {'WHERE ' + tag_sql if tag_sql else ''} ORDER BY publishedAt DESC LIMIT ? OFFSET ?",
+        tag_params + [limit, offset],
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def get_news_by_ids(
+    ids: List[str], filters: Optional[Dict[str, str]] = None, batch_size: int = 500
+) -> List[NewsRecord]:
+    """Fetches articles by id, preserving the order of `ids`."""
+    if not ids:
+        return []
+    conn = get_archive_connection()
+    cursor = _records_cursor(conn)
+    tag_sql, tag_params = _tag_filter_sql(filters)
+    rows = {}
+    for start in range(0, len(ids), batch_size):
+        batch = list(ids[start:start + batch_size])
+        placeholders = ",".join("?" * len(batch))
+        cursor.execute(
+            f"SELECT * FROM noticias_all WHERE id IN ({placeholders}) {'AND ' + tag_sql if tag_sql else ''}",
+            batch + tag_params,
+        )
+        rows.update((r.id, r) for r in cursor.fetchall())
+    conn.close()
+    return [rows[i] for i in ids if i in rows]
+
+def semantic_search_db(
+    q: str, limit: int = 20, filters: Optional[Dict[str, str]] = None, offset: int = 0,
+    fetch_rows: Optional[Callable[..., List[NewsRecord]]] = None,
+) -> List[NewsRecord]:
+    """Nearest-neighbour search over the embedding index (rows from `fetch_rows`, default this archive)."""
+    wanted = limit + offset
+    # Tag filters are applied after retrieval, so over-fetch neighbours
+    hits = semantic.get_index().search(analyze(q).key, k=wanted * 5 if filters else wanted)
+    return (fetch_rows or get_news_by_ids)([news_id for news_id, _ in hits], filters)[offset:wanted]
+
+def _lexical_candidates(q: str, limit: int, filters: Optional[Dict[str, str]] = None) -> List[str]:
+    return _keyword_ids(q, filters, limit)
+
+def _semantic_candidates(q: str, limit: int) -> List[str]:
+    return [news_id for news_id, _ in semantic.get_index().search(analyze(q).key, k=limit)]
+
+def _fulltext_candidates(q: str, limit: int) -> List[str]:
+    """BM25 over the extracted article text (noticia_fts, filled by backend/content.py)."""
+    # Terms OR'ed: any term may match, documents with more (and rarer) terms rank first
+    match = analyze(q).fts_query(any_term=True)
+    if not match:
+        return []
+    conn = get_connection()
+    try:
+        cursor = conn.execute("""
+            SELECT c.news_id FROM noticia_fts f JOIN noticia_content c ON c.id = f.rowid
+            WHERE noticia_fts MATCH ? ORDER BY f.rank LIMIT ?
+        """, (match, limit))
+        return [r[0] for r in cursor.fetchall()]
+    finally:
+        conn.close()
+
+def _published_datetime(value: str) -> datetime:
+    published = datetime.fromisoformat(value)
+    if published.tzinfo is not None:
+        # Offsets (DDG items) -> naive local time, comparable with datetime.now()
+        published = published.astimezone().replace(tzinfo=None)
+    return published
+
+def _recency_weight(published_at: datetime, now: datetime) -> float:
+    age_days = max((now - published_at).total_seconds(), 0) / 86400
+    # Old-but-relevant items keep at least half of their fused score
+    return 0.5 + 0.5 * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+def fuse_rankings(rankings: List[List[str]], k: int = RRF_K) -> Dict[str, float]:
+    """Reciprocal rank fusion: score(d) = sum over lists of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, news_id in enumerate(ranking, 1):
+            scores[news_id] = scores.get(news_id, 0.0) + 1.0 / (k + rank)
+    return scores
+
+def rank_hybrid(
+    q: str, retrievers: Dict[str, Callable[[], List[str]]], fetch_rows: Callable[[List[str]], List[NewsRecord]],
+    limit: int, offset: int = 0,
+) -> List[NewsRecord]:
+    """Runs the candidate retrievers in parallel and fuses them with RRF and recency decay.
+
+    Backend-neutral: each storage passes its own retrievers (ranked id lists)
+    and `fetch_rows` (ids -> records, tag filters applied).
+    """
+    t0 = time.perf_counter()
+    futures = {name: _rank_pool.submit(retrieve) for name, retrieve in retrievers.items()}
+    rankings = {name: future.result() for name, future in futures.items()}
+    t_retrieve = time.perf_counter()
+
+    scores = fuse_rankings(list(rankings.values()))
+    if not scores:
+        return []
+    rows = {row.id: row for row in fetch_rows(list(scores))}
+    now = datetime.now()
+    top = heapq.nlargest(
+        limit + offset,
+        (news_id for news_id in scores if news_id in rows),
+        key=lambda news_id: scores[news_id] * _recency_weight(_published_datetime(rows[news_id].publishedAt), now),
+    )
+    t_fuse = time.perf_counter()
+
+    counts = " ".join(f"{name}={len(ids)}" for name, ids in rankings.items())
+    logger.info(
+        f"Hybrid ranking for '{q}': {counts} "
+        f"retrieve={(t_retrieve - t0) * 1000:.1f}ms fuse={(t_fuse - t_retrieve) * 1000:.1f}ms"
+    )
+    return [rows[news_id] for news_id in top[offset:]]
+
+def hybrid_search_db(
+    q: str, limit: int = 20, candidates: int = RANK_CANDIDATES, filters: Optional[Dict[str, str]] = None,
+    offset: int = 0,
+) -> List[NewsRecord]:
+    """Lexical, full-text and vector retrieval in parallel, fused with RRF and recency decay."""
+    return rank_hybrid(
+        q,
+        {
+            "lexical": lambda: _lexical_candidates(q, candidates, filters),
+            "fulltext": lambda: _fulltext_candidates(q, candidates),
+            "vector": lambda: _semantic_candidates(q, candidates),
+        },
+        lambda ids: get_news_by_ids(ids, filters),
+        limit,
+        offset,
+    )
+
+def get_stats(dimension: str, days: int = 30, top: int = 10) -> Dict:
+    """Histogram + daily series for one dimension, read only from rollup_counts."""
+    today = datetime.now().date()
+    since = (today - timedelta(days=days - 1)).isoformat()
+    # Trend = second half of the window ("recent") vs first half ("previous")
+    midpoint = (today - timedelta(days=max(days // 2, 1) - 1)).isoformat()
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT value,
+               SUM(count) AS total,
+               SUM(CASE WHEN day >= ? THEN count ELSE 0 END) AS recent
+        FROM rollup_counts
+        WHERE dimension = ? AND day >= ?
+        GROUP BY value ORDER BY total DESC LIMIT ?
+    """, (midpoint, dimension, since, top))
+    totals = [
+        {"value": r["value"], "count": r["total"], "recent": r["recent"], "previous": r["total"] - r["recent"]}
+        for r in cursor.fetchall()
+    ]
+    values = [t["value"] for t in totals]
+    series = []
+    if values:
+        placeholders = ",".join("?" * len(values))
+        cursor.execute(
+            f"SELECT day, value, count FROM rollup_counts WHERE dimension = ? AND day >= ? AND value IN ({placeholders}) ORDER BY day",
+            [dimension, since] + values,
+        )
+        series = [{"day": r["day"], "value": r["value"], "count": r["count"]} for r in cursor.fetchall()]
+    conn.close()
+    return {"dimension": dimension, "since": since, "totals": totals, "series": series}
+
+# --- Content queue and export pages (backend/content.py, backend/export.py) --------
+
+def pending_content(limit: int, now: str) -> List[Tuple[str, str]]:
+    """Newest (id, url) with no content attempt yet, or whose transient failure is due for a retry."""
+    conn = get_connection()
+    rows = conn.execute("""
+        SELECT n.id, n.url FROM noticias n
+        LEFT JOIN noticia_content c ON c.news_id = n.id
+        WHERE (c.news_id IS NULL OR c.retry_at <= ?) AND n.url LIKE 'http%'
+        ORDER BY n.publishedAt DESC LIMIT ?
+    """, (now, limit)).fetchall()
+    conn.close()
+    return [(r["id"], r["url"]) for r in rows]
+
+def settled_content_ids(ids: List[str], now: str) -> set:
+    """Ids whose content attempt is final here, or not yet due for a retry."""
+    if not ids:
+        return set()
+    conn = get_connection()
+    placeholders = ",".join("?" * len(ids))
+    rows = conn.execute(f"""
+        SELECT news_id FROM noticia_content
+        WHERE news_id IN ({placeholders}) AND (retry_at IS NULL OR retry_at > ?)
+    """, list(ids) + [now]).fetchall()
+    conn.close()
+    return {r[0] for r in rows}
+
+# Columns in backend/export.py schema order; {where} receives the seq range and `since`.
+# The join on id is pushed into both branches of the hot/cold views (index lookups).
+_EXPORT_SQL = {
+    "noticias": """
+        SELECT s.seq, n.id, n.title, n.url, n.publishedAt, n.source, n.snippet, n.language
+        FROM noticia_seq s JOIN noticias_all n ON n.id = s.news_id
+        WHERE {where} ORDER BY s.seq
+    """,
+    "noticia_tags": """
+        SELECT s.seq, t.news_id, t.kind, t.tag, n.publishedAt
+        FROM noticia_seq s JOIN noticias_all n ON n.id = s.news_id JOIN noticia_tags_all t ON t.news_id = s.news_id
+        WHERE {where} ORDER BY s.seq
+    """,
+}
+
+def export_watermark() -> int:
+    """Highest ingest seq (noticia_seq) right now."""
+    conn = get_connection()
+    value = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM noticia_seq").fetchone()[0]
+    conn.close()
+    return value
+
+def export_page(dataset: str, after: int, upto: int, since: Optional[str], limit: int) -> Tuple[Optional[int], List[tuple]]:
+    """Rows of the next `limit` articles with after < seq <= upto, and the last seq they cover (None when done)."""
+    conn = get_archive_connection()
+    batch_end = conn.execute("""
+        SELECT MAX(seq) FROM (
+            SELECT seq FROM noticia_seq WHERE seq > ? AND seq <= ? ORDER BY seq LIMIT ?
+        )
+    """, (after, upto, limit)).fetchone()[0]
+    if batch_end is None:
+        conn.close()
+        return None, []
+    where, params = "s.seq > ? AND s.seq <= ?", [after, batch_end]
+    if since:
+        where += " AND n.publishedAt >= ?"
+        params.append(since)
+    rows = [tuple(r) for r in conn.execute(_EXPORT_SQL[dataset].format(where=where), params).fetchall()]
+    conn.close()
+    return batch_end, rows
+
+# --- Coordination state: leases, alert rules/alerts, ingest catalog -----------------
+# Shared by every process on this file. PostgresStorage keeps the same tables in
+# PostgreSQL, so several API nodes agree on them (see backend/storage.py).
+
+def acquire_lease(name: str, holder: str, ttl: float, now: float) -> bool:
+    """Takes the lease if free/expired, renews it if `holder` has it. Returns whether it is held."""
+    conn = get_connection()
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.execute(
+            "UPDATE leases SET holder = ?, expires_at = ? WHERE name = ? AND (holder = ? OR expires_at < ?)",
+            (holder, now + ttl, name, holder, now),
+        )
+        if cursor.rowcount == 0:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                (name, holder, now + ttl),
+            )
+        held = cursor.rowcount == 1
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return held
+
+def release_lease(name: str, holder: str):
+    conn = get_connection()
+    conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
     conn.commit()
     conn.close()
-    if count > 0:
-        logger.info(f"Saved {count} new items to DB.")
 
-def search_db(q: str) -> List[NewsItem]:
+def create_alert_rule(owner: str, name: str, q: Optional[str], filters: Dict[str, str]) -> Dict:
     conn = get_connection()
     cursor = conn.cursor()
-    query = f"%{q}%"
-    cursor.execute("SELECT * FROM noticias WHERE title LIKE ? OR snippet LIKE ? ORDER BY publishedAt DESC", (query, query))
-    rows = cursor.fetchall()
+    cursor.execute("""
+        INSERT INTO alert_rules (owner, name, query, region, agency, crime_type, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (owner, name, q, filters.get("region"), filters.get("agency"), filters.get("crime_type"),
+          datetime.now().isoformat()))
+    rule_id = cursor.lastrowid
+    conn.commit()
+    row = conn.execute("SELECT * FROM alert_rules WHERE id = ?", (rule_id,)).fetchone()
     conn.close()
-    return [NewsItem(**dict(r)) for r in rows]
+    return dict(row)
 
-def get_recent_news_db(limit: int = 50) -> List[NewsItem]:
+def list_alert_rules(owner: Optional[str] = None) -> List[Dict]:
+    conn = get_connection()
+    sql, params = "SELECT * FROM alert_rules", []
+    if owner is not None:
+        sql, params = sql + " WHERE owner = ?", [owner]
+    rows = conn.execute(sql + " ORDER BY id", params).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def delete_alert_rule(rule_id: int, owner: Optional[str] = None) -> bool:
+    """Removes the rule and its alerts. False when it does not exist (or belongs to someone else)."""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM noticias ORDER BY publishedAt DESC LIMIT ?", (limit,))
-    rows = cursor.fetchall()
+    sql, params = "DELETE FROM alert_rules WHERE id = ?", [rule_id]
+    if owner is not None:
+        sql, params = sql + " AND owner = ?", params + [owner]
+    cursor.execute(sql, params)
+    deleted = cursor.rowcount > 0
+    if deleted:
+        cursor.execute("DELETE FROM alerts WHERE rule_id = ?", (rule_id,))
+    conn.commit()
+    conn.close()
+    return deleted
+
+def insert_alerts(matches: List[Tuple[int, str, str]]):
+    """(rule_id, news_id, matched_at) rows; a rule alerts once per article."""
+    conn = get_connection()
+    conn.executemany("INSERT OR IGNORE INTO alerts (rule_id, news_id, matched_at) VALUES (?, ?, ?)", matches)
+    conn.commit()
+    conn.close()
+
+def get_alerts_page(owner: Optional[str], rule_id: Optional[int], after: int, limit: int) -> List[Dict]:
+    """Alerts with id > `after`, oldest first (id, rule_id, rule_name, matched_at, news_id)."""
+    clauses, params = ["a.id > ?"], [after]
+    if owner is not None:
+        clauses.append("r.owner = ?")
+        params.append(owner)
+    if rule_id is not None:
+        clauses.append("a.rule_id = ?")
+        params.append(rule_id)
+    conn = get_connection()
+    rows = conn.execute(f"""
+        SELECT a.id, a.rule_id, r.name AS rule_name, a.matched_at, a.news_id
+        FROM alerts a
+        JOIN alert_rules r ON r.id = a.rule_id
+        WHERE {' AND '.join(clauses)}
+        ORDER BY a.id LIMIT ?
+    """, params + [limit]).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def sync_catalog_entries(entries: List[Dict], interval_minutes: int, now: str):
+    """Upserts the configured entries; the others are disabled (history kept)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE query_catalog SET enabled = 0")
+    cursor.executemany("""
+        INSERT INTO query_catalog (id, source, topic, region, query, enabled, interval_minutes, next_run_at)
+        VALUES (:id, :source, :topic, :region, :query, 1, :interval, :next_run_at)
+        ON CONFLICT(id) DO UPDATE SET enabled = 1
+    """, [dict(e, interval=interval_minutes, next_run_at=now) for e in entries])
+    conn.commit()
+    conn.close()
+
+def due_catalog_entries(budget: int, now: str) -> List[Dict]:
+    """Due general (whole-DF) entries first, so they always fit the budget; then the most overdue."""
+    conn = get_connection()
+    rows = conn.execute("""
+        SELECT * FROM query_catalog
+        WHERE enabled = 1 AND next_run_at <= ?
+        ORDER BY region != 'Distrito Federal', next_run_at, id
+        LIMIT ?
+    """, (now, budget)).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def update_catalog_entries(updates: List[tuple]):
+    """(interval_minutes, next_run_at, last_run_at, fetched, new, new, id) per entry that ran."""
+    conn = get_connection()
+    conn.executemany("""
+        UPDATE query_catalog
+        SET interval_minutes = ?, next_run_at = ?, last_run_at = ?, runs = runs + 1,
+            last_fetched = ?, last_new = ?, total_new = total_new + ?
+        WHERE id = ?
+    """, updates)
+    conn.commit()
+    conn.close()
+
+def get_catalog_stats() -> List[Dict]:
+    conn = get_connection()
+    rows = conn.execute("""
+        SELECT source, topic, region, query, interval_minutes, next_run_at, runs, last_new, total_new
+        FROM query_catalog WHERE enabled = 1
+        ORDER BY total_new DESC, next_run_at
+    """).fetchall()
     conn.close()
-    return [NewsItem(**dict(r)) for r in rows]
+    return [dict(r) for r in rows]
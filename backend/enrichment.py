@@ -0,0 +1,175 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .utils import fold
+
+# Gazetteer: tipo -> nome canônico -> variações (comparadas sem acento/caixa).
+# Só as variações marcam o texto; o nome canônico sempre vale como filtro
+# (canonical_tag). Nomes ambíguos fora do DF (time de futebol, "golpe de
+# Estado", a PM de outro estado, cidades homônimas como Santa Maria/RS,
+# Planaltina/GO e Sobradinho/BA) só marcam com contexto do DF.
+GAZETTEER: Dict[str, Dict[str, List[str]]] = {
+    "region": {
+        "Plano Piloto": ["plano piloto", "asa sul", "asa norte", "esplanada dos ministerios", "setor comercial sul", "rodoviaria do plano piloto"],
+        "Gama": ["gama-df", "gama df", "gama/df", "no gama", "regiao do gama", "cidade do gama",
+                 "setor leste do gama", "setor oeste do gama", "hospital regional do gama"],
+        "Taguatinga": ["taguatinga"],
+        "Brazlândia": ["brazlandia"],
+        "Sobradinho": ["sobradinho-df", "sobradinho df", "sobradinho/df", "sobradinho do df",
+                       "regiao administrativa de sobradinho", "hospital regional de sobradinho"],
+        "Sobradinho II": ["sobradinho ii", "sobradinho 2"],
+        "Planaltina": ["planaltina-df", "planaltina df", "planaltina/df", "planaltina do df",
+                       "regiao administrativa de planaltina", "hospital regional de planaltina", "vale do amanhecer"],
+        "Paranoá": ["paranoa"],
+        "Núcleo Bandeirante": ["nucleo bandeirante"],
+        "Ceilândia": ["ceilandia"],
+        "Guará": ["guara"],
+        "Cruzeiro": ["cruzeiro-df", "cruzeiro df", "cruzeiro/df", "cruzeiro velho", "cruzeiro novo",
+                     "regiao administrativa do cruzeiro"],
+        "Samambaia": ["samambaia"],
+        "Santa Maria": ["santa maria-df", "santa maria df", "santa maria/df", "santa maria do df",
+                        "regiao administrativa de santa maria", "hospital regional de santa maria"],
+        "São Sebastião": ["sao sebastiao"],
+        "Recanto das Emas": ["recanto das emas"],
+        "Lago Sul": ["lago sul"],
+        "Lago Norte": ["lago norte"],
+        "Riacho Fundo": ["riacho fundo"],
+        "Riacho Fundo II": ["riacho fundo ii", "riacho fundo 2"],
+        "Candangolândia": ["candangolandia"],
+        "Águas Claras": ["aguas claras"],
+        "Sudoeste/Octogonal": ["sudoeste", "octogonal"],
+        "Varjão": ["varjao"],
+        "Park Way": ["park way"],
+        "SCIA/Estrutural": ["estrutural", "scia", "cidade estrutural"],
+        "Jardim Botânico": ["jardim botanico"],
+        "Itapoã": ["itapoa"],
+        "SIA": ["sia-df", "sia df", "sia trecho", "setor de industria e abastecimento"],
+        "Vicente Pires": ["vicente pires"],
+        "Fercal": ["fercal"],
+        "Sol Nascente/Pôr do Sol": ["sol nascente", "por do sol"],
+        "Arniqueira": ["arniqueira", "arniqueiras"],
+        "Arapoanga": ["arapoanga"],
+        "Água Quente": ["agua quente"],
+    },
+    "agency": {
+        "PCDF": ["pcdf", "policia civil", "policia civil do df", "policia civil do distrito federal"],
+        "PMDF": ["pmdf", "pm-df", "pm do df", "policia militar do df", "policia militar do distrito federal"],
+        "CBMDF": ["cbmdf", "corpo de bombeiros", "bombeiros"],
+        "PF": ["policia federal"],
+        "PRF": ["prf", "policia rodoviaria federal"],
+        "PPDF": ["ppdf", "policia penal"],
+        "DETRAN-DF": ["detran", "detran-df", "detran df"],
+        "SSP-DF": ["ssp", "ssp-df", "ssp/df", "secretaria de seguranca publica"],
+    },
+    "crime_type": {
+        "homicídio": ["homicidio", "homicidios", "assassinato", "assassinatos", "assassinado", "assassinada"],
+        "latrocínio": ["latrocinio", "latrocinios"],
+        "feminicídio": ["feminicidio", "feminicidios"],
+        "roubo": ["roubo", "roubos", "assalto", "assaltos", "assaltante", "assaltantes"],
+        "furto": ["furto", "furtos"],
+        "tráfico de drogas": ["trafico", "trafico de drogas", "traficante", "traficantes"],
+        "estupro": ["estupro", "estupros", "estuprador"],
+        "sequestro": ["sequestro", "sequestros", "sequestrado", "sequestrada"],
+        "violência doméstica": ["violencia domestica", "maria da penha"],
+        "porte ilegal de arma": ["porte ilegal", "porte ilegal de arma"],
+        "estelionato": ["estelionato", "estelionatario", "golpista", "golpistas", "golpe do pix"],
+        "lesão corporal": ["lesao corporal"],
+        "receptação": ["receptacao"],
+        "corrupção": ["corrupcao", "propina"],
+    },
+}
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text finds every pattern occurrence."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]]):
+        # Trie as parallel lists: goto[state] -> {char: state}
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[Tuple[int, object]]] = [[]]  # (pattern length, payload)
+        for pattern, payload in patterns:
+            self._add(pattern, payload)
+        self._build()
+
+    def _add(self, pattern: str, payload):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append((len(pattern), payload))
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_matches(self, text: str):
+        """Yields (start, end, payload) for every occurrence, overlapping included."""
+        state = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in out[state]:
+                yield i - length + 1, i + 1, payload
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+def longest_matches(automaton: AhoCorasick, text: str) -> List[Tuple[int, int, object]]:
+    """Whole-word matches, keeping the longest one where matches overlap
+    ("riacho fundo ii" wins over "riacho fundo")."""
+    found = [m for m in automaton.iter_matches(text) if _is_boundary(text, m[0], m[1])]
+    found.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+    result, last_end = [], -1
+    for start, end, payload in found:
+        if start >= last_end:
+            result.append((start, end, payload))
+            last_end = end
+    return result
+
+
+def _compile_gazetteer() -> Tuple[AhoCorasick, Dict[Tuple[str, str], str]]:
+    patterns, aliases = [], {}
+    for kind, entries in GAZETTEER.items():
+        for canonical, variants in entries.items():
+            aliases[(kind, fold(canonical))] = canonical
+            for variant in variants:
+                patterns.append((variant, (kind, canonical)))
+                aliases[(kind, variant)] = canonical
+    return AhoCorasick(patterns), aliases
+
+
+# Compilado uma vez no import; a busca é linear no tamanho do texto.
+_AUTOMATON, _ALIASES = _compile_gazetteer()
+
+TAG_KINDS = tuple(GAZETTEER)
+
+
+def extract_tags(text: str) -> Set[Tuple[str, str]]:
+    """Returns {(kind, canonical)} found in text, e.g. {("region", "Ceilândia")}."""
+    return {payload for _, _, payload in longest_matches(_AUTOMATON, fold(text or ""))}
+
+
+def canonical_tag(kind: str, value: str) -> str:
+    """Resolves a user-supplied filter ("ceilandia", "Polícia Civil") to the stored tag."""
+    return _ALIASES.get((kind, fold(value).strip()), value)
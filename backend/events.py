@@ -0,0 +1,246 @@
+"""
+Notícias novas em tempo real (GET /events, Server-Sent Events).
+
+Fluxo:
+    save_rows (qualquer processo) -> publish_new -> Redis PUBLISH "noticias:new"
+    API: thread ouvinte (SUBSCRIBE) -> EventBroker.dispatch -> filas dos assinantes
+
+Cada assinante informa filtros (termos de `q` e tags region/agency/crime_type).
+Os termos passam pelo analisador da busca (backend/analyzer.py): stopwords
+caem, sinônimos valem (pm = pmdf = polícia militar) e um termo de 4+ letras
+casa como prefixo, como no /news. O EventBroker mantém um índice pré-compilado
+de todos os filtros: um autômato Aho-Corasick com as variantes dos termos de
+todas as assinaturas e um mapa tag -> assinaturas. Cada artigo é casado com
+todas as assinaturas numa passada só sobre o texto (index_text), por contagem
+(a assinatura casa quando todos os seus termos e tags apareceram).
+
+Sem Redis, o evento é entregue só ao broker do próprio processo (deploy de
+serviço único com o worker embutido). O corpo JSON de cada artigo é codificado
+uma vez e compartilhado por todos os assinantes.
+"""
+import os
+import time
+import asyncio
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+import redis
+
+from .analyzer import analyze, index_text
+from .enrichment import AhoCorasick
+from .normalize import NEWS_COLUMNS
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+EVENTS_CHANNEL = "noticias:new"
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "500"))
+EVENTS_QUEUE_SIZE = 100  # eventos pendentes por assinante; acima disso os mais novos são descartados
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Depois de uma falha, o publicador só tenta o Redis de novo após este intervalo
+REDIS_RETRY_SECONDS = 60
+
+
+class Subscription:
+    __slots__ = ("terms", "tags", "loop", "queue", "dropped")
+
+    def __init__(self, terms: Tuple[Tuple[str, ...], ...], tags: Tuple[Tuple[str, str], ...],
+                 loop: asyncio.AbstractEventLoop):
+        self.terms = terms
+        self.tags = tags
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(EVENTS_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, data: bytes):
+        # Runs on the subscriber's loop; a slow client loses events instead of growing memory
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+class FilterIndex:
+    """Every subscription's filters compiled together, matched in one pass per article.
+
+    Works for any hashable object with `terms` (per term, its patterns from
+    AnalyzedQuery.match_groups(); any of them matches) and `tags` ((kind, tag)
+    pairs); alert rules (backend/alerts.py) reuse it.
+    """
+
+    def __init__(self, subscriptions: Iterable[Subscription]):
+        self.match_all: List[Subscription] = []
+        self.by_tag: Dict[Tuple[str, str], List[Subscription]] = {}
+        self.required: Dict[Subscription, int] = {}
+        patterns = []
+        for sub in subscriptions:
+            if not sub.terms and not sub.tags:
+                self.match_all.append(sub)
+                continue
+            self.required[sub] = len(sub.terms) + len(sub.tags)
+            for tag in sub.tags:
+                self.by_tag.setdefault(tag, []).append(sub)
+            patterns.extend((pattern, (sub, i)) for i, group in enumerate(sub.terms) for pattern in group)
+        self.automaton = AhoCorasick(patterns) if patterns else None
+
+    def match(self, text: str, tags: Set[Tuple[str, str]]) -> List[Subscription]:
+        hits: Counter = Counter()
+        for tag in tags:
+            for sub in self.by_tag.get(tag, ()):
+                hits[sub] += 1
+        if self.automaton is not None:
+            # Patterns carry their word boundaries (" roubo", " pm "); a term found
+            # several times, or through several variants, counts once
+            seen = {payload for _, _, payload in self.automaton.iter_matches(index_text(text))}
+            hits.update(sub for sub, _ in seen)
+        return self.match_all + [sub for sub, count in hits.items() if count == self.required[sub]]
+
+
+def match_event(index: FilterIndex, event: Dict) -> list:
+    """Subscriptions/rules of `index` matching an article event (see article_event)."""
+    tags = {(kind, tag) for kind, values in event.get("tags", {}).items() for tag in values}
+    return index.match(f"{event['title']} {event.get('snippet') or ''}", tags)
+
+
+class EventBroker:
+    """Per-process subscriber registry; dispatch() may be called from any thread."""
+
+    def __init__(self):
+        self.subscriptions: Set[Subscription] = set()
+        self.lock = threading.Lock()
+        self._index: Optional[FilterIndex] = None
+        self.delivered = 0
+
+    def subscribe(self, q: Optional[str] = None, filters: Optional[Dict[str, str]] = None) -> Optional[Subscription]:
+        """None when the process is already at EVENTS_MAX_SUBSCRIBERS."""
+        terms = tuple(map(tuple, analyze(q).match_groups())) if q else ()
+        tags = tuple(sorted((filters or {}).items()))
+        sub = Subscription(terms, tags, asyncio.get_running_loop())
+        with self.lock:
+            if len(self.subscriptions) >= EVENTS_MAX_SUBSCRIBERS:
+                return None
+            self.subscriptions.add(sub)
+            self._index = None
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self.lock:
+            self.subscriptions.discard(sub)
+            self._index = None
+
+    def dispatch(self, events: List[Dict]):
+        with self.lock:
+            if not self.subscriptions:
+                return
+            if self._index is None:
+                # Rebuilt lazily: a burst of (un)subscribes costs one rebuild
+                self._index = FilterIndex(self.subscriptions)
+            index = self._index
+        for event in events:
+            matched = match_event(index, event)
+            if not matched:
+                continue
+            data = orjson.dumps(event)
+            for sub in matched:
+                try:
+                    sub.loop.call_soon_threadsafe(sub.offer, data)
+                    self.delivered += 1
+                except RuntimeError:
+                    pass  # loop closed: the subscriber is going away
+
+
+broker = EventBroker()
+
+
+# --- Publishing (ingest side) -----------------------------------------------------
+_publisher = None
+_publisher_retry_at = 0.0
+
+
+def _get_publisher():
+    global _publisher, _publisher_retry_at
+    if _publisher is None and time.monotonic() >= _publisher_retry_at:
+        try:
+            client = redis.from_url(REDIS_URL, socket_connect_timeout=1, socket_timeout=2)
+            client.ping()
+            _publisher = client
+        except Exception:
+            _publisher_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+    return _publisher
+
+
+def article_event(row: tuple, tags: Iterable[Tuple[str, str]]) -> Dict:
+    event = dict(zip(NEWS_COLUMNS, row))
+    grouped: Dict[str, List[str]] = {}
+    for kind, tag in sorted(tags):
+        grouped.setdefault(kind, []).append(tag)
+    event["tags"] = grouped
+    return event
+
+
+def publish_new(events: List[Dict]):
+    """Announces newly inserted articles. Never raises: ingest must not fail because of it."""
+    global _publisher, _publisher_retry_at
+    if not events:
+        return
+    client = _get_publisher()
+    if client is not None:
+        try:
+            client.publish(EVENTS_CHANNEL, orjson.dumps(events))
+            return
+        except Exception as e:
+            logger.warning(f"Event publish failed ({e}); delivering locally only.")
+            _publisher, _publisher_retry_at = None, time.monotonic() + REDIS_RETRY_SECONDS
+    broker.dispatch(events)
+
+
+# --- Fan-out across workers (API side) --------------------------------------------
+def _listen(stop_event: threading.Event):
+    connected = None  # unknown until the first attempt
+    while not stop_event.is_set():
+        try:
+            pubsub = redis.from_url(REDIS_URL, socket_connect_timeout=2).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(EVENTS_CHANNEL)
+            connected = True
+            logger.info("📡 Event listener subscribed to Redis")
+            while not stop_event.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message and message["type"] == "message":
+                    broker.dispatch(orjson.loads(message["data"]))
+            pubsub.close()
+        except Exception as e:
+            # Logged once per outage; Redis coming up later is picked up by the retries
+            if connected is not False:
+                logger.warning(f"Event listener: Redis unavailable ({e}); only local events until it is back")
+            connected = False
+            stop_event.wait(5)
+
+
+def start_listener() -> threading.Event:
+    """Relays the Redis channel to this process's subscribers until the event is set.
+
+    Needed with several API workers: each one only sees the articles it saved itself otherwise.
+    """
+    stop_event = threading.Event()
+    threading.Thread(target=_listen, args=(stop_event,), daemon=True, name="events-listener").start()
+    return stop_event
+
+
+async def sse_stream(sub: Subscription, is_disconnected):
+    """text/event-stream body: one `news` event per matched article, comments as heartbeat."""
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                data = await asyncio.wait_for(sub.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield b": ping\n\n"
+                continue
+            yield b"event: news\ndata: " + data + b"\n\n"
+    finally:
+        broker.unsubscribe(sub)
@@ -0,0 +1,266 @@
+"""
+Exportação colunar do arquivo (Parquet particionado por mês / Arrow IPC).
+
+Uso:
+    python -m backend.export --out exports/          # incremental desde a última marca d'água
+    python -m backend.export --out exports/ --full   # reexporta tudo
+
+Layout (hive, legível por pyarrow.dataset / DuckDB / pandas):
+    exports/noticias/month=2025-10/part-<de>-<até>.parquet
+    exports/noticia_tags/month=2025-10/part-<de>-<até>.parquet
+
+A marca d'água é o `seq` de `noticia_seq` (AUTOINCREMENT: cresce a cada
+inserção e nunca é reaproveitado) e fica em `export_watermarks`; só avança
+depois que todos os arquivos foram fechados. Os artigos são lidos dos dois
+tiers (`noticias_all`): o que a retenção já moveu para o banco frio também sai.
+Com PostgreSQL as páginas vêm do backend de armazenamento (coluna `seq` de
+`noticias`, ver pg_storage.export_page); a marca d'água de cada diretório
+continua no SQLite local, junto dos arquivos.
+"""
+import os
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .database import get_connection, init_db
+from .storage import get_storage
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "5000"))
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COMPRESSION = "zstd" if pa.Codec.is_available("zstd") else None
+
+NEWS_SCHEMA = pa.schema([
+    ("seq", pa.int64()),  # ordem de ingestão (noticia_seq): cursor para exportações incrementais
+    ("id", pa.string()),
+    ("title", pa.string()),
+    ("url", pa.string()),
+    ("publishedAt", pa.timestamp("us")),
+    ("source", pa.string()),
+    ("snippet", pa.string()),
+    ("language", pa.string()),
+])
+
+TAGS_SCHEMA = pa.schema([
+    ("seq", pa.int64()),
+    ("news_id", pa.string()),
+    ("kind", pa.string()),
+    ("tag", pa.string()),
+    ("publishedAt", pa.timestamp("us")),
+])
+
+# Storage.export_page returns rows in these column orders
+_SCHEMAS = {"noticias": NEWS_SCHEMA, "noticia_tags": TAGS_SCHEMA}
+
+DATASETS = tuple(_SCHEMAS)
+
+
+def _timestamps(values: List[Optional[str]]) -> pa.Array:
+    try:
+        return pa.array(values, pa.string()).cast(pa.timestamp("us"))
+    except pa.ArrowInvalid:
+        # Offsets like "+00:00" (DDG items): normalise to naive UTC, like the rest of the archive
+        parsed = []
+        for value in values:
+            dt = datetime.fromisoformat(value) if value else None
+            if dt is not None and dt.tzinfo is not None:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            parsed.append(dt)
+        return pa.array(parsed, pa.timestamp("us"))
+
+
+def _to_batch(rows: List[tuple], schema: pa.Schema) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    arrays = [
+        _timestamps(list(col)) if field.type == pa.timestamp("us") else pa.array(col, field.type)
+        for field, col in zip(schema, columns)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def current_watermark() -> int:
+    """Highest ingest seq right now: the upper bound of a consistent export."""
+    return get_storage().export_watermark()
+
+
+def iter_batches(
+    dataset: str,
+    after: int = 0,
+    upto: Optional[int] = None,
+    since: Optional[str] = None,
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> Iterator[pa.RecordBatch]:
+    """Record batches for articles with after < seq <= upto.
+
+    Keyset pagination on seq: each batch opens its own short read, so memory
+    stays at one batch and no read transaction is held between batches (the
+    generator may also be resumed from different threads by StreamingResponse).
+    """
+    schema, storage = _SCHEMAS[dataset], get_storage()
+    upto = current_watermark() if upto is None else upto
+    cursor_pos = after
+    while cursor_pos < upto:
+        batch_end, rows = storage.export_page(dataset, cursor_pos, upto, since, batch_rows)
+        if batch_end is None:
+            return
+        cursor_pos = batch_end
+        if rows:
+            yield _to_batch(rows, schema)
+
+
+def _split_by_month(batch: pa.RecordBatch) -> Dict[str, pa.RecordBatch]:
+    months = pc.strftime(batch.column("publishedAt"), format="%Y-%m")
+    return {
+        month: batch.filter(pc.equal(months, month))
+        for month in pc.unique(months).to_pylist()
+    }
+
+
+class _MonthPartitionedWriter:
+    """One ParquetWriter per month touched by the export, committed on close()."""
+
+    def __init__(self, root: str, schema: pa.Schema, part_name: str):
+        self.root, self.schema, self.part_name = root, schema, part_name
+        self.writers: Dict[str, pq.ParquetWriter] = {}
+        self.paths: Dict[str, str] = {}
+
+    def write(self, batch: pa.RecordBatch):
+        for month, part in _split_by_month(batch).items():
+            writer = self.writers.get(month)
+            if writer is None:
+                directory = os.path.join(self.root, f"month={month}")
+                os.makedirs(directory, exist_ok=True)
+                self.paths[month] = os.path.join(directory, f"part-{self.part_name}.parquet")
+                # Hidden temp name: dataset readers skip dot-files until the rename
+                writer = pq.ParquetWriter(self._tmp_path(month), self.schema, compression=COMPRESSION)
+                self.writers[month] = writer
+            writer.write_batch(part)
+
+    def _tmp_path(self, month: str) -> str:
+        return os.path.join(self.root, f"month={month}", f".part-{self.part_name}.parquet.tmp")
+
+    def close(self) -> List[str]:
+        for month, writer in self.writers.items():
+            writer.close()
+            os.replace(self._tmp_path(month), self.paths[month])
+        return sorted(self.paths.values())
+
+    def abort(self):
+        for month, writer in self.writers.items():
+            writer.close()
+            os.remove(self._tmp_path(month))
+
+
+def _watermark_name(out_dir: str) -> str:
+    return f"parquet:{os.path.abspath(out_dir)}"
+
+
+def get_export_watermark(out_dir: str) -> int:
+    conn = get_connection()
+    row = conn.execute("SELECT value FROM export_watermarks WHERE name = ?", (_watermark_name(out_dir),)).fetchone()
+    conn.close()
+    return row["value"] if row else 0
+
+
+def _set_export_watermark(out_dir: str, value: int):
+    conn = get_connection()
+    conn.execute("""
+        INSERT INTO export_watermarks (name, value, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    """, (_watermark_name(out_dir), value, datetime.now().isoformat()))
+    conn.commit()
+    conn.close()
+
+
+def export_parquet(out_dir: str, full: bool = False, batch_rows: int = EXPORT_BATCH_ROWS) -> Dict:
+    """Writes rows added since the last export of `out_dir` as month-partitioned Parquet."""
+    after = 0 if full else get_export_watermark(out_dir)
+    upto = current_watermark()
+    summary = {"after": after, "watermark": upto, "rows": {}, "files": []}
+    if upto <= after:
+        logger.info(f"📤 Export {out_dir}: nothing new since watermark {after}")
+        return summary
+
+    part_name = f"{after + 1:012d}-{upto:012d}"
+    writers = {
+        dataset: _MonthPartitionedWriter(os.path.join(out_dir, dataset), _SCHEMAS[dataset], part_name)
+        for dataset in DATASETS
+    }
+    try:
+        for dataset, writer in writers.items():
+            count = 0
+            for batch in iter_batches(dataset, after=after, upto=upto, batch_rows=batch_rows):
+                writer.write(batch)
+                count += batch.num_rows
+            summary["rows"][dataset] = count
+    except Exception:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    for writer in writers.values():
+        summary["files"].extend(writer.close())
+    _set_export_watermark(out_dir, upto)
+    logger.info(f"📤 Export {out_dir}: {summary['rows']} up to watermark {upto} ({len(summary['files'])} files)")
+    return summary
+
+
+class _ChunkSink:
+    """File-like object collecting what the IPC writer emits, drained after each batch."""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def stream_arrow_ipc(
+    dataset: str = "noticias",
+    after: int = 0,
+    upto: Optional[int] = None,
+    since: Optional[str] = None,
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> Iterator[bytes]:
+    """Arrow IPC stream (schema, record batches, EOS) as byte chunks for StreamingResponse."""
+    schema = _SCHEMAS[dataset]
+    sink = _ChunkSink()
+    options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+    writer = pa.ipc.new_stream(sink, schema, options=options)
+    yield sink.drain()
+    for batch in iter_batches(dataset, after=after, upto=upto, since=since, batch_rows=batch_rows):
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o arquivo de notícias para Parquet particionado por mês")
+    parser.add_argument("--out", default="exports", help="Diretório de destino")
+    parser.add_argument("--full", action="store_true", help="Ignora a marca d'água e reexporta tudo (use um diretório vazio)")
+    parser.add_argument("--batch-rows", type=int, default=EXPORT_BATCH_ROWS)
+    args = parser.parse_args()
+
+    init_db()
+    summary = export_parquet(args.out, full=args.full, batch_rows=args.batch_rows)
+    logger.info(f"✅ Export finished: {summary['rows']} (watermark {summary['watermark']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,153 +1,170 @@
 import feedparser
 import httpx
 import os
-import hashlib
-from datetime import datetime
-from typing import List
-from newsapi import NewsApiClient
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Dict, List, Optional
 from urllib.parse import quote
 from ddgs import DDGS
-from .models import NewsItem
+from .analyzer import AnalyzedQuery
+from .normalize import NewsRecord, news_id, rss_entry_to_row, parse_payload
+from .catalog import run_catalog
+from .metrics import FETCH_LATENCY, FETCH_ITEMS, FETCH_ERRORS
 from .logging_config import setup_logging
 
 logger = setup_logging()
 
+# Overridable so benchmarks (benchmarks/fakes.py) can point the fetchers at local stand-ins
+GOOGLE_NEWS_RSS_URL = os.getenv("GOOGLE_NEWS_RSS_URL", "https://news.google.com/rss/search")
+GDELT_URL = os.getenv("GDELT_URL", "https://api.gdeltproject.org/api/v2/doc/doc")
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2/everything")
+
+# Itens pedidos por dia de janela (fetch_gdelt / fetch_newsapi com since) e teto de cada API
+ITEMS_PER_DAY = 10
+GDELT_MAX_RECORDS = 250
+NEWSAPI_MAX_PAGE_SIZE = 100
+
+
+def _window_size(since: Optional[datetime], cap: int) -> int:
+    """ITEMS_PER_DAY for each (started) day since `since`; one day without it."""
+    days = 1 if since is None else max(1, -(-(datetime.now() - since) // timedelta(days=1)))
+    return min(ITEMS_PER_DAY * days, cap)
+
+def _instrumented(source: str):
+    """Latency histogram + returned-items counter for one fetch_* method."""
+    items_total = FETCH_ITEMS.labels(source)
+    def decorator(func):
+        timed = FETCH_LATENCY.labels(source).timed(func)
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            items = timed(*args, **kwargs)
+            items_total.inc(len(items))
+            return items
+        return wrapper
+    return decorator
+
 class NewsFetcher:
     def __init__(self):
         self.newsapi_key = os.getenv("NEWS_API_KEY")
+        # On-demand searches in progress, by external query text (see search_external)
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
     
-    def fetch_google_rss(self, query: str = "segurança publica Brasil") -> List[NewsItem]:
+    @_instrumented("google_rss")
+    def fetch_google_rss(self, query: str = "segurança publica Brasil") -> List[NewsRecord]:
         logger.info("Fetching Google RSS...")
         # RSS para Brasil em pt-BR (Encode query)
         encoded_query = quote(query)
-        url = f"https://news.google.com/rss/search?q={encoded_query}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
+        url = f"{GOOGLE_NEWS_RSS_URL}?q={encoded_query}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
         feed = feedparser.parse(url)
-        items = []
-        for entry in feed.entries[:10]:
-            nid = hashlib.sha256(entry.link.encode()).hexdigest()
-            # Tenta parser data, senão usa now
-            pub_date = datetime.now()
-            try:
-                # feedparser struct_time to datetime
-                if hasattr(entry, 'published_parsed'):
-                     pub_date = datetime(*entry.published_parsed[:6])
-            except:
-                pass
+        return [rss_entry_to_row(entry) for entry in feed.entries[:10]]
 
-            items.append(NewsItem(
-                id=nid,
-                title=entry.title,
-                url=entry.link,
-                publishedAt=pub_date,
-                source="Google News RSS",
-                snippet=entry.summary if 'summary' in entry else "",
-                language="pt"
-            ))
-        return items
-
-    def fetch_gdelt(self, query: str = "segurança OR crime") -> List[NewsItem]:
+    @_instrumented("gdelt")
+    def fetch_gdelt(self, query: str = "segurança OR crime", since: Optional[datetime] = None) -> List[NewsRecord]:
+        """Last 24h, or everything since `since` (the catalog passes the entry's last run)."""
         logger.info("Fetching GDELT...")
         # GDELT Doc API 2.0
-        # mode=artlist, format=json, timespan=24h
-        url = "https://api.gdeltproject.org/api/v2/doc/doc"
+        # mode=artlist, format=json, timespan=24h (ou start/enddatetime desde `since`)
+        url = GDELT_URL
         params = {
             "query": f"{query} country:BR sourcecountry:BR",
             "mode": "artlist",
             "format": "json",
             "timespan": "24h",
-            "maxrecords": "10"
+            "maxrecords": str(_window_size(since, GDELT_MAX_RECORDS))
         }
+        if since is not None:
+            del params["timespan"]
+            params["startdatetime"] = since.strftime("%Y%m%d%H%M%S")
+            params["enddatetime"] = datetime.now().strftime("%Y%m%d%H%M%S")
         items = []
         try:
             # Sync HTTP request using httpx (standard lib for this project now)
             with httpx.Client() as client:
                 resp = client.get(url, params=params, timeout=10.0)
                 if resp.status_code == 200:
-                    data = resp.json()
-                    if "articles" in data:
-                        for art in data["articles"]:
-                            nid = hashlib.sha256(art["url"].encode()).hexdigest()
-                            # GDELT date format e.g. "20230101120000"
-                            try:
-                                pdate = datetime.strptime(art["seendate"], "%Y%m%dT%H%M%SZ") # Check format if standard or custom
-                            except:
-                                pdate = datetime.now()
-                                
-                            items.append(NewsItem(
-                                id=nid,
-                                title=art["title"],
-                                url=art["url"],
-                                publishedAt=pdate,
-                                source="GDELT",
-                                snippet=f"Domain: {art.get('domain', 'N/A')}",
-                                language="pt"
-                            ))
+                    items = parse_payload("gdelt", resp.content)
         except Exception as e:
             logger.error(f"Error fetching GDELT: {e}")
+            FETCH_ERRORS.labels("gdelt").inc()
         return items
 
-    def fetch_newsapi(self, query: str = "segurança publica") -> List[NewsItem]:
+    @_instrumented("newsapi")
+    def fetch_newsapi(self, query: str = "segurança publica", since: Optional[datetime] = None) -> List[NewsRecord]:
+        """Newest first; only articles published after `since` when given."""
         logger.info("Fetching NewsAPI...")
         if not self.newsapi_key:
             logger.warning("NEWS_API_KEY missing.")
             return []
         
         try:
-            api = NewsApiClient(api_key=self.newsapi_key)
             # Fetch generic security news
-            data = api.get_everything(q=query, language='pt', sort_by='publishedAt', page_size=10)
-            items = []
-            if data['status'] == 'ok':
-                for art in data['articles']:
-                    nid = hashlib.sha256(art['url'].encode()).hexdigest()
-                    try:
-                        pdate = datetime.strptime(art['publishedAt'], "%Y-%m-%dT%H:%M:%SZ")
-                    except:
-                        pdate = datetime.now()
-
-                    items.append(NewsItem(
-                        id=nid,
-                        title=art['title'],
-                        url=art['url'],
-                        publishedAt=pdate,
-                        source=f"NewsAPI ({art['source']['name']})",
-                        snippet=art['description'] or "",
-                        language="pt"
-                    ))
-            return items
+            params = {"q": query, "language": "pt", "sortBy": "publishedAt",
+                      "pageSize": _window_size(since, NEWSAPI_MAX_PAGE_SIZE)}
+            if since is not None:
+                params["from"] = since.strftime("%Y-%m-%dT%H:%M:%S")
+            with httpx.Client() as client:
+                resp = client.get(NEWSAPI_URL, params=params, headers={"X-Api-Key": self.newsapi_key}, timeout=10.0)
+            resp.raise_for_status()
+            return parse_payload("newsapi", resp.content)
         except Exception as e:
             logger.error(f"Error fetching NewsAPI: {e}")
+            FETCH_ERRORS.labels("newsapi").inc()
             return []
 
-    def fetch_ddg(self, query: str = "segurança publica Distrito Federal") -> List[NewsItem]:
+    @_instrumented("ddg")
+    def fetch_ddg(self, query: str = "segurança publica Distrito Federal") -> List[NewsRecord]:
+        """Raises when DuckDuckGo fails: [] means it answered with nothing (see search_external)."""
         logger.info("Fetching DuckDuckGo...")
         items = []
         try:
             with DDGS() as ddgs:
                 results = list(ddgs.text(f"{query}", region="br-pt", safesearch="off", max_results=5))
+                now = datetime.now().isoformat()
                 for r in results:
-                    nid = hashlib.sha256(r['href'].encode()).hexdigest()
-                    items.append(NewsItem(
-                        id=nid,
+                    items.append(NewsRecord(
+                        id=news_id(r['href']),
                         title=r['title'],
                         url=r['href'],
-                        publishedAt=datetime.now(),
+                        publishedAt=now,
                         source="DuckDuckGo",
                         snippet=r['body'],
                         language="pt"
                     ))
         except Exception as e:
-             logger.error(f"Error fetching DDG: {e}")
+            logger.error(f"Error fetching DDG: {e}")
+            FETCH_ERRORS.labels("ddg").inc()
+            raise
         return items
 
-    def fetch_all(self, query_base: str = "segurança publica") -> List[NewsItem]:
-        all_news = []
-        all_news.extend(self.fetch_google_rss(f"{query_base} Brasil"))
-        all_news.extend(self.fetch_newsapi(query_base))
-        all_news.extend(self.fetch_gdelt())
-        # DDG specific for DF often
-        all_news.extend(self.fetch_ddg(f"{query_base} Distrito Federal"))
-        
-        # Deduplicate by ID
-        unique_news = {n.id: n for n in all_news}
-        return list(unique_news.values())
+    def search_external(self, analyzed: AnalyzedQuery, region: Optional[str] = None) -> List[NewsRecord]:
+        """On-demand search for /news with AnalyzedQuery.external_query (backend/analyzer.py).
+
+        Queries with the same folded text arriving while one is running wait for it instead of
+        calling DuckDuckGo again. A failed search raises (in every waiter), so it
+        is never mistaken for an empty answer and negatively cached.
+        """
+        query = analyzed.external_query(region)
+        with self._inflight_lock:
+            future = self._inflight.get(query)
+            leader = future is None
+            if leader:
+                future = self._inflight[query] = Future()
+        if not leader:
+            return future.result()
+        try:
+            items = self.fetch_ddg(query)
+            future.set_result(items)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[query]
+        return items
+
+    def fetch_all(self, budget: Optional[int] = None) -> List[NewsRecord]:
+        """Runs the due entries of the query catalog (backend/catalog.py), deduplicated by id."""
+        return run_catalog(self, budget=budget)
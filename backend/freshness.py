@@ -0,0 +1,108 @@
+"""
+Política de frescor do /news: quando o arquivo local basta e quando buscar lá fora.
+
+Uso:
+    from backend.freshness import check_freshness, record_fetch
+    decision = check_freshness(analyzed, region, db_results)   # fresh | stale | miss | negative
+
+A consulta é identificada pelo texto que a busca externa receberia
+(AnalyzedQuery.external_query), e `query_fetches` guarda quando ela rodou pela
+última vez. Com resultados no banco a resposta sai sempre na hora:
+- fresh: o resultado mais novo tem menos de FRESHNESS_MAX_AGE_HOURS, ou a
+  consulta já foi buscada lá fora há menos de REFRESH_MIN_INTERVAL_MINUTES;
+- stale: enfileira o job "refresh_query" (busca externa + gravação, ver
+  worker.py); as próximas requisições já veem o que ele trouxer.
+Sem resultados no banco:
+- negative: a mesma consulta foi buscada há menos de NEGATIVE_TTL_MINUTES e
+  nada casou; responde vazio sem nova chamada externa;
+- miss: busca externa síncrona (main.py), registrada com record_fetch.
+Só buscas que responderam são registradas: uma falha (rede, bloqueio do
+DuckDuckGo) não vira resposta negativa.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .analyzer import AnalyzedQuery, analyze
+from .database import get_connection, _published_datetime
+from .normalize import NewsRecord
+from .metrics import NEWS_FRESHNESS
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+FRESHNESS_MAX_AGE_HOURS = float(os.getenv("FRESHNESS_MAX_AGE_HOURS", "24"))
+REFRESH_MIN_INTERVAL_MINUTES = float(os.getenv("REFRESH_MIN_INTERVAL_MINUTES", "60"))
+NEGATIVE_TTL_MINUTES = float(os.getenv("NEGATIVE_TTL_MINUTES", "30"))
+
+FRESH, STALE, MISS, NEGATIVE = "fresh", "stale", "miss", "negative"
+
+
+def last_fetch(query: str) -> Optional[Tuple[datetime, int]]:
+    """(fetched_at, found) of the last external search for `query`."""
+    conn = get_connection()
+    row = conn.execute("SELECT fetched_at, found FROM query_fetches WHERE query = ?", (query,)).fetchone()
+    conn.close()
+    return (datetime.fromisoformat(row["fetched_at"]), row["found"]) if row else None
+
+
+def record_fetch(query: str, found: int, now: Optional[datetime] = None):
+    now = now or datetime.now()
+    conn = get_connection()
+    conn.execute("""
+        INSERT INTO query_fetches (query, fetched_at, found, fetches) VALUES (?, ?, ?, 1)
+        ON CONFLICT(query) DO UPDATE SET
+            fetched_at = excluded.fetched_at, found = excluded.found, fetches = fetches + 1
+    """, (query, now.isoformat(timespec="seconds"), found))
+    conn.commit()
+    conn.close()
+
+
+def decide(query: str, newest: Optional[datetime], now: Optional[datetime] = None) -> str:
+    """`newest`: publishedAt of the newest local result, None when there is none."""
+    now = now or datetime.now()
+    if newest is not None and now - newest < timedelta(hours=FRESHNESS_MAX_AGE_HOURS):
+        return FRESH  # no lookup on the common path
+    fetched = last_fetch(query)
+    age = now - fetched[0] if fetched else None
+    if newest is None:
+        # Fetched recently and still nothing local: what it found did not match
+        return NEGATIVE if age is not None and age < timedelta(minutes=NEGATIVE_TTL_MINUTES) else MISS
+    if age is not None and age < timedelta(minutes=REFRESH_MIN_INTERVAL_MINUTES):
+        return FRESH  # old news, but the sources were just asked
+    return STALE
+
+
+def schedule_refresh(analyzed: AnalyzedQuery, region: Optional[str] = None, now: Optional[float] = None):
+    """Enqueues "refresh_query"; one job per query and REFRESH_MIN_INTERVAL_MINUTES window."""
+    from .jobs import get_queue
+
+    window = int((now or time.time()) // (REFRESH_MIN_INTERVAL_MINUTES * 60))
+    dedupe_key = f"refresh:{analyzed.external_query(region)}:{window}"
+    try:
+        get_queue().enqueue("refresh_query", {"q": analyzed.text, "region": region}, dedupe_key=dedupe_key)
+    except Exception as e:
+        # The response is already on its way: a refresh lost here is retried by the next request
+        logger.warning(f"Refresh of '{analyzed.key}' not enqueued: {e}")
+
+
+def check_freshness(analyzed: AnalyzedQuery, region: Optional[str], rows: List[NewsRecord]) -> str:
+    """Decision for a first page of local results; schedules the background refresh when stale."""
+    newest = max((_published_datetime(r.publishedAt) for r in rows), default=None)
+    decision = decide(analyzed.external_query(region), newest)
+    NEWS_FRESHNESS.labels(decision).inc()
+    if decision == STALE:
+        logger.info(f"Stale results for '{analyzed.key}' (newest {newest:%Y-%m-%d}); refreshing in background")
+        schedule_refresh(analyzed, region)
+    return decision
+
+
+def refresh_query(fetcher, storage, payload: Dict) -> Dict:
+    """Job body: external search for the query, saved and recorded (a failed search raises: the job fails)."""
+    analyzed = analyze(payload["q"])
+    region = payload.get("region")
+    items = fetcher.search_external(analyzed, region)
+    new = storage.save_items(items) if items else 0
+    record_fetch(analyzed.external_query(region), len(items))
+    return {"fetched": len(items), "new": new}
@@ -0,0 +1,254 @@
+import os
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import redis
+
+from .database import get_connection
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "auto")  # auto | redis | postgres | sqlite
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "1800"))
+JOB_MAX_ATTEMPTS = 3
+DEDUPE_TTL_SECONDS = 2 * 86400
+
+STREAM_KEY = "jobs:stream"
+STREAM_GROUP = "workers"
+
+# KEYS: job hash, stream[, dedupe key]; ARGV: job id, dedupe TTL, hash field/value pairs.
+# One script: a crash can no longer leave a dedupe key (or a hash) without its stream entry
+_ENQUEUE_SCRIPT = """
+if KEYS[3] then
+    local existing = redis.call("GET", KEYS[3])
+    if existing then return existing end
+    redis.call("SET", KEYS[3], ARGV[1], "EX", ARGV[2])
+end
+redis.call("HSET", KEYS[1], unpack(ARGV, 3))
+redis.call("XADD", KEYS[2], "*", "id", ARGV[1])
+return ARGV[1]
+"""
+
+
+def _new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+class SQLiteJobQueue:
+    """Durable queue on the `jobs` table; workers claim rows with BEGIN IMMEDIATE."""
+
+    name = "sqlite"
+
+    def enqueue(self, kind: str, payload: Optional[Dict] = None, dedupe_key: Optional[str] = None) -> str:
+        job_id = _new_job_id()
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR IGNORE INTO jobs (id, kind, payload, status, dedupe_key, attempts, created_at)
+            VALUES (?, ?, ?, 'queued', ?, 0, ?)
+        """, (job_id, kind, json.dumps(payload or {}), dedupe_key, datetime.now().isoformat()))
+        if cursor.rowcount == 0:
+            # Same dedupe_key already enqueued (e.g. another process took this cron tick)
+            cursor.execute("SELECT id FROM jobs WHERE dedupe_key = ?", (dedupe_key,))
+            job_id = cursor.fetchone()["id"]
+        conn.commit()
+        conn.close()
+        return job_id
+
+    def claim(self, worker_id: str, block_ms: int = 0) -> Optional[Dict]:
+        now = datetime.now()
+        stale_before = (now - timedelta(seconds=JOB_TIMEOUT_SECONDS)).isoformat()
+        conn = get_connection()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("""
+                SELECT * FROM jobs
+                WHERE status = 'queued' OR (status = 'running' AND started_at < ?)
+                ORDER BY created_at LIMIT 1
+            """, (stale_before,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if row["attempts"] >= JOB_MAX_ATTEMPTS:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                    ("max attempts exceeded", now.isoformat(), row["id"]),
+                )
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now.isoformat(), row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"] or "{}")
+        return job
+
+    def _finish(self, job_id: str, status: str, result=None, error: Optional[str] = None):
+        conn = get_connection()
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, datetime.now().isoformat(), job_id),
+        )
+        conn.commit()
+        conn.close()
+
+    def complete(self, job_id: str, result=None):
+        self._finish(job_id, "done", result=result)
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, "failed", error=error)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        conn = get_connection()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+class RedisJobQueue:
+    """Redis stream + consumer group; job state lives in a `job:{id}` hash."""
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+        try:
+            self.client.xgroup_create(STREAM_KEY, STREAM_GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._enqueue = self.client.register_script(_ENQUEUE_SCRIPT)
+
+    def enqueue(self, kind: str, payload: Optional[Dict] = None, dedupe_key: Optional[str] = None) -> str:
+        job_id = _new_job_id()
+        fields = {
+            "id": job_id,
+            "kind": kind,
+            "payload": json.dumps(payload or {}),
+            "status": "queued",
+            "attempts": 0,
+            "created_at": datetime.now().isoformat(),
+        }
+        keys = [f"job:{job_id}", STREAM_KEY]
+        if dedupe_key:
+            # Only the first process to reach this key enqueues; the others get its job id
+            keys.append(f"jobs:dedupe:{dedupe_key}")
+        args = [job_id, DEDUPE_TTL_SECONDS] + [v for pair in fields.items() for v in pair]
+        return self._enqueue(keys=keys, args=args)
+
+    def claim(self, worker_id: str, block_ms: int = 0) -> Optional[Dict]:
+        # Messages left pending by a crashed worker are reclaimed after the timeout
+        _, reclaimed, *_ = self.client.xautoclaim(
+            STREAM_KEY, STREAM_GROUP, worker_id, min_idle_time=JOB_TIMEOUT_SECONDS * 1000, count=1
+        )
+        entries = reclaimed
+        if not entries:
+            response = self.client.xreadgroup(
+                STREAM_GROUP, worker_id, {STREAM_KEY: ">"}, count=1, block=block_ms or None
+            )
+            entries = response[0][1] if response else []
+        if not entries:
+            return None
+        message_id, fields = entries[0]
+        job_id = fields["id"]
+        attempts = self.client.hincrby(f"job:{job_id}", "attempts", 1)
+        if attempts > JOB_MAX_ATTEMPTS:
+            self._finish(job_id, "failed", error="max attempts exceeded", message_id=message_id)
+            return None
+        self.client.hset(f"job:{job_id}", mapping={
+            "status": "running",
+            "worker": worker_id,
+            "started_at": datetime.now().isoformat(),
+            "message_id": message_id,
+        })
+        job = self.get(job_id)
+        return job
+
+    def _finish(self, job_id: str, status: str, result=None, error: Optional[str] = None, message_id=None):
+        key = f"job:{job_id}"
+        message_id = message_id or self.client.hget(key, "message_id")
+        mapping = {"status": status, "finished_at": datetime.now().isoformat()}
+        if result is not None:
+            mapping["result"] = json.dumps(result)
+        if error is not None:
+            mapping["error"] = error
+        self.client.hset(key, mapping=mapping)
+        self.client.expire(key, DEDUPE_TTL_SECONDS)
+        if message_id:
+            self.client.xack(STREAM_KEY, STREAM_GROUP, message_id)
+
+    def complete(self, job_id: str, result=None):
+        self._finish(job_id, "done", result=result)
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, "failed", error=error)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        data = self.client.hgetall(f"job:{job_id}")
+        if not data:
+            return None
+        data["payload"] = json.loads(data.get("payload") or "{}")
+        data["result"] = json.loads(data["result"]) if data.get("result") else None
+        data["attempts"] = int(data.get("attempts", 0))
+        return data
+
+
+_queue = None
+
+
+def get_queue():
+    """Redis stream when reachable (or forced), then the PostgreSQL table when the
+    storage is PostgreSQL (shared by every node), otherwise the SQLite table."""
+    global _queue
+    if _queue is None:
+        if JOB_QUEUE_BACKEND in ("auto", "redis"):
+            try:
+                client = redis.from_url(REDIS_URL, decode_responses=True)
+                client.ping()
+                _queue = RedisJobQueue(client)
+            except Exception as e:
+                if JOB_QUEUE_BACKEND == "redis":
+                    raise
+                logger.warning(f"⚠️ Redis unavailable for job queue ({e}). Using the database queue.")
+        if _queue is None and JOB_QUEUE_BACKEND in ("auto", "postgres"):
+            from .storage import get_storage
+
+            storage = get_storage()
+            if storage.name == "postgres":
+                from .pg_storage import PostgresJobQueue
+
+                _queue = PostgresJobQueue(storage)
+            elif JOB_QUEUE_BACKEND == "postgres":
+                raise RuntimeError("JOB_QUEUE_BACKEND=postgres requires DATABASE_URL")
+        if _queue is None:
+            _queue = SQLiteJobQueue()
+        logger.info(f"Job queue backend: {_queue.name}")
+    return _queue
+
+
+def cron_tick_key(kind: str, now: Optional[datetime] = None) -> str:
+    """Dedupe key shared by every process firing the same cron tick.
+
+    All API/worker processes schedule the same cron; whichever reaches the
+    queue first wins the tick and the others get the existing job id back.
+    """
+    now = now or datetime.now()
+    return f"cron:{kind}:{now:%Y-%m-%dT%H}"
+
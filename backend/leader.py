@@ -0,0 +1,63 @@
+"""
+Eleição de líder entre processos que compartilham o banco (workers do
+uvicorn/gunicorn e, com PostgreSQL, todos os nós da API).
+
+Só o líder roda o agendador (cron de coletas, conteúdo e retenção); os demais
+o mantêm pausado. A liderança é um lease com prazo na tabela `leases`,
+renovado a cada LEADER_LEASE_SECONDS / 3: se o líder morrer, outro processo
+assume quando o prazo vencer. O lease vive no backend de armazenamento (não no
+Redis) de propósito: quem disputa a liderança é quem escreve no mesmo banco, e
+cada banco precisa de exatamente um agendador. Os prazos usam o relógio de
+cada nó (mantenha-os sincronizados, ex.: NTP).
+"""
+import os
+import time
+import uuid
+import socket
+import asyncio
+from typing import Callable, Optional
+
+from .storage import get_storage
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "30"))
+
+
+class LeaderLease:
+    def __init__(self, name: str, holder: Optional[str] = None, ttl: float = LEADER_LEASE_SECONDS):
+        self.name = name
+        self.holder = holder or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.ttl = ttl
+        self.is_leader = False
+
+    def acquire(self, now: Optional[float] = None) -> bool:
+        """Takes the lease if free/expired, renews it if ours. Returns whether we hold it."""
+        now = time.time() if now is None else now
+        return get_storage().acquire_lease(self.name, self.holder, self.ttl, now)
+
+    def release(self):
+        get_storage().release_lease(self.name, self.holder)
+        self.is_leader = False
+
+    async def keep(self, on_elected: Callable[[], None], on_deposed: Callable[[], None]):
+        """Contends for / renews the lease until cancelled, calling back on every change."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    held = await loop.run_in_executor(None, self.acquire)
+                except Exception as e:
+                    # Cannot confirm the lease: step down rather than risk two leaders
+                    logger.warning(f"Lease '{self.name}' check failed: {e}")
+                    held = False
+                if held != self.is_leader:
+                    self.is_leader = held
+                    logger.info(f"👑 {self.holder} {'is now' if held else 'is no longer'} '{self.name}' leader")
+                    (on_elected if held else on_deposed)()
+                await asyncio.sleep(self.ttl / 3)
+        finally:
+            if self.is_leader:
+                on_deposed()
+                await loop.run_in_executor(None, self.release)
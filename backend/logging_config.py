@@ -1,7 +1,17 @@
 import logging
 import logging.config
+import logging.handlers
 import os
-import json
+import gzip
+import orjson
+import shutil
+
+# Only one process role writes app.log (rotation renames the file under any other
+# writer): "api" (default), "worker" (python -m backend.worker), or "none". Every
+# other process -- worker children, CLIs, a non-owner role -- logs to stderr only.
+LOG_FILE_OWNER = os.getenv("LOG_FILE_OWNER", "api").lower()
+
+_process_role = None
 
 class JsonFormatter(logging.Formatter):
     """Format logs as JSON for Cloud Observability"""
@@ -15,20 +25,38 @@ class JsonFormatter(logging.Formatter):
         }
         if record.exc_info:
             log_record["exception"] = self.formatException(record.exc_info)
-        return json.dumps(log_record)
+        # default=str: never fail a log line over an odd value
+        return orjson.dumps(log_record, default=str).decode()
+
+class CompressedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size-based rotation; rotated files are gzipped (app.log.1.gz, app.log.2.gz, ...)"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._gzip_rotate
+
+    @staticmethod
+    def _gzip_rotate(source, dest):
+        with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
 
 class SQLiteHandler(logging.Handler):
-    """Custom handler to write logs to SQLite DB"""
+    """Custom handler to write logs to the DB (SQLite, or PostgreSQL once backend.storage is using it)"""
     def emit(self, record):
         try:
             msg = self.format(record)
             # Avoid circular import by importing inside method
-            from .database import insert_log 
+            from .storage import insert_log
             insert_log(record.levelname, msg)
         except Exception:
             self.handleError(record)
 
-def setup_logging():
+def setup_logging(role=None):
+    """Configures logging; entry points pass their role once, later calls keep it."""
+    global _process_role
+    if role is not None:
+        _process_role = role
     # Detect environment (Production/Docker usually sets ENV=production)
     is_production = os.getenv("ENV", "development").lower() == "production"
 
@@ -50,8 +78,10 @@ def setup_logging():
                 "level": "INFO",
             },
             "file": {
-                "class": "logging.FileHandler",
+                "()": CompressedRotatingFileHandler,
                 "filename": "app.log",
+                "maxBytes": int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+                "backupCount": int(os.getenv("LOG_BACKUP_COUNT", "5")),
                 "formatter": "json" if is_production else "standard",
                 "level": "INFO",
                 "encoding": "utf-8",
@@ -59,7 +89,8 @@ def setup_logging():
             "db": {
                 "()": SQLiteHandler,
                 "formatter": "standard", # DB can keep standard string or JSON, standard is better for simple reading
-                "level": "INFO",
+                # Pruned by backend/retention.py (LOG_RETENTION_DAYS); raise to WARNING to write less
+                "level": os.getenv("LOG_DB_LEVEL", "INFO"),
             },
         },
         "root": {
@@ -74,5 +105,13 @@ def setup_logging():
             },
         }
     }
+    # N API processes (uvicorn --workers / gunicorn) must not share one rotating file
+    # either: with WEB_CONCURRENCY > 1 not even the API writes it.
+    owns_file = _process_role == LOG_FILE_OWNER
+    if _process_role == "api" and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        owns_file = False
+    if not owns_file:
+        del logging_config["handlers"]["file"]
+        logging_config["root"]["handlers"].remove("file")
     logging.config.dictConfig(logging_config)
     return logging.getLogger("AgenteSegPub")
@@ -1,65 +1,143 @@
 import os
-import json
-import hashlib
-import redis
+import math
+import time
+import asyncio
 from datetime import datetime
 from contextlib import asynccontextmanager
-from typing import List
-from fastapi import FastAPI, Query
+from typing import List, Optional
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 from dotenv import load_dotenv
 
-from .models import NewsItem
-from .database import init_db, save_to_db, search_db, get_recent_news_db
+from .models import NewsItem, StatsResponse, JobStatus, AlertRuleIn, AlertRuleOut, AlertOut
+from .analyzer import analyze
+from .enrichment import canonical_tag
+from .freshness import NEGATIVE, check_freshness, record_fetch
+from .database import init_db
+from .storage import Storage, get_storage
+from .codec import cached_response, encode_news_rows
+from .cache import RedisCache
+from .leader import LeaderLease
+from .fetchers import NewsFetcher
+from .jobs import get_queue, cron_tick_key
+from .worker import start_embedded_worker
+from .admission import parse_api_keys, rejected, route_limiter
+from .events import broker as event_broker, sse_stream, start_listener as start_events_listener
+from .profiling import PROFILE_HEADER, can_profile, span, should_profile, start_trace, finish_trace, recent_profiles
+from .metrics import NEWS_LATENCY, CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics, start_flusher as start_metrics_flusher
 from .logging_config import setup_logging
 
 # Load env variables
 load_dotenv()
 
 # Setup Logger
-logger = setup_logging()
+logger = setup_logging(role="api")
 
 APP_TITLE = "Intelligence News Hub - Segurança Pública"
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-
-# Redis Global State
-redis_client = None
-REDIS_AVAILABLE = False
+CACHE_TTL_EXTERNAL = 600  # resultados de busca externa
+CACHE_TTL_RANKED = 120  # resultados fundidos do banco (ficam velhos a cada ingestão)
+# PostgreSQL: how often this node's embedding index picks up what other nodes ingested
+INDEX_SYNC_SECONDS = float(os.getenv("INDEX_SYNC_SECONDS", "60"))
 
-# Initialize DB
-# Initialize DB
+# Initialize DB (serialized across workers, see database.init_db); node-local tables live here
+# even when articles are in PostgreSQL (see backend/storage.py)
 init_db()
 
 
+def create_scheduler() -> AsyncIOScheduler:
+    """Cron ticks only enqueue; the work runs in a job worker."""
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(scheduled_fetch_job, CronTrigger(hour=11, minute=0), id="fetch_11h", replace_existing=True)
+    scheduler.add_job(scheduled_fetch_job, CronTrigger(hour=23, minute=0), id="fetch_23h", replace_existing=True)
+    # Article text for what the fetch jobs just saved
+    scheduler.add_job(scheduled_content_job, CronTrigger(hour="11,23", minute=20), id="fetch_content", replace_existing=True)
+    scheduler.add_job(scheduled_retention_job, CronTrigger(hour=3, minute=30), id="retention", replace_existing=True)
+    return scheduler
+
+
+async def keep_index_synced(storage: Storage):
+    """Background catch-up of the node-local embedding index (see PostgresStorage.sync_index)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(INDEX_SYNC_SECONDS)
+        try:
+            await loop.run_in_executor(None, storage.sync_index)
+        except Exception as e:
+            logger.warning(f"Semantic index sync failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("🚀 Starting up Intelligence News Hub...")
+    logger.info(f"🚀 Starting up Intelligence News Hub (pid {os.getpid()})...")
+    cache: RedisCache = app.state.cache
+    cache.probe()
+    background = [asyncio.create_task(cache.keep_probing())]
 
-    # Initialize Redis with Circuit Breaker
-    global redis_client, REDIS_AVAILABLE
-    try:
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-        redis_client.ping()
-        REDIS_AVAILABLE = True
-        logger.info("✅ Redis Connected")
-    except Exception as e:
-        REDIS_AVAILABLE = False
-        logger.warning(f"⚠️ Redis Connection Failed ({e}). Cache disabled.")
+    # Every worker (uvicorn --workers / gunicorn) builds the scheduler paused;
+    # only the holder of the "scheduler" lease runs it
+    scheduler = app.state.scheduler = create_scheduler()
+    scheduler.start(paused=True)
+    leader = app.state.leader = LeaderLease("scheduler")
+
+    def on_elected():
+        scheduler.resume()
+        logger.info("⏰ Scheduler running here (Jobs at 11:00 and 23:00, content at :20, retention at 03:30)")
+
+    background.append(asyncio.create_task(leader.keep(on_elected, scheduler.pause)))
+
+    storage: Storage = app.state.storage
+    if storage.name == "postgres":
+        background.append(asyncio.create_task(keep_index_synced(storage)))
+
+    # With several processes each one writes its metrics for the others' /metrics
+    metrics_stop = start_metrics_flusher()
+
+    # New articles from any process reach this process's /events subscribers via Redis
+    events_stop = start_events_listener()
 
-    # Start Scheduler
-    scheduler.add_job(scheduled_fetch_job, CronTrigger(hour=11, minute=0))
-    scheduler.add_job(scheduled_fetch_job, CronTrigger(hour=23, minute=0))
-    scheduler.start()
-    logger.info("⏰ Scheduler started (Jobs at 11:00 and 23:00)")
+    # Single-service deploys (Render free tier) have no separate worker process
+    worker_stop = None
+    if os.getenv("EMBEDDED_WORKER", "true").lower() == "true":
+        worker_stop = start_embedded_worker()
+        logger.info("👷 Embedded job worker started")
 
     yield
-    # Shutdown logic if needed (e.g., scheduler.shutdown())
+
+    if worker_stop:
+        worker_stop.set()
+    events_stop.set()
+    metrics_stop.set()
+    for task in background:
+        task.cancel()
+    # Lets the lease task step down and release, so another worker takes over at once
+    await asyncio.gather(*background, return_exceptions=True)
+    scheduler.shutdown(wait=False)
 
 
 app = FastAPI(title=APP_TITLE, lifespan=lifespan)
+# Per-process state, reached by endpoints through the dependencies below
+app.state.cache = RedisCache()
+app.state.fetcher = NewsFetcher()
+app.state.storage = get_storage()
+app.state.scheduler = None
+app.state.leader = None
 
-# --- CORS Middleware (Required for Streamlit Cloud -> Render) ---
-from fastapi.middleware.cors import CORSMiddleware
 
+def get_cache(request: Request) -> RedisCache:
+    return request.app.state.cache
+
+
+def get_fetcher(request: Request) -> NewsFetcher:
+    return request.app.state.fetcher
+
+
+def get_store(request: Request) -> Storage:
+    return request.app.state.storage
+
+# --- CORS Middleware (Required for Streamlit Cloud -> Render) ---
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Em produção, substitua pelo domínio do Streamlit App
@@ -69,13 +147,75 @@ app.add_middleware(
 )
 
 # --- Security Middleware ---
-from fastapi import Request, HTTPException, status
-from fastapi.responses import JSONResponse
-
 APP_API_KEY = os.getenv("APP_API_KEY")
-if not APP_API_KEY:
+if not APP_API_KEY and not os.getenv("APP_API_KEYS"):
     logger.warning("⚠️ ADD_API_KEY not set! using insecure default for dev.")
     APP_API_KEY = "insecure_dev_key"
+# X-API-Key -> ApiKey (nome, cota por minuto, requisições simultâneas)
+API_KEYS = parse_api_keys(os.getenv("APP_API_KEYS"), APP_API_KEY)
+
+
+# Registered before verify_api_key, so it runs inside it: only authorized requests get here
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    api_key = getattr(request.state, "api_key", None)
+    reason = should_profile(request.headers.get(PROFILE_HEADER), api_key.name if api_key else None)
+    if reason is None or request.url.path.startswith("/debug/"):
+        return await call_next(request)
+    trace = start_trace()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["X-Profile-Id"] = trace.id
+        return response
+    finally:
+        finish_trace(trace, request.method, request.url.path, request.url.query, status_code, reason)
+
+
+def _overloaded(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+# Runs inside verify_api_key: request.state.api_key is the authenticated key
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    api_key = getattr(request.state, "api_key", None)
+    limiter = route_limiter(request.url.path)
+    if api_key is None:
+        return await call_next(request)
+    route_class = limiter.route_class.name if limiter else "other"
+
+    # Per-key quota first: an over-quota client must not take a queue slot
+    wait = api_key.take()
+    if wait:
+        rejected(route_class, "quota")
+        return _overloaded(status.HTTP_429_TOO_MANY_REQUESTS, "Cota de requisições da chave excedida", wait)
+    if api_key.max_concurrent and api_key.in_flight >= api_key.max_concurrent:
+        api_key.refund()
+        rejected(route_class, "key_concurrency")
+        return _overloaded(status.HTTP_429_TOO_MANY_REQUESTS, "Requisições simultâneas da chave excedidas", 1)
+
+    # The key's slot is reserved before waiting in the route queue: requests of the
+    # same key queued together cannot all pass the check above
+    api_key.in_flight += 1
+    try:
+        if limiter and not await limiter.acquire():
+            api_key.refund()
+            rejected(route_class, "saturated")
+            return _overloaded(status.HTTP_503_SERVICE_UNAVAILABLE, "Serviço ocupado, tente novamente", limiter.retry_after())
+        started = time.perf_counter()
+        try:
+            return await call_next(request)
+        finally:
+            if limiter:
+                limiter.release(time.perf_counter() - started)
+    finally:
+        api_key.in_flight -= 1
 
 
 @app.middleware("http")
@@ -85,65 +225,265 @@ async def verify_api_key(request: Request, call_next):
         return await call_next(request)
 
     # Check Header
-    api_key_header = request.headers.get("X-API-Key")
-    if api_key_header != APP_API_KEY:
+    api_key = API_KEYS.get(request.headers.get("X-API-Key") or "")
+    if api_key is None:
         logger.warning(f"⛔ Unauthorized access attempt from {request.client.host}")
         return JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
             content={"detail": "Invalid or missing API Key"},
         )
+    request.state.api_key = api_key
 
     response = await call_next(request)
     return response
 
 
 @app.get("/")
-def health_check():
-    return {"status": "ok", "service": APP_TITLE, "redis": REDIS_AVAILABLE}
+def health_check(request: Request):
+    leader = request.app.state.leader
+    return {
+        "status": "ok",
+        "service": APP_TITLE,
+        "redis": request.app.state.cache.available,
+        "storage": request.app.state.storage.name,
+        "pid": os.getpid(),
+        "scheduler_leader": bool(leader and leader.is_leader),
+    }
 
 
 @app.get("/news", response_model=List[NewsItem])
-def get_news(q: str = Query(..., description="Termo de busca")):
-    # 1. Cache (Redis) - Circuit Breaker
-    cache_key = f"noticias:{q}"
-    if REDIS_AVAILABLE and redis_client:
-        try:
-            cached = redis_client.get(cache_key)
-            if cached:
-                logger.info(f"Returning cached results for '{q}'")
-                return [NewsItem(**item) for item in json.loads(cached)]
-        except Exception as e:
-            logger.error(f"Redis read error (Skipping): {e}")
+def get_news(
+    request: Request,
+    q: Optional[str] = Query(None, description="Termo de busca"),
+    mode: str = Query(
+        "hybrid",
+        pattern="^(hybrid|keyword|semantic)$",
+        description="hybrid (relevância + recência), keyword (texto literal) ou semantic (similaridade)",
+    ),
+    limit: int = Query(20, ge=1, le=200, description="Máximo de resultados por página"),
+    offset: int = Query(0, ge=0, le=10_000, description="Resultados a pular (paginação)"),
+    region: Optional[str] = Query(None, description="Região administrativa (ex: Ceilândia)"),
+    agency: Optional[str] = Query(None, description="Força de segurança (ex: PCDF, PMDF)"),
+    crime_type: Optional[str] = Query(None, description="Tipo de crime (ex: homicídio, roubo)"),
+    cache: RedisCache = Depends(get_cache),
+    fetcher: NewsFetcher = Depends(get_fetcher),
+    storage: Storage = Depends(get_store),
+):
+    filters = {
+        kind: canonical_tag(kind, value)
+        for kind, value in (("region", region), ("agency", agency), ("crime_type", crime_type))
+        if value
+    }
+    if not q and not filters:
+        raise HTTPException(status_code=400, detail="Informe 'q' ou ao menos um filtro (region, agency, crime_type)")
+    started = time.perf_counter()
 
-    # 2. Database (SQLite)
-    db_results = search_db(q)
+    # 1. Cache (Redis) - Circuit Breaker
+    # Keyed by the analyzed query: "Ceilândia", " ceilandia" and "CEILÂNDIA" share one entry
+    analyzed = analyze(q) if q else None
+    filter_key = ",".join(f"{k}={v}" for k, v in sorted(filters.items()))
+    cache_key = f"noticias:{mode}:{limit}:{offset}:{filter_key}:{analyzed.key if analyzed else ''}"
+    if analyzed is not None and not analyzed.terms:
+        # Punctuation only: nothing to search for
+        _NEWS_TIERS["empty"].observe(time.perf_counter() - started)
+        return cached_response(request.headers, b"[]", 0)
+    cached, ttl_left = cache.get_with_ttl(cache_key)
+    if cached:
+        # Cached value is the encoded response body: served as-is (or 304)
+        logger.info(f"Returning cached results for '{q}'")
+        _NEWS_TIERS["cache"].observe(time.perf_counter() - started)
+        return cached_response(request.headers, cached, ttl_left)
+
+    # 2. Database (SQLite or PostgreSQL / Embedding index); filters resolve through noticia_tags
+    with span(f"db:{mode if q else 'recent'}"):
+        if not q:
+            db_results = storage.recent(limit=limit, filters=filters, offset=offset)
+        elif mode == "hybrid":
+            db_results = storage.hybrid_search(q, limit=limit, filters=filters, offset=offset)
+        elif mode == "semantic":
+            db_results = storage.semantic_search(q, limit=limit, filters=filters, offset=offset)
+        else:
+            db_results = storage.search(q, filters=filters, limit=limit, offset=offset)
 
+    region = filters.get("region")
     if db_results:
         logger.info(f"Found {len(db_results)} items in DB for '{q}'")
-        return db_results
+        if q and not offset:
+            # Served from the DB either way; old results are refreshed by a background job
+            check_freshness(analyzed, region, db_results)
+        # Rows go straight to JSON: no NewsItem validation on the read path
+        with span("encode"):
+            body = encode_news_rows(db_results)
+        # Keyword results are not cached: clients revalidate them every time
+        ttl = CACHE_TTL_RANKED if mode != "keyword" else 0
+        if ttl:
+            cache.set(cache_key, body, ttl)
+        _NEWS_TIERS["db"].observe(time.perf_counter() - started)
+        return cached_response(request.headers, body, ttl)
+
+    if not q or offset:
+        # Filtros puros e páginas seguintes só consultam o arquivo local
+        _NEWS_TIERS["empty"].observe(time.perf_counter() - started)
+        return cached_response(request.headers, b"[]", 0)
+
+    if check_freshness(analyzed, region, []) == NEGATIVE:
+        # Same query just went external and nothing matched: don't ask again yet
+        _NEWS_TIERS["empty"].observe(time.perf_counter() - started)
+        return cached_response(request.headers, b"[]", 0)
 
     # 3. External Search
     logger.info(f"External search for '{q}'")
 
-    # Use shared fetcher logic to avoid duplication
-    # We append "Distrito Federal" to ensure context, similar to previous logic
-    items = fetcher.fetch_ddg(f"{q} Distrito Federal")
+    # Canonical query (+ region and "distrito federal" for context); equivalent
+    # queries running at the same time share one external call
+    with span("external:ddg"):
+        try:
+            items = fetcher.search_external(analyzed, region)
+        except Exception:
+            # Not recorded: the next request tries again instead of a negative answer
+            _NEWS_TIERS["empty"].observe(time.perf_counter() - started)
+            return cached_response(request.headers, b"[]", 0)
 
     if not items:
         logger.info(f"No results found via external search for '{q}'")
 
-    # Save to DB and Cache
+    # Save to DB and Cache; a successful search is recorded even when empty (negative caching)
     if items:
-        save_to_db(items)
-        if REDIS_AVAILABLE and redis_client:
-            try:
-                redis_client.setex(
-                    cache_key, 600, json.dumps([i.dict() for i in items], default=str)
-                )
-            except Exception as e:
-                logger.warning(f"Failed to cache in Redis: {e}")
+        with span("db:save"):
+            storage.save_items(items)
+        if filters:
+            items = storage.get_by_ids([i.id for i in items], filters)
+    record_fetch(analyzed.external_query(region), len(items))
+    body = encode_news_rows(items)
+    if items:
+        cache.set(cache_key, body, CACHE_TTL_EXTERNAL)
+
+    _NEWS_TIERS["external"].observe(time.perf_counter() - started)
+    return cached_response(request.headers, body, CACHE_TTL_EXTERNAL if items else 0)
+
+
+# Resolved once: the per-request cost is a single observe()
+_NEWS_TIERS = {tier: NEWS_LATENCY.labels(tier) for tier in ("cache", "db", "external", "empty")}
+
+
+@app.get("/events")
+async def stream_events(
+    request: Request,
+    q: Optional[str] = Query(None, description="Termos que o título/resumo deve conter"),
+    region: Optional[str] = Query(None, description="Região administrativa (ex: Ceilândia)"),
+    agency: Optional[str] = Query(None, description="Força de segurança (ex: PCDF, PMDF)"),
+    crime_type: Optional[str] = Query(None, description="Tipo de crime (ex: homicídio, roubo)"),
+):
+    """
+    Server-Sent Events: cada notícia nova que casa com os filtros chega como um
+    evento `news` (JSON do artigo + tags) segundos após a ingestão.
+    """
+    filters = {
+        kind: canonical_tag(kind, value)
+        for kind, value in (("region", region), ("agency", agency), ("crime_type", crime_type))
+        if value
+    }
+    subscription = event_broker.subscribe(q, filters)
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Limite de assinantes atingido", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        sse_stream(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/alerts/rules", response_model=AlertRuleOut, status_code=201)
+def create_alert_rule(rule: AlertRuleIn, request: Request):
+    """Busca salva: cada notícia nova com todos os termos de `q` e as tags informadas gera um alerta."""
+    from .alerts import create_rule
+
+    filters = {"region": rule.region, "agency": rule.agency, "crime_type": rule.crime_type}
+    try:
+        return create_rule(request.state.api_key.name, rule.name, rule.q, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/alerts/rules", response_model=List[AlertRuleOut])
+def list_alert_rules(request: Request):
+    from .alerts import list_rules
+
+    return list_rules(request.state.api_key.name)
+
+
+@app.delete("/alerts/rules/{rule_id}")
+def delete_alert_rule(rule_id: int, request: Request):
+    from .alerts import delete_rule
+
+    if not delete_rule(rule_id, request.state.api_key.name):
+        raise HTTPException(status_code=404, detail="Regra não encontrada")
+    return {"deleted": rule_id}
+
+
+@app.get("/alerts", response_model=List[AlertOut])
+def list_alerts(
+    request: Request,
+    rule_id: Optional[int] = Query(None, description="Só os alertas desta regra"),
+    after: int = Query(0, ge=0, description="Último id de alerta já recebido (leitura incremental)"),
+    limit: int = Query(100, ge=1, le=500),
+):
+    """Alertas das regras da chave, do mais antigo ao mais novo a partir de `after`."""
+    from .alerts import get_alerts
+
+    return get_alerts(request.state.api_key.name, rule_id=rule_id, after=after, limit=limit)
+
+
+@app.get("/stats", response_model=StatsResponse)
+def get_news_stats(
+    dimension: str = Query("total", pattern="^(total|source|region|agency|crime_type)$"),
+    days: int = Query(30, ge=1, le=366, description="Janela em dias"),
+    top: int = Query(10, ge=1, le=50, description="Quantidade de valores no histograma"),
+    storage: Storage = Depends(get_store),
+):
+    """Histogramas e tendências servidos das tabelas de rollup (sem varrer o arquivo)."""
+    return storage.stats(dimension, days=days, top=top)
+
+
+@app.get("/export")
+def export_archive(
+    dataset: str = Query("noticias", pattern="^(noticias|noticia_tags)$"),
+    after: int = Query(0, ge=0, description="Último 'seq' já recebido (exportação incremental)"),
+    since: Optional[str] = Query(None, description="publishedAt mínimo (YYYY-MM-DD)"),
+):
+    """
+    Arquivo em Arrow IPC (stream de record batches) para análises offline.
+    O cabeçalho X-Export-Watermark traz o 'seq' a usar como `after` na próxima chamada.
+    """
+    from .export import ARROW_STREAM_MEDIA_TYPE, current_watermark, stream_arrow_ipc
+
+    upto = current_watermark()
+    return StreamingResponse(
+        stream_arrow_ipc(dataset, after=after, upto=upto, since=since),
+        media_type=ARROW_STREAM_MEDIA_TYPE,
+        headers={"X-Export-Watermark": str(upto)},
+    )
+
+
+@app.get("/metrics")
+def metrics():
+    """Exposição no formato Prometheus (soma de todos os processos da API, ver backend/metrics.py)."""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/debug/profiles")
+def debug_profiles(
+    request: Request,
+    limit: int = Query(20, ge=1, le=500),
+    path: Optional[str] = Query(None, description="Filtra por rota (ex: /chat)"),
+):
+    """Últimos perfis capturados (X-Profile: 1 ou amostragem PROFILE_SAMPLE_RATE), mais novos primeiro.
 
-    return items
+    Só para as chaves de PROFILE_API_KEYS: os perfis trazem as consultas de todos os clientes.
+    """
+    if not can_profile(request.state.api_key.name):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Chave sem acesso aos perfis")
+    return recent_profiles(limit=limit, path=path)
 
 
 @app.get("/chat")
@@ -157,35 +497,53 @@ def chat_agent(q: str = Query(..., description="Pergunta para o Agente")):
     return {"response": response_text}
 
 
-# --- Scheduler Implementation ---
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-from .fetchers import NewsFetcher
+# --- Scheduled jobs (run only in the scheduler leader, see lifespan) ---
+async def scheduled_fetch_job():
+    logger.info("⏰ Cron tick: enqueueing fetch job")
+    try:
+        # Every process schedules the cron; the tick key makes the enqueue happen once
+        loop = asyncio.get_running_loop()
+        job_id = await loop.run_in_executor(
+            None, lambda: get_queue().enqueue("fetch_all", dedupe_key=cron_tick_key("fetch_all"))
+        )
+        logger.info(f"⏰ Scheduled fetch job {job_id}")
 
-scheduler = AsyncIOScheduler()
-fetcher = NewsFetcher()
+    except Exception as e:
+        logger.error(f"❌ Scheduled Job Failed: {e}")
 
 
-async def scheduled_fetch_job():
-    logger.info("⏰ Starting scheduled fetch job")
+async def scheduled_content_job():
     try:
-        import asyncio
-
-        loop = asyncio.get_event_loop()
-        items = await loop.run_in_executor(None, fetcher.fetch_all)
+        loop = asyncio.get_running_loop()
+        job_id = await loop.run_in_executor(
+            None, lambda: get_queue().enqueue("fetch_content", dedupe_key=cron_tick_key("fetch_content"))
+        )
+        logger.info(f"⏰ Scheduled content job {job_id}")
+    except Exception as e:
+        logger.error(f"❌ Scheduled content fetch failed: {e}")
 
-        if items:
-            logger.info(f"✅ Scheduled: Fetched {len(items)} items. Saving...")
-            save_to_db(items)
-        else:
-            logger.info("⚠️ Scheduled: No items found.")
 
+async def scheduled_retention_job():
+    try:
+        loop = asyncio.get_running_loop()
+        job_id = await loop.run_in_executor(
+            None, lambda: get_queue().enqueue("retention", dedupe_key=cron_tick_key("retention"))
+        )
+        logger.info(f"⏰ Scheduled retention job {job_id}")
     except Exception as e:
-        logger.error(f"❌ Scheduled Job Failed: {e}")
+        logger.error(f"❌ Scheduled retention failed: {e}")
 
 
 @app.post("/force-fetch")
-async def force_fetch_news():
-    """Trigger news fetch immediately (Verification)"""
-    await scheduled_fetch_job()
-    return {"status": "Fetch triggered", "timestamp": datetime.now()}
+def force_fetch_news():
+    """Enqueue a news fetch immediately; poll /jobs/{job_id} for the outcome"""
+    job_id = get_queue().enqueue("fetch_all")
+    return {"status": "queued", "job_id": job_id, "timestamp": datetime.now()}
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job_status(job_id: str):
+    job = get_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
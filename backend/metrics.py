@@ -0,0 +1,318 @@
+"""
+Métricas em memória no formato de exposição do Prometheus (GET /metrics).
+
+    FETCH_LATENCY = histogram("fetch_seconds", "Latência por fonte", ("source",))
+
+    @FETCH_LATENCY.labels("gdelt").timed          # decorator
+    def fetch(): ...
+
+    with LLM_LATENCY.labels("groq").time():       # context manager
+        ...
+
+O custo por observação fica abaixo de 1µs: os filhos de cada combinação de
+labels são resolvidos uma vez, a observação é um bisect + dois incrementos e não
+há lock (sob o GIL uma corrida pode, raramente, perder um incremento; aceitável
+para métricas).
+
+Vários processos da API (WEB_CONCURRENCY > 1, ou METRICS_DIR definido): cada
+um grava seus valores em METRICS_DIR/<pid>-<id>.json a cada
+METRICS_FLUSH_SECONDS (start_flusher), e o /metrics de qualquer processo soma
+todos os arquivos. Arquivos de processos que morreram (sem gravar há
+METRICS_STALE_SECONDS) são somados em dead.json, para os contadores não
+voltarem atrás. Limpe o diretório ao implantar, se quiser zerar.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, List, Sequence, Tuple
+
+from .utils import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines
+    fcntl = None
+
+# Latências de requisições HTTP/LLM: de 5 ms a 30 s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+METRICS_DIR = os.getenv("METRICS_DIR") or (os.path.join(DATA_DIR, "metrics") if WEB_CONCURRENCY > 1 else "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+METRICS_STALE_SECONDS = float(os.getenv("METRICS_STALE_SECONDS", "120"))
+
+_REGISTRY: List["_Metric"] = []
+_LABEL_SEP = "\x1f"  # label values -> one JSON key in METRICS_DIR files
+
+_now = time.perf_counter
+
+
+def _label_str(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = _now()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(_now() - self.start)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot = +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def timed(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = _now()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(_now() - start)
+        return wrapper
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        _REGISTRY.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Child for one label combination; cache it at module level on hot paths."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self, children: Dict = None) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted((self._children if children is None else children).items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def snapshot(self, children: Dict = None) -> Dict[str, object]:
+        """JSON-able values per label combination (label values joined by _LABEL_SEP)."""
+        children = self._children if children is None else children
+        return {_LABEL_SEP.join(values): self._dump(child) for values, child in list(children.items())}
+
+    def merged(self, snapshots: List[Dict[str, object]]) -> Dict:
+        """Children holding the sum of several snapshots."""
+        children: Dict = {}
+        for snap in snapshots:
+            for key, value in snap.get(self.name, {}).items():
+                values = tuple(key.split(_LABEL_SEP)) if self.labelnames else ()
+                child = children.get(values)
+                if child is None:
+                    child = children[values] = self._new_child()
+                self._add(child, value)
+        return children
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_label_str(self.labelnames, values)} {child.value}"]
+
+    def _dump(self, child):
+        return child.value
+
+    def _add(self, child, value):
+        child.value += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def _render_child(self, values, child):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), list(child.counts)):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            bucket_labels = _label_str(self.labelnames, values, 'le="%s"' % le)
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        labels = _label_str(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {child.sum}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def _dump(self, child):
+        return list(child.counts) + [child.sum]
+
+    def _add(self, child, value):
+        if len(value) != len(child.counts) + 1:
+            return  # written with other buckets (older deploy)
+        for i, count in enumerate(value[:-1]):
+            child.counts[i] += count
+        child.sum += value[-1]
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return Counter(name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return Histogram(name, documentation, labelnames, buckets)
+
+
+def render_metrics() -> str:
+    """This process's values, or the sum over every process when METRICS_DIR is set."""
+    snapshots = _collect() if METRICS_DIR else None
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render(metric.merged(snapshots) if snapshots is not None else None))
+    return "\n".join(lines) + "\n"
+
+
+# --- Several processes (METRICS_DIR) ------------------------------------------
+_process_file = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+
+
+def _write_json(path: str, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def flush():
+    """Writes this process's values to its file in METRICS_DIR."""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _write_json(os.path.join(METRICS_DIR, _process_file), {m.name: m.snapshot() for m in _REGISTRY})
+
+
+def _collect() -> List[Dict]:
+    flush()
+    dead_path = os.path.join(METRICS_DIR, "dead.json")
+    with open(dead_path + ".lock", "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)  # one process folds the dead files at a time
+        snapshots, dead = [], []
+        now = time.time()
+        for name in os.listdir(METRICS_DIR):
+            if not name.endswith(".json") or name == "dead.json":
+                continue
+            path = os.path.join(METRICS_DIR, name)
+            try:
+                stale = now - os.path.getmtime(path) > METRICS_STALE_SECONDS
+            except OSError:
+                continue
+            (dead if stale and name != _process_file else snapshots).append(path)
+        folded = _read_json(dead_path)
+        if dead:
+            # Summed into dead.json so the totals keep growing after the process is gone
+            totals = {m.name: m.snapshot(m.merged([folded] + [_read_json(p) for p in dead])) for m in _REGISTRY}
+            _write_json(dead_path, totals)
+            for path in dead:
+                os.remove(path)
+            folded = totals
+    return [folded] + [_read_json(p) for p in snapshots]
+
+
+def start_flusher() -> threading.Event:
+    """Background flush every METRICS_FLUSH_SECONDS (no-op without METRICS_DIR). Set the event to stop."""
+    stop_event = threading.Event()
+    if METRICS_DIR:
+        def loop():
+            while not stop_event.wait(METRICS_FLUSH_SECONDS):
+                try:
+                    flush()
+                except OSError:
+                    pass  # next round; a scrape flushes too
+        threading.Thread(target=loop, daemon=True, name="metrics-flush").start()
+    return stop_event
+
+
+# --- Métricas da aplicação ---------------------------------------------------
+NEWS_LATENCY = histogram(
+    "news_request_seconds", "Latência de GET /news por camada que respondeu", ("tier",)
+)
+FETCH_LATENCY = histogram("fetch_seconds", "Latência de cada coletor", ("source",))
+FETCH_ITEMS = counter("fetch_items_total", "Itens retornados por coletor", ("source",))
+FETCH_ERRORS = counter("fetch_errors_total", "Falhas por coletor", ("source",))
+LLM_LATENCY = histogram(
+    "llm_request_seconds", "Latência das chamadas aos modelos", ("provider", "call"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0),
+)
+LLM_ERRORS = counter("llm_errors_total", "Falhas nas chamadas aos modelos", ("provider",))
+NEWS_FRESHNESS = counter("news_freshness_total", "Decisões da política de frescor do /news", ("decision",))
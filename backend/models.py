@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 class NewsItem(BaseModel):
     id: str
@@ -10,3 +10,62 @@ class NewsItem(BaseModel):
     source: str
     snippet: str
     language: str = "pt"
+
+class StatsBucket(BaseModel):
+    value: str
+    count: int
+    recent: int
+    previous: int
+
+class StatsPoint(BaseModel):
+    day: str
+    value: str
+    count: int
+
+class StatsResponse(BaseModel):
+    dimension: str
+    since: str
+    totals: List[StatsBucket]
+    series: List[StatsPoint]
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int = 0
+    payload: Dict[str, Any] = {}
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    worker: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+class AlertRuleIn(BaseModel):
+    name: str
+    q: Optional[str] = None
+    region: Optional[str] = None
+    agency: Optional[str] = None
+    crime_type: Optional[str] = None
+
+class AlertRuleOut(BaseModel):
+    id: int
+    owner: str
+    name: str
+    query: Optional[str] = None
+    region: Optional[str] = None
+    agency: Optional[str] = None
+    crime_type: Optional[str] = None
+    created_at: Optional[str] = None
+
+class AlertOut(BaseModel):
+    id: int
+    rule_id: int
+    rule_name: str
+    matched_at: str
+    news_id: str
+    title: str
+    url: str
+    publishedAt: str
+    source: str
+    snippet: Optional[str] = None
@@ -0,0 +1,158 @@
+"""
+Normalização de payloads brutos (RSS / GDELT / NewsAPI) em linhas prontas
+para inserção em lote na tabela `noticias`.
+
+As funções *_to_row são usadas pelos fetchers no próprio thread; para lotes
+grandes (backfill, GDELT maxrecords=250) `normalize_payloads` envia os bytes
+crus para um ProcessPoolExecutor, fugindo do GIL no parsing.
+
+`NewsRecord` é a representação interna de um artigo (ingestão, banco, agente):
+uma tupla nomeada, sem validação. O `NewsItem` (Pydantic) fica só na borda da API.
+"""
+import os
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import feedparser
+
+# Ordem das colunas em noticias (e nos INSERTs em lote)
+NEWS_COLUMNS = ("id", "title", "url", "publishedAt", "source", "snippet", "language")
+
+NORMALIZE_WORKERS = int(os.getenv("NORMALIZE_WORKERS", "0")) or os.cpu_count() or 1
+# Abaixo disso o custo de serializar para outro processo não compensa
+POOL_MIN_PAYLOAD_BYTES = 256 * 1024
+
+
+class NewsRecord(NamedTuple):
+    """One article in NEWS_COLUMNS order; insertable as-is (executemany) and JSON-encodable by backend.codec."""
+    id: str
+    title: str
+    url: str
+    publishedAt: str  # ISO 8601, como gravado no banco
+    source: str
+    snippet: str
+    language: str = "pt"
+
+    @property
+    def published(self) -> datetime:
+        return datetime.fromisoformat(self.publishedAt)
+
+    @classmethod
+    def from_item(cls, item) -> "NewsRecord":
+        """NewsItem (API model) -> record."""
+        return cls(item.id, item.title, item.url, item.publishedAt.isoformat(), item.source, item.snippet, item.language)
+
+
+def record_factory(cursor, row: tuple) -> NewsRecord:
+    """sqlite3 row_factory for SELECT * on noticias."""
+    return NewsRecord._make(row)
+
+
+def news_id(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def rss_entry_to_row(entry, source: str = "Google News RSS") -> NewsRecord:
+    # Tenta parser data, senão usa now
+    pub_date = datetime.now()
+    try:
+        # feedparser struct_time to datetime
+        if hasattr(entry, "published_parsed"):
+            pub_date = datetime(*entry.published_parsed[:6])
+    except Exception:
+        pass
+    snippet = entry.summary if "summary" in entry else ""
+    return NewsRecord(news_id(entry.link), entry.title, entry.link, pub_date.isoformat(), source, snippet, "pt")
+
+
+def gdelt_article_to_row(art: dict) -> NewsRecord:
+    # GDELT date format e.g. "20230101T120000Z"
+    try:
+        pdate = datetime.strptime(art["seendate"], "%Y%m%dT%H%M%SZ")
+    except Exception:
+        pdate = datetime.now()
+    return NewsRecord(news_id(art["url"]), art["title"], art["url"], pdate.isoformat(), "GDELT",
+                      f"Domain: {art.get('domain', 'N/A')}", "pt")
+
+
+def newsapi_article_to_row(art: dict) -> NewsRecord:
+    try:
+        pdate = datetime.strptime(art["publishedAt"], "%Y-%m-%dT%H:%M:%SZ")
+    except Exception:
+        pdate = datetime.now()
+    return NewsRecord(news_id(art["url"]), art["title"], art["url"], pdate.isoformat(),
+                      f"NewsAPI ({art['source']['name']})", art["description"] or "", "pt")
+
+
+def parse_payload(kind: str, payload: bytes, limit: Optional[int] = None) -> List[NewsRecord]:
+    """Parses one raw response body of the given kind ("rss", "gdelt", "newsapi")."""
+    if kind == "rss":
+        entries = feedparser.parse(payload).entries
+        return [rss_entry_to_row(e) for e in entries[:limit]]
+    data = json.loads(payload or b"{}")
+    if kind == "gdelt":
+        return [gdelt_article_to_row(a) for a in data.get("articles", [])[:limit]]
+    if kind == "newsapi":
+        if data.get("status") != "ok":
+            return []
+        return [newsapi_article_to_row(a) for a in data.get("articles", [])[:limit]]
+    raise ValueError(f"Unknown payload kind '{kind}'")
+
+
+def count_entries(kind: str, payload: bytes) -> int:
+    """Entries in one raw body, without building rows (cheap next to parse_payload)."""
+    if kind == "rss":
+        return len(feedparser.parse(payload).entries)
+    data = json.loads(payload or b"{}")
+    if kind == "newsapi" and data.get("status") != "ok":
+        return 0
+    return len(data.get("articles") or [])
+
+
+def _parse_chunk(chunk: Sequence[Tuple[str, bytes]]) -> List[NewsRecord]:
+    rows = []
+    for kind, payload in chunk:
+        rows.extend(parse_payload(kind, payload))
+    return rows
+
+
+_pool = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs threads (uvicorn, scheduler) is unsafe
+        _pool = ProcessPoolExecutor(max_workers=NORMALIZE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def normalize_payloads(
+    payloads: Iterable[Tuple[str, bytes]],
+    chunk_size: int = 8,
+    use_pool: Optional[bool] = None,
+) -> List[NewsRecord]:
+    """Parses many payloads, fanning chunks out to worker processes when worth it.
+
+    Returns rows deduplicated by id, in input order.
+    """
+    payloads = list(payloads)
+    if use_pool is None:
+        use_pool = NORMALIZE_WORKERS > 1 and sum(len(p) for _, p in payloads) >= POOL_MIN_PAYLOAD_BYTES
+    chunks = [payloads[i:i + chunk_size] for i in range(0, len(payloads), chunk_size)]
+    if use_pool:
+        results = _get_pool().map(_parse_chunk, chunks)
+    else:
+        results = map(_parse_chunk, chunks)
+
+    seen, rows = set(), []
+    for chunk_rows in results:
+        for row in chunk_rows:
+            if row[0] not in seen:
+                seen.add(row[0])
+                rows.append(row)
+    return rows
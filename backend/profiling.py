@@ -0,0 +1,184 @@
+"""
+Perfil por requisição (span trace) guardado em memória.
+
+Uma requisição é perfilada quando chega com `X-Profile: 1` de uma chave listada
+em PROFILE_API_KEYS (nomes de APP_API_KEYS; padrão: a chave "default" de
+APP_API_KEY) ou por amostragem (PROFILE_SAMPLE_RATE, ex: 0.01 = 1%). Os perfis
+trazem as consultas de todos os clientes, então GET /debug/profiles também só
+atende essas chaves (403 para as demais). Os trechos marcados com `span()` viram
+uma lista de (nome, início, duração, profundidade); os últimos
+PROFILE_BUFFER_SIZE perfis ficam em GET /debug/profiles. Com vários processos
+(METRICS_DIR, ver backend/metrics.py) cada um também acrescenta os seus a
+METRICS_DIR/profiles/<pid>-<id>.jsonl e a rota lê os de todos: o perfil pedido
+com X-Profile aparece seja qual for o processo que atender a consulta.
+
+O trace vive numa ContextVar, então acompanha a requisição para dentro do
+threadpool das rotas síncronas. Sem trace ativo, `span()` custa um
+ContextVar.get() e devolve um objeto nulo compartilhado.
+"""
+import os
+import json
+import time
+import uuid
+import random
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .metrics import METRICS_DIR
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "100"))
+# Key names (backend/admission.py) that may ask for profiles and read them
+PROFILE_API_KEYS = {k.strip() for k in os.getenv("PROFILE_API_KEYS", "default").split(",") if k.strip()}
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("profile_trace", default=None)
+_profiles: deque = deque(maxlen=PROFILE_BUFFER_SIZE)
+PROFILES_DIR = os.path.join(METRICS_DIR, "profiles") if METRICS_DIR else ""
+# Files of processes gone for this long are removed when read
+PROFILE_FILE_MAX_AGE_SECONDS = 86400
+_profile_file = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+_shared_appends = 0
+
+
+class Trace:
+    __slots__ = ("id", "started", "depth", "spans", "token")
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.depth = 0
+        self.spans: List[Dict] = []
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start", "record")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace, self.name = trace, name
+
+    def __enter__(self):
+        trace = self.trace
+        self.start = time.perf_counter()
+        # Appended on entry so the list stays in call order (parents before children)
+        self.record = {"name": self.name, "start_ms": round((self.start - trace.started) * 1000, 3), "depth": trace.depth}
+        trace.spans.append(self.record)
+        trace.depth += 1
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.trace.depth -= 1
+        self.record["duration_ms"] = round((time.perf_counter() - self.start) * 1000, 3)
+        if exc_type is not None:
+            self.record["error"] = exc_type.__name__
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """Marks a block in the current request's trace (no-op when not profiling)."""
+    trace = _current.get()
+    return _NULL_SPAN if trace is None else _Span(trace, name)
+
+
+def can_profile(key_name: Optional[str]) -> bool:
+    return key_name in PROFILE_API_KEYS
+
+
+def should_profile(header_value: Optional[str], key_name: Optional[str] = None) -> Optional[str]:
+    """Why this request is profiled ("header" / "sampled"), or None. The header counts only for PROFILE_API_KEYS."""
+    if header_value and header_value.lower() in ("1", "true", "yes") and can_profile(key_name):
+        return "header"
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+def start_trace() -> Trace:
+    trace = Trace()
+    trace.token = _current.set(trace)
+    return trace
+
+
+def finish_trace(trace: Trace, method: str, path: str, query: str, status: int, reason: str) -> Dict:
+    _current.reset(trace.token)
+    total_ms = (time.perf_counter() - trace.started) * 1000
+    top_level_ms = sum(s.get("duration_ms", 0) for s in trace.spans if s["depth"] == 0)
+    profile = {
+        "id": trace.id,
+        "timestamp": datetime.now().isoformat(),
+        "method": method,
+        "path": path,
+        "query": query,
+        "status": status,
+        "reason": reason,
+        "duration_ms": round(total_ms, 3),
+        # Time outside any span: framework, middleware, response validation/serialization
+        "unaccounted_ms": round(max(total_ms - top_level_ms, 0), 3),
+        "spans": trace.spans,
+    }
+    _profiles.append(profile)
+    if PROFILES_DIR:
+        _share(profile)
+    return profile
+
+
+def _share(profile: Dict):
+    """Appends to this process's file; rewritten from the ring buffer once it holds twice as many."""
+    global _shared_appends
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    path = os.path.join(PROFILES_DIR, _profile_file)
+    _shared_appends += 1
+    if _shared_appends >= 2 * PROFILE_BUFFER_SIZE:
+        _shared_appends = len(_profiles)
+        with open(path + ".tmp", "w") as f:
+            f.writelines(json.dumps(p) + "\n" for p in list(_profiles))
+        os.replace(path + ".tmp", path)
+    else:
+        with open(path, "a") as f:
+            f.write(json.dumps(profile) + "\n")
+
+
+def _shared_profiles() -> List[Dict]:
+    profiles = []
+    now = time.time()
+    for name in os.listdir(PROFILES_DIR) if os.path.isdir(PROFILES_DIR) else []:
+        if not name.endswith(".jsonl"):
+            continue
+        path = os.path.join(PROFILES_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > PROFILE_FILE_MAX_AGE_SECONDS:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                lines = f.readlines()
+        except OSError:
+            continue
+        for line in lines[-PROFILE_BUFFER_SIZE:]:
+            try:
+                profiles.append(json.loads(line))
+            except ValueError:
+                pass  # line being written
+    profiles.sort(key=lambda p: p["timestamp"])
+    return profiles
+
+
+def recent_profiles(limit: int = 20, path: Optional[str] = None) -> List[Dict]:
+    """Newest first (from every process when PROFILES_DIR is set)."""
+    source = _shared_profiles() if PROFILES_DIR else _profiles
+    profiles = [p for p in reversed(source) if path is None or p["path"] == path]
+    return profiles[:limit]
@@ -0,0 +1,192 @@
+"""
+Retenção e compactação do arquivo.
+
+Uso:
+    python -m backend.retention                       # política padrão (variáveis de ambiente)
+    python -m backend.retention --hot-months 6 --log-days 7 --job-days 3
+
+- `logs`: linhas mais antigas que LOG_RETENTION_DAYS são apagadas.
+- `jobs` (fila SQLite): jobs concluídos ou falhos há mais de JOB_RETENTION_DAYS
+  são apagados (no Redis os hashes expiram sozinhos).
+- `noticias`: artigos publicados há mais de HOT_RETENTION_MONTHS meses vão para
+  o banco frio (COLD_DB_PATH), anexado às leituras pela view `noticias_all`.
+  Rollups, o índice de busca por palavra (noticia_search), a sequência de
+  exportação (noticia_seq) e o índice vetorial não mudam: continuam cobrindo
+  todo o histórico, e a exportação lê os dois tiers.
+- Os dois bancos usam auto_vacuum=INCREMENTAL; as páginas liberadas voltam ao
+  sistema de arquivos com `PRAGMA incremental_vacuum` a cada execução.
+
+Com PostgreSQL (DATABASE_URL) a poda de logs e jobs roda lá (Storage.purge_before)
+e não há tier frio: os artigos ficam na tabela compartilhada.
+
+Também roda diariamente como job "retention" na fila (ver main.py / worker.py).
+"""
+import os
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict
+
+from .database import get_connection, get_archive_connection, cold_db_path, init_db, _create_news_tables
+from .storage import get_storage
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+HOT_RETENTION_MONTHS = int(os.getenv("HOT_RETENTION_MONTHS", "12"))
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+# Rows per transaction: keeps the write lock short so ingest is not stalled
+RETENTION_BATCH_ROWS = 5000
+
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+# Batched DELETE per table (cutoff, batch size): keeps each write lock short
+_PRUNE_SQL = {
+    "logs": """
+        DELETE FROM logs WHERE id IN (
+            SELECT id FROM logs WHERE timestamp < ? ORDER BY timestamp LIMIT ?
+        )
+    """,
+    # Queued and running jobs stay whatever their age
+    "jobs": """
+        DELETE FROM jobs WHERE id IN (
+            SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ? LIMIT ?
+        )
+    """,
+}
+
+
+def _cutoff(days: int) -> str:
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+
+def prune_before(table: str, cutoff: str, batch_rows: int = RETENTION_BATCH_ROWS) -> int:
+    """Deletes rows of `table` ("logs" or finished "jobs") older than the ISO cutoff."""
+    conn = get_connection()
+    deleted = 0
+    while True:
+        cursor = conn.execute(_PRUNE_SQL[table], (cutoff, batch_rows))
+        conn.commit()
+        deleted += cursor.rowcount
+        if cursor.rowcount < batch_rows:
+            break
+    conn.close()
+    return deleted
+
+
+def prune_logs(days: int = LOG_RETENTION_DAYS, batch_rows: int = RETENTION_BATCH_ROWS) -> int:
+    return prune_before("logs", _cutoff(days), batch_rows)
+
+
+def prune_jobs(days: int = JOB_RETENTION_DAYS, batch_rows: int = RETENTION_BATCH_ROWS) -> int:
+    """Deletes finished jobs; queued and running ones stay whatever their age."""
+    return prune_before("jobs", _cutoff(days), batch_rows)
+
+
+def init_cold_db():
+    """Creates the cold tier file (incremental auto_vacuum must be set before any table)."""
+    conn = sqlite3.connect(cold_db_path())
+    conn.execute(f"PRAGMA auto_vacuum = {_AUTO_VACUUM_INCREMENTAL}")
+    _create_news_tables(conn.cursor())
+    conn.commit()
+    conn.close()
+
+
+def move_to_cold(months: int = HOT_RETENTION_MONTHS, batch_rows: int = RETENTION_BATCH_ROWS) -> int:
+    """Moves articles published before the cutoff (and their tags) to the cold tier."""
+    cutoff = (datetime.now() - timedelta(days=30 * months)).isoformat()
+    init_cold_db()
+    conn = get_archive_connection()
+    conn.isolation_level = None
+    moved = 0
+    try:
+        while True:
+            # One transaction over both files: a row is never in neither (or both) tiers
+            conn.execute("BEGIN IMMEDIATE")
+            ids = [r[0] for r in conn.execute(
+                "SELECT id FROM main.noticias WHERE publishedAt < ? ORDER BY publishedAt LIMIT ?",
+                (cutoff, batch_rows),
+            )]
+            if not ids:
+                conn.execute("COMMIT")
+                break
+            placeholders = ",".join("?" * len(ids))
+            conn.execute(f"""
+                INSERT OR IGNORE INTO cold.noticias (id, title, url, publishedAt, source, snippet, language)
+                SELECT id, title, url, publishedAt, source, snippet, language FROM main.noticias WHERE id IN ({placeholders})
+            """, ids)
+            conn.execute(f"""
+                INSERT OR IGNORE INTO cold.noticia_tags (news_id, kind, tag)
+                SELECT news_id, kind, tag FROM main.noticia_tags WHERE news_id IN ({placeholders})
+            """, ids)
+            conn.execute(f"DELETE FROM main.noticia_tags WHERE news_id IN ({placeholders})", ids)
+            conn.execute(f"DELETE FROM main.noticias WHERE id IN ({placeholders})", ids)
+            conn.execute("COMMIT")
+            moved += len(ids)
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return moved
+
+
+def incremental_vacuum(path: str) -> int:
+    """Returns free pages to the OS; converts the file to incremental auto_vacuum once."""
+    conn = sqlite3.connect(path)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != _AUTO_VACUUM_INCREMENTAL:
+            # Switching modes needs one full VACUUM (rewrites the file, one-time cost)
+            logger.info(f"🧹 Converting {path} to incremental auto_vacuum (full VACUUM)")
+            conn.execute(f"PRAGMA auto_vacuum = {_AUTO_VACUUM_INCREMENTAL}")
+            before = conn.execute("PRAGMA page_count").fetchone()[0]
+            conn.execute("VACUUM")
+            return before - conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free:
+            conn.execute("PRAGMA incremental_vacuum")
+        return free
+    finally:
+        conn.close()
+
+
+def _size_mb(path: str) -> float:
+    return round(os.path.getsize(path) / 1e6, 2) if os.path.exists(path) else 0.0
+
+
+def run_retention(hot_months: int = HOT_RETENTION_MONTHS, log_days: int = LOG_RETENTION_DAYS,
+                  job_days: int = JOB_RETENTION_DAYS) -> Dict:
+    from .database import DB_PATH
+
+    storage = get_storage()
+    summary = storage.purge_before(_cutoff(log_days), _cutoff(job_days))
+    if storage.name != "sqlite":
+        # No cold tier there: articles stay in the shared table, whose space autovacuum reclaims
+        logger.info(f"🧹 Retention ({storage.name}): {summary}")
+        return summary
+    summary["moved_to_cold"] = move_to_cold(hot_months)
+    summary["freed_pages"] = incremental_vacuum(DB_PATH)
+    if os.path.exists(cold_db_path()):
+        summary["freed_pages"] += incremental_vacuum(cold_db_path())
+    summary["hot_mb"] = _size_mb(DB_PATH)
+    summary["cold_mb"] = _size_mb(cold_db_path())
+    logger.info(f"🧹 Retention: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retenção do arquivo: poda de logs, tier frio e VACUUM incremental")
+    parser.add_argument("--hot-months", type=int, default=HOT_RETENTION_MONTHS, help="Meses mantidos no banco quente")
+    parser.add_argument("--log-days", type=int, default=LOG_RETENTION_DAYS, help="Dias de logs mantidos na tabela logs")
+    parser.add_argument("--job-days", type=int, default=JOB_RETENTION_DAYS, help="Dias de jobs concluídos mantidos na tabela jobs")
+    args = parser.parse_args()
+
+    init_db()
+    run_retention(hot_months=args.hot_months, log_days=args.log_days, job_days=args.job_days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+import os
+import re
+import zlib
+import threading
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .logging_config import setup_logging
+from .analyzer import CONCEPTS, STOPWORDS, TOKEN_RE
+from .utils import DATA_DIR, fold
+
+logger = setup_logging()
+
+# Vectors live next to the SQLite DB: one float16 matrix + one fixed-width id file,
+# both append-only and memory-mapped on read.
+EMBEDDINGS_DIR = os.path.abspath(os.getenv("EMBEDDINGS_DIR", os.path.join(DATA_DIR, "embeddings")))
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "256"))
+SEMANTIC_MIN_SCORE = float(os.getenv("SEMANTIC_MIN_SCORE", "0.2"))
+
+ID_WIDTH = 64  # sha256 hexdigest
+SEARCH_CHUNK_ROWS = 65536
+# Below IVF_MIN_ROWS a brute-force scan is already a few ms; above it we probe
+# IVF_NPROBE inverted lists and brute-force only rows added after training.
+IVF_MIN_ROWS = int(os.getenv("IVF_MIN_ROWS", "50000"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+IVF_RETRAIN_RATIO = 0.2
+
+def _build_concept_index():
+    single, multi = {}, []
+    for concept, terms in CONCEPTS.items():
+        for term in terms:
+            if " " in term:
+                multi.append((term, concept))
+            else:
+                single[term] = concept
+    return single, multi
+
+
+_CONCEPT_WORDS, _CONCEPT_PHRASES = _build_concept_index()
+
+
+class HashingEncoder:
+    """CPU-only sentence embedding via feature hashing.
+
+    Words, character trigrams and concept ids are hashed into a fixed number of
+    signed buckets and L2-normalised, so cosine similarity is a dot product.
+    It has no model download and no state, which keeps ingest deterministic.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> Iterable[Tuple[str, float]]:
+        folded = fold(text)
+        for phrase, concept in _CONCEPT_PHRASES:
+            if phrase in folded:
+                yield "c:" + concept, 2.0
+        for token in TOKEN_RE.findall(folded):
+            if token in STOPWORDS or len(token) < 2:
+                continue
+            yield "w:" + token, 1.0
+            concept = _CONCEPT_WORDS.get(token)
+            if concept:
+                yield "c:" + concept, 2.0
+            padded = f" {token} "
+            for i in range(len(padded) - 2):
+                yield "g:" + padded[i:i + 3], 0.25
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vec = out[row]
+            for feature, weight in self._features(text or ""):
+                h = zlib.crc32(feature.encode())
+                vec[h % self.dim] += weight if h & 0x80000000 else -weight
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+class SentenceTransformerEncoder:
+    """Optional encoder backed by sentence-transformers (set EMBEDDING_MODEL)."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = "st-" + re.sub(r"[^a-zA-Z0-9]+", "-", model_name).strip("-")
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return self.model.encode(list(texts), normalize_embeddings=True).astype(np.float32)
+
+
+def get_encoder():
+    model_name = os.getenv("EMBEDDING_MODEL")
+    if model_name:
+        try:
+            return SentenceTransformerEncoder(model_name)
+        except Exception as e:
+            logger.warning(f"EMBEDDING_MODEL '{model_name}' unavailable ({e}). Using hashing encoder.")
+    return HashingEncoder()
+
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines
+    fcntl = None
+
+
+class SemanticIndex:
+    """Append-only float16 vector store with brute-force / IVF top-k search."""
+
+    def __init__(self, directory: str = EMBEDDINGS_DIR, encoder=None):
+        self.directory = directory
+        self.encoder = encoder or get_encoder()
+        # One set of files per encoder: changing it starts a new index
+        self.prefix = os.path.join(directory, f"{self.encoder.name}-{self.encoder.dim}")
+        self.vectors_path = self.prefix + ".f16"
+        self.ids_path = self.prefix + ".ids"
+        self.ivf_prefix = self.prefix + ".ivf"
+        self._lock = threading.Lock()
+        self._mapped = None  # (rows, vectors memmap, ids memmap)
+        self._ivf = None  # (trained_rows, centroids, order, offsets)
+        self._ivf_mtime = None
+
+    def __len__(self) -> int:
+        return self._row_count()
+
+    def _row_count(self) -> int:
+        try:
+            vec_rows = os.path.getsize(self.vectors_path) // (self.encoder.dim * 2)
+            id_rows = os.path.getsize(self.ids_path) // ID_WIDTH
+        except OSError:
+            return 0
+        # A writer may be between the two appends; only expose complete rows.
+        return min(vec_rows, id_rows)
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]) -> int:
+        """Encode and append vectors for newly ingested articles."""
+        if not ids:
+            return 0
+        vectors = self.encoder.encode(texts).astype(np.float16)
+        packed_ids = np.array([i.encode()[:ID_WIDTH] for i in ids], dtype=f"S{ID_WIDTH}")
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(self.ids_path, "ab") as id_file, open(self.vectors_path, "ab") as vec_file:
+            if fcntl:
+                fcntl.flock(id_file, fcntl.LOCK_EX)
+            try:
+                self._truncate_partial(vec_file, id_file)
+                vec_file.write(vectors.tobytes())
+                vec_file.flush()
+                id_file.write(packed_ids.tobytes())
+            finally:
+                if fcntl:
+                    fcntl.flock(id_file, fcntl.LOCK_UN)
+        return len(ids)
+
+    def _truncate_partial(self, vec_file, id_file):
+        """Under the flock: cuts both files back to their common complete rows.
+
+        A writer killed between (or during) the two appends leaves one file
+        ahead; appending after that would pair vectors with the wrong ids.
+        """
+        vec_size, id_size = os.fstat(vec_file.fileno()).st_size, os.fstat(id_file.fileno()).st_size
+        rows = min(vec_size // (self.encoder.dim * 2), id_size // ID_WIDTH)
+        if vec_size != rows * self.encoder.dim * 2 or id_size != rows * ID_WIDTH:
+            logger.warning(f"Semantic index: dropping a partial write ({vec_size} / {id_size} bytes -> {rows} rows)")
+            vec_file.truncate(rows * self.encoder.dim * 2)
+            id_file.truncate(rows * ID_WIDTH)
+
+    def _open(self):
+        rows = self._row_count()
+        if rows == 0:
+            return 0, None, None
+        mapped = self._mapped
+        if mapped is None or mapped[0] != rows:
+            vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(rows, self.encoder.dim))
+            ids = np.memmap(self.ids_path, dtype=f"S{ID_WIDTH}", mode="r", shape=(rows,))
+            mapped = self._mapped = (rows, vectors, ids)
+        return mapped
+
+    def ids_from(self, start: int) -> List[str]:
+        """Ids of rows [start, end)."""
+        rows, _, ids = self._open()
+        return [i.decode() for i in ids[start:rows]] if rows > start else []
+
+    def _scan(self, vectors, q: np.ndarray, start: int, stop: int, k: int):
+        """Brute-force top-k over rows [start, stop), chunked to bound float32 copies."""
+        cand_rows, cand_scores = [], []
+        for lo in range(start, stop, SEARCH_CHUNK_ROWS):
+            scores = np.asarray(vectors[lo:min(lo + SEARCH_CHUNK_ROWS, stop)], dtype=np.float32) @ q
+            top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+            cand_rows.append(top + lo)
+            cand_scores.append(scores[top])
+        return cand_rows, cand_scores
+
+    def _probe(self, vectors, q: np.ndarray, k: int, nprobe: int):
+        """Scores only the rows of the nprobe inverted lists closest to q."""
+        trained_rows, centroids, order, offsets = self._ivf
+        lists = np.argpartition(centroids @ q, -nprobe)[-nprobe:] if len(centroids) > nprobe else np.arange(len(centroids))
+        rows = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in lists])
+        rows.sort()  # sequential-ish access on the memmap
+        scores = np.asarray(vectors[rows], dtype=np.float32) @ q
+        top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+        return [rows[top]], [scores[top]], trained_rows
+
+    def search(self, query: str, k: int = 20, min_score: float = SEMANTIC_MIN_SCORE,
+               nprobe: int = IVF_NPROBE) -> List[Tuple[str, float]]:
+        """Return up to k (news_id, cosine score) pairs, best first."""
+        rows, vectors, ids = self._open()
+        if not rows:
+            return []
+        q = self.encoder.encode([query])[0]
+        ivf = self._load_ivf()
+        if ivf is not None and ivf[0] <= rows:
+            cand_rows, cand_scores, scanned = self._probe(vectors, q, k, nprobe)
+        else:
+            cand_rows, cand_scores, scanned = [], [], 0
+        tail_rows, tail_scores = self._scan(vectors, q, scanned, rows, k)
+        all_rows = np.concatenate(cand_rows + tail_rows)
+        all_scores = np.concatenate(cand_scores + tail_scores)
+        order = np.argsort(-all_scores)[:k]
+        results = []
+        for i in order:
+            score = float(all_scores[i])
+            if score < min_score:
+                break
+            results.append((ids[all_rows[i]].decode(), score))
+        return results
+
+    def _load_ivf(self):
+        try:
+            mtime = os.path.getmtime(self.ivf_prefix + ".offsets.npy")
+        except OSError:
+            self._ivf = None
+            return None
+        if self._ivf is None or mtime != self._ivf_mtime:
+            self._ivf, self._ivf_mtime = None, mtime
+            try:
+                centroids = np.load(self.ivf_prefix + ".centroids.npy")
+                order = np.load(self.ivf_prefix + ".order.npy", mmap_mode="r")
+                offsets = np.load(self.ivf_prefix + ".offsets.npy")
+                self._ivf = (len(order), centroids, order, offsets)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable IVF index: {e}")
+        return self._ivf
+
+    def build_ivf(self, nlist: int = None, iterations: int = 8, sample_size: int = 50000) -> int:
+        """Trains spherical k-means centroids and writes the inverted lists."""
+        rows, vectors, _ = self._open()
+        if rows == 0:
+            return 0
+        nlist = nlist or max(1, int(np.sqrt(rows)))
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(rows, min(sample_size, rows), replace=False))
+        data = np.asarray(vectors[sample], dtype=np.float32)
+        centroids = data[rng.choice(len(data), min(nlist, len(data)), replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            filled = np.bincount(assign, minlength=len(centroids)) > 0
+            centroids[filled] = sums[filled]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        assignments = np.empty(rows, dtype=np.int32)
+        for lo in range(0, rows, SEARCH_CHUNK_ROWS):
+            chunk = np.asarray(vectors[lo:lo + SEARCH_CHUNK_ROWS], dtype=np.float32)
+            assignments[lo:lo + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+
+        # offsets is written last: its presence marks a complete index.
+        offsets_path = self.ivf_prefix + ".offsets.npy"
+        if os.path.exists(offsets_path):
+            os.remove(offsets_path)
+        np.save(self.ivf_prefix + ".centroids.npy", centroids)
+        np.save(self.ivf_prefix + ".order.npy", order)
+        np.save(offsets_path, offsets)
+        self._ivf = None
+        logger.info(f"IVF index built: {rows} rows in {len(centroids)} lists.")
+        return rows
+
+    def maybe_build_ivf(self) -> bool:
+        """(Re)trains the IVF index once the untrained tail is large enough to matter."""
+        rows = self._row_count()
+        if rows < IVF_MIN_ROWS:
+            return False
+        ivf = self._load_ivf()
+        trained = ivf[0] if ivf else 0
+        if trained and rows - trained < trained * IVF_RETRAIN_RATIO:
+            return False
+        self.build_ivf()
+        return True
+
+    def rebuild(self, rows: Iterable[Tuple[str, str]], batch_size: int = 1024) -> int:
+        """Re-encode the whole archive from (id, text) pairs, replacing the files."""
+        for path in (self.vectors_path, self.ids_path, self.ivf_prefix + ".offsets.npy"):
+            if os.path.exists(path):
+                os.remove(path)
+        self._mapped = None
+        self._ivf = None
+        total = 0
+        batch_ids, batch_texts = [], []
+        for news_id, text in rows:
+            batch_ids.append(news_id)
+            batch_texts.append(text)
+            if len(batch_ids) >= batch_size:
+                total += self.add(batch_ids, batch_texts)
+                batch_ids, batch_texts = [], []
+        total += self.add(batch_ids, batch_texts)
+        return total
+
+
+def embedding_text(title: str, snippet: str) -> str:
+    return f"{title}. {snippet or ''}"
+
+
+_index = None
+
+
+def get_index() -> SemanticIndex:
+    global _index
+    if _index is None:
+        _index = SemanticIndex()
+    return _index
+
+
+if __name__ == "__main__":
+    # python -m backend.semantic  -> (re)treina o índice IVF do arquivo atual
+    get_index().build_ivf()
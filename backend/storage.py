@@ -0,0 +1,275 @@
+"""
+Interface de armazenamento dos artigos e escolha do backend.
+
+Uso:
+    storage = get_storage()       # DATABASE_URL=postgresql://... -> PostgreSQL; vazio -> SQLite (DB_PATH)
+    storage.save_items(items)
+    storage.hybrid_search("roubo", filters={"region": "Gama"}, limit=20)
+
+O backend cobre o que escala com o tráfego: ingestão, buscas (keyword, semântica,
+híbrida), listagens recentes, estatísticas (rollups) e logs. Cobre também o
+estado em que todos os nós precisam concordar: leases (um agendador só),
+regras de alerta e alertas, e o catálogo de consultas da ingestão; com
+PostgreSQL a fila de jobs também vai para ele quando não há Redis (backend/jobs.py).
+O SQLite (backend/database.py) continua sendo o default de um nó só; o
+PostgreSQL (backend/pg_storage.py, asyncpg) permite vários nós da API sobre o
+mesmo arquivo.
+
+Fica no SQLite local de cada nó só o que é cache ou derivado: buscas sob
+demanda (query_fetches), texto completo (noticia_content/FTS). O índice de
+embeddings também é local (EMBEDDINGS_DIR): com PostgreSQL cada nó o alcança
+lendo os artigos ingeridos por qualquer nó (sync_index). Os jobs que varrem o
+arquivo (fetch_content, exportação, retenção) também passam pelo backend:
+pending_articles, export_page e purge_before.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Union
+
+from . import database
+from .models import NewsItem
+from .normalize import NewsRecord
+from .logging_config import setup_logging
+
+logger = setup_logging()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+
+class Storage(ABC):
+    """Articles: ingest, search, recent listings, stats and logs."""
+
+    name = ""
+
+    @abstractmethod
+    def save_rows(self, rows: List[NewsRecord]) -> int:
+        """Inserts rows whose id is new (tags, rollups, after_save). Returns how many were new."""
+
+    def save_items(self, items: List[Union[NewsRecord, NewsItem]]) -> int:
+        return self.save_rows(database.to_records(items))
+
+    @abstractmethod
+    def existing_ids(self, ids: List[str]) -> set:
+        ...
+
+    @abstractmethod
+    def search(
+        self, q: str, filters: Optional[Dict[str, str]] = None, limit: Optional[int] = None, offset: int = 0
+    ) -> List[NewsRecord]:
+        """Keyword search, newest first."""
+
+    @abstractmethod
+    def recent(self, limit: int = 50, filters: Optional[Dict[str, str]] = None, offset: int = 0) -> List[NewsRecord]:
+        ...
+
+    @abstractmethod
+    def get_by_ids(self, ids: List[str], filters: Optional[Dict[str, str]] = None) -> List[NewsRecord]:
+        """Articles by id, in the order of `ids`."""
+
+    @abstractmethod
+    def semantic_search(
+        self, q: str, limit: int = 20, filters: Optional[Dict[str, str]] = None, offset: int = 0
+    ) -> List[NewsRecord]:
+        ...
+
+    @abstractmethod
+    def hybrid_search(
+        self, q: str, limit: int = 20, candidates: int = database.RANK_CANDIDATES,
+        filters: Optional[Dict[str, str]] = None, offset: int = 0,
+    ) -> List[NewsRecord]:
+        ...
+
+    @abstractmethod
+    def stats(self, dimension: str, days: int = 30, top: int = 10) -> Dict:
+        ...
+
+    @abstractmethod
+    def insert_log(self, level: str, message: str):
+        """Never raises: called from the logging handler."""
+
+    def sync_index(self) -> int:
+        """Brings this node's embedding index up to date. Returns how many articles were added."""
+        return 0
+
+    # --- Archive jobs (backend/content.py, backend/export.py, backend/retention.py) -----
+    @abstractmethod
+    def pending_articles(self, limit: int, now: str) -> List[Tuple[str, str]]:
+        """Newest (id, url) whose content this node has not fetched, or whose retry is due."""
+
+    @abstractmethod
+    def export_watermark(self) -> int:
+        """Highest ingest seq that a consistent export may cover."""
+
+    @abstractmethod
+    def export_page(self, dataset: str, after: int, upto: int, since: Optional[str],
+                    limit: int) -> Tuple[Optional[int], List[tuple]]:
+        """Rows (backend/export.py column order) of the next `limit` articles with after < seq <= upto,
+        and the last seq covered; (None, []) when there are no more."""
+
+    @abstractmethod
+    def purge_before(self, logs_before: str, jobs_before: str) -> Dict[str, int]:
+        """Deletes log lines and finished jobs older than the cutoffs. Articles are kept."""
+
+    # --- Coordination (backend/leader.py, backend/alerts.py, backend/catalog.py) --------
+    @abstractmethod
+    def acquire_lease(self, name: str, holder: str, ttl: float, now: float) -> bool:
+        """Takes the lease if free/expired, renews it if `holder` has it."""
+
+    @abstractmethod
+    def release_lease(self, name: str, holder: str):
+        ...
+
+    @abstractmethod
+    def create_alert_rule(self, owner: str, name: str, q: Optional[str], filters: Dict[str, str]) -> Dict:
+        ...
+
+    @abstractmethod
+    def list_alert_rules(self, owner: Optional[str] = None) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def delete_alert_rule(self, rule_id: int, owner: Optional[str] = None) -> bool:
+        ...
+
+    @abstractmethod
+    def insert_alerts(self, matches: List[Tuple[int, str, str]]):
+        """(rule_id, news_id, matched_at) rows; duplicates are ignored."""
+
+    @abstractmethod
+    def alerts_page(self, owner: Optional[str], rule_id: Optional[int], after: int, limit: int) -> List[Dict]:
+        """Alerts with id > `after`, oldest first."""
+
+    @abstractmethod
+    def sync_catalog(self, entries: List[Dict], interval_minutes: int, now: str):
+        ...
+
+    @abstractmethod
+    def due_catalog_entries(self, budget: int, now: str) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def update_catalog_entries(self, updates: List[tuple]):
+        ...
+
+    @abstractmethod
+    def catalog_stats(self) -> List[Dict]:
+        ...
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage(Storage):
+    """backend/database.py. Functions are looked up per call: DB_PATH may change (tests, CLIs)."""
+
+    name = "sqlite"
+
+    def save_rows(self, rows: List[NewsRecord]) -> int:
+        return database.save_rows(rows)
+
+    def existing_ids(self, ids: List[str]) -> set:
+        return database.existing_ids(ids)
+
+    def search(self, q, filters=None, limit=None, offset=0):
+        return database.search_db(q, filters=filters, limit=limit, offset=offset)
+
+    def recent(self, limit=50, filters=None, offset=0):
+        return database.get_recent_news_db(limit=limit, filters=filters, offset=offset)
+
+    def get_by_ids(self, ids, filters=None):
+        return database.get_news_by_ids(ids, filters)
+
+    def semantic_search(self, q, limit=20, filters=None, offset=0):
+        return database.semantic_search_db(q, limit=limit, filters=filters, offset=offset)
+
+    def hybrid_search(self, q, limit=20, candidates=database.RANK_CANDIDATES, filters=None, offset=0):
+        return database.hybrid_search_db(q, limit=limit, candidates=candidates, filters=filters, offset=offset)
+
+    def stats(self, dimension, days=30, top=10):
+        return database.get_stats(dimension, days=days, top=top)
+
+    def insert_log(self, level, message):
+        database.insert_log(level, message)
+
+    def pending_articles(self, limit, now):
+        return database.pending_content(limit, now)
+
+    def export_watermark(self):
+        return database.export_watermark()
+
+    def export_page(self, dataset, after, upto, since, limit):
+        return database.export_page(dataset, after, upto, since, limit)
+
+    def purge_before(self, logs_before, jobs_before):
+        from .retention import prune_before
+
+        return {"logs_pruned": prune_before("logs", logs_before), "jobs_pruned": prune_before("jobs", jobs_before)}
+
+    def acquire_lease(self, name, holder, ttl, now):
+        return database.acquire_lease(name, holder, ttl, now)
+
+    def release_lease(self, name, holder):
+        database.release_lease(name, holder)
+
+    def create_alert_rule(self, owner, name, q, filters):
+        return database.create_alert_rule(owner, name, q, filters)
+
+    def list_alert_rules(self, owner=None):
+        return database.list_alert_rules(owner)
+
+    def delete_alert_rule(self, rule_id, owner=None):
+        return database.delete_alert_rule(rule_id, owner)
+
+    def insert_alerts(self, matches):
+        database.insert_alerts(matches)
+
+    def alerts_page(self, owner, rule_id, after, limit):
+        return database.get_alerts_page(owner, rule_id, after, limit)
+
+    def sync_catalog(self, entries, interval_minutes, now):
+        database.sync_catalog_entries(entries, interval_minutes, now)
+
+    def due_catalog_entries(self, budget, now):
+        return database.due_catalog_entries(budget, now)
+
+    def update_catalog_entries(self, updates):
+        database.update_catalog_entries(updates)
+
+    def catalog_stats(self):
+        return database.get_catalog_stats()
+
+
+def create_storage(url: Optional[str] = None) -> Storage:
+    url = DATABASE_URL if url is None else url
+    if not url:
+        return SQLiteStorage()
+    if url.startswith(("postgres://", "postgresql://")):
+        from .pg_storage import PostgresStorage
+
+        return PostgresStorage(url)
+    raise ValueError(f"DATABASE_URL: esquema não suportado ({url.split(':', 1)[0]})")
+
+
+_storage: Optional[Storage] = None
+_storage_lock = threading.Lock()
+_sqlite = SQLiteStorage()
+
+
+def get_storage() -> Storage:
+    """The process-wide backend, created on first use."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = create_storage()
+            logger.info(f"🗄️ Storage backend: {_storage.name}")
+        return _storage
+
+
+def save_to_db(items: List[Union[NewsRecord, NewsItem]]) -> int:
+    return get_storage().save_items(items)
+
+
+def insert_log(level: str, message: str):
+    # Never creates the backend: connecting to Postgres logs too
+    (_storage or _sqlite).insert_log(level, message)
@@ -1,5 +1,11 @@
+import os
+import unicodedata
 from datetime import datetime
 
+# Diretório de dados (SQLite, embeddings). Absoluto: todos os processos/workers usam
+# os mesmos arquivos, qualquer que seja o diretório de trabalho de cada um.
+DATA_DIR = os.path.abspath(os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")))
+
 # Função que retorna a data atual formatada como string.
 def get_current_date_str(): 
     return datetime.now().strftime("%d/%m/%Y %H:%M:%S")
@@ -7,3 +13,8 @@ def get_current_date_str():
 # Função para formatação de lista de notícias para exibição simples
 def format_news_for_display(news_list): 
     return "\n\n".join([f"**{n['title']}**\n{n['link']}" for n in news_list])
+
+# Função que normaliza texto para comparação: minúsculas e sem acentos ("Ceilândia" -> "ceilandia").
+def fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
@@ -0,0 +1,136 @@
+"""
+Worker de jobs em segundo plano.
+
+Uso:
+    python -m backend.worker --processes 4
+
+Cada processo consome a fila (Redis stream ou tabela `jobs` no SQLite) e
+executa os handlers registrados em HANDLERS.
+"""
+import os
+import time
+import socket
+import argparse
+import threading
+import multiprocessing
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from .database import init_db
+from .storage import save_to_db
+from .fetchers import NewsFetcher
+from .jobs import get_queue
+from .logging_config import setup_logging
+
+load_dotenv()
+logger = setup_logging()
+
+POLL_INTERVAL_SECONDS = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+
+fetcher = NewsFetcher()
+
+
+def handle_fetch_all(payload: Dict) -> Dict:
+    items = fetcher.fetch_all()
+    if items:
+        logger.info(f"✅ Job fetch_all: Fetched {len(items)} items. Saving...")
+        save_to_db(items)
+    else:
+        logger.info("⚠️ Job fetch_all: No items found.")
+    return {"fetched": len(items)}
+
+
+def handle_fetch_content(payload: Dict) -> Dict:
+    import asyncio
+    from .content import CONTENT_BATCH, run
+    return asyncio.run(run(limit=payload.get("limit", CONTENT_BATCH)))
+
+
+def handle_retention(payload: Dict) -> Dict:
+    from .retention import run_retention
+    return run_retention(**payload)
+
+
+def handle_refresh_query(payload: Dict) -> Dict:
+    # Stale /news results (backend/freshness.py)
+    from .freshness import refresh_query
+    from .storage import get_storage
+    return refresh_query(fetcher, get_storage(), payload)
+
+
+HANDLERS: Dict[str, Callable[[Dict], Optional[Dict]]] = {
+    "fetch_all": handle_fetch_all,
+    "fetch_content": handle_fetch_content,
+    "retention": handle_retention,
+    "refresh_query": handle_refresh_query,
+}
+
+
+def run_once(queue, worker_id: str, block_ms: int = 0) -> bool:
+    """Claims and runs at most one job. Returns False when the queue was empty."""
+    job = queue.claim(worker_id, block_ms=block_ms)
+    if job is None:
+        return False
+    handler = HANDLERS.get(job["kind"])
+    if handler is None:
+        queue.fail(job["id"], f"unknown job kind '{job['kind']}'")
+        return True
+    logger.info(f"⚙️ Worker {worker_id} running job {job['id']} ({job['kind']})")
+    try:
+        queue.complete(job["id"], handler(job["payload"]))
+    except Exception as e:
+        logger.error(f"❌ Job {job['id']} ({job['kind']}) failed: {e}")
+        queue.fail(job["id"], str(e))
+    return True
+
+
+def run_forever(worker_id: str, stop_event=None):
+    queue = get_queue()
+    # Redis blocks server-side; the SQLite queue is polled
+    block_ms = int(POLL_INTERVAL_SECONDS * 1000) if queue.name == "redis" else 0
+    while not (stop_event and stop_event.is_set()):
+        try:
+            if not run_once(queue, worker_id, block_ms=block_ms) and queue.name != "redis":
+                time.sleep(POLL_INTERVAL_SECONDS)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} loop error: {e}")
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def start_embedded_worker() -> threading.Event:
+    """Runs a worker thread inside the API process (single-service deploys)."""
+    stop_event = threading.Event()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-api"
+    threading.Thread(target=run_forever, args=(worker_id, stop_event), daemon=True, name="embedded-worker").start()
+    return stop_event
+
+
+def _process_main(index: int):
+    if multiprocessing.parent_process() is not None:
+        # --processes children never write app.log (see LOG_FILE_OWNER)
+        setup_logging(role="worker-child")
+    init_db()
+    run_forever(f"{socket.gethostname()}-{os.getpid()}-{index}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker da fila de jobs do Intelligence News Hub")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")))
+    args = parser.parse_args()
+
+    setup_logging(role="worker")
+    init_db()
+    logger.info(f"👷 Starting {args.processes} worker process(es)")
+    if args.processes <= 1:
+        _process_main(0)
+        return
+    procs = [multiprocessing.Process(target=_process_main, args=(i,), daemon=False) for i in range(args.processes)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Gerador de arquivo sintético (`noticias` + tags + rollups + índice vetorial).
+
+Uso:
+    python -m benchmarks.archive --rows 100000 --out benchmarks/.cache/archive-100000
+
+Os títulos combinam termos do gazetteer (regiões, forças, crimes), então a
+busca, os filtros e /stats têm distribuição parecida com a real. A ingestão
+passa por `save_rows` (o mesmo caminho do backfill), e o tempo gasto também é
+reportado. Arquivos gerados ficam em cache por (rows, seed).
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+_REGIONS = ["Ceilândia", "Taguatinga", "Samambaia", "Plano Piloto", "Gama", "Planaltina", "Sobradinho",
+            "Águas Claras", "Recanto das Emas", "Santa Maria", "Guará", "São Sebastião", "Paranoá"]
+_AGENCIES = ["PCDF", "PMDF", "Polícia Civil", "Polícia Militar", "Corpo de Bombeiros", "PRF", "Detran"]
+_CRIMES = ["roubo", "furto", "homicídio", "tráfico de drogas", "assalto", "latrocínio", "feminicídio",
+           "estelionato", "sequestro", "violência doméstica"]
+_VERBS = ["prende suspeito de", "investiga", "deflagra operação contra", "registra", "apura caso de",
+          "divulga balanço de"]
+_FILLER = ["na madrugada", "nesta segunda", "após denúncia", "em via pública", "perto de escola",
+           "no fim de semana", "segundo a SSP", "em ação conjunta"]
+
+
+def synthetic_title(rng: random.Random) -> str:
+    return f"{rng.choice(_AGENCIES)} {rng.choice(_VERBS)} {rng.choice(_CRIMES)} em {rng.choice(_REGIONS)} {rng.choice(_FILLER)}"
+
+
+def synthetic_rows(count: int, seed: int = 0, days: int = 730):
+    """Yields noticias rows spread over the last `days` days (newest articles denser)."""
+    from backend.normalize import news_id
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    sources = ["Google News RSS", "GDELT", "NewsAPI (Correio Braziliense)", "NewsAPI (Metrópoles)", "DuckDuckGo"]
+    for i in range(count):
+        title = synthetic_title(rng)
+        url = f"https://bench.local/{seed}/{i}"
+        age = timedelta(days=days * rng.random() ** 2, seconds=rng.randint(0, 86399))
+        snippet = f"{synthetic_title(rng)}. {rng.choice(_FILLER).capitalize()}, {rng.choice(_AGENCIES)} informou."
+        yield (news_id(url), title, url, (now - age).isoformat(), rng.choice(sources), snippet, "pt")
+
+
+def use_archive(path: str):
+    """Points backend.database / backend.semantic at an archive directory (before init_db)."""
+    from backend import database, semantic
+
+    os.makedirs(path, exist_ok=True)
+    database.DB_PATH = os.path.join(path, "historico_noticias.db")
+    semantic._index = semantic.SemanticIndex(os.path.join(path, "embeddings"))
+
+
+def generate_archive(rows: int, seed: int = 0, out: str = None, batch_size: int = 5000) -> Dict:
+    """Builds (or reuses) an archive with `rows` articles. Returns path + build stats."""
+    out = out or os.path.join(CACHE_DIR, f"archive-{rows}-{seed}")
+    marker = os.path.join(out, "archive.json")
+    if os.path.exists(marker):
+        with open(marker) as f:
+            return json.load(f)
+
+    use_archive(out)
+    from backend import database
+
+    database.init_db()
+    start = time.perf_counter()
+    batch, saved = [], 0
+    for row in synthetic_rows(rows, seed):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            saved += database.save_rows(batch)
+            batch = []
+    if batch:
+        saved += database.save_rows(batch)
+    elapsed = time.perf_counter() - start
+    from backend import semantic
+    semantic.get_index().maybe_build_ivf()
+
+    info = {
+        "path": out,
+        "rows": saved,
+        "seed": seed,
+        "ingest_seconds": round(elapsed, 2),
+        "ingest_rows_per_second": round(saved / elapsed, 1) if elapsed else None,
+        "db_mb": round(os.path.getsize(database.DB_PATH) / 1e6, 1),
+    }
+    with open(marker, "w") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um arquivo sintético de notícias para benchmarks")
+    parser.add_argument("--rows", type=int, default=10_000, help="10k a 1M")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Diretório (default: benchmarks/.cache/archive-<rows>-<seed>)")
+    args = parser.parse_args()
+    print(json.dumps(generate_archive(args.rows, args.seed, args.out), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Benchmark ponta a ponta com todas as dependências externas simuladas localmente.
+
+Uso:
+    python -m benchmarks.bench_e2e --rows 100000 --output results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.bench_e2e --scenarios news_warm chat --fake groq:latency=800 ddg:errors=0.1
+    python -m benchmarks.compare results/old.json results/new.json
+
+Cenários:
+    news_hot    mesma consulta repetida: resposta do Redis (pulado sem Redis)
+    news_warm   consultas distintas que o arquivo responde (ranking híbrido)
+    news_cold   consultas sem resultado local: DuckDuckGo falso + gravação
+    chat        /chat com Groq falso (chamada de ferramenta + resposta)
+    ingest      job agendado fetch_all (RSS, NewsAPI, GDELT, DDG falsos)
+    backfill    backend.backfill sobre GDELT/NewsAPI falsos
+
+O arquivo sintético (benchmarks/archive.py) é copiado para um diretório
+temporário antes de cada execução, então os cenários que gravam não alteram o
+cache. O uvicorn roda numa thread e as requisições saem por HTTP de verdade.
+O resultado sai em JSON (stdout ou --output), com o commit atual.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import asyncio
+import platform
+import tempfile
+import argparse
+import itertools
+import threading
+import subprocess
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeServices, install_fake_ddgs, parse_route_configs  # noqa: E402
+from benchmarks.archive import _CRIMES, _REGIONS, generate_archive, use_archive  # noqa: E402
+
+SCENARIOS = ("news_hot", "news_warm", "news_cold", "chat", "ingest", "backfill")
+API_KEY = "bench"
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def latency_stats(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(_percentile(values, 50)),
+        "p90_ms": ms(_percentile(values, 90)),
+        "p99_ms": ms(_percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def run_requests(base_url: str, paths: Iterable[str], concurrency: int) -> Dict:
+    paths = list(paths)
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one(path: str):
+        nonlocal errors
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = httpx.Client(base_url=base_url, headers={"X-API-Key": API_KEY}, timeout=60.0)
+        start = time.perf_counter()
+        try:
+            failed = client.get(path).status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, paths))
+    return latency_stats(latencies, errors, time.perf_counter() - start)
+
+
+# --- Scenarios ---------------------------------------------------------------
+def scenario_news_hot(ctx) -> Dict:
+    if not ctx["main"].app.state.cache.available:
+        return {"skipped": "redis unavailable"}
+    path = "/news?q=roubo%20Ceil%C3%A2ndia"
+    run_requests(ctx["base_url"], [path], 1)  # fills the cache
+    return run_requests(ctx["base_url"], [path] * ctx["requests"], ctx["concurrency"])
+
+
+def scenario_news_warm(ctx) -> Dict:
+    # Distinct (query, limit) pairs: every request misses the cache and ranks from the archive
+    combos = itertools.cycle(itertools.product(_CRIMES, _REGIONS))
+    paths = [f"/news?q={crime} {region}&limit={5 + i % 40}" for i, (crime, region) in zip(range(ctx["requests"]), combos)]
+    return run_requests(ctx["base_url"], paths, ctx["concurrency"])
+
+
+def scenario_news_cold(ctx) -> Dict:
+    # Keyword mode with unseen tokens: no local hit, goes to (fake) DuckDuckGo and saves
+    run_id = int(time.time())
+    paths = [f"/news?q=zqx{run_id}x{i}&mode=keyword" for i in range(ctx["requests"])]
+    return run_requests(ctx["base_url"], paths, ctx["concurrency"])
+
+
+def scenario_chat(ctx) -> Dict:
+    paths = [f"/chat?q=Quais os últimos casos de roubo em {region}?" for region in itertools.islice(itertools.cycle(_REGIONS), ctx["chat_requests"])]
+    return run_requests(ctx["base_url"], paths, ctx["concurrency"])
+
+
+def scenario_ingest(ctx) -> Dict:
+    from backend import worker
+
+    durations, items = [], 0
+    for _ in range(ctx["ingest_runs"]):
+        start = time.perf_counter()
+        items += worker.handle_fetch_all({})["fetched"]
+        durations.append(time.perf_counter() - start)
+    stats = latency_stats(durations, 0, sum(durations))
+    stats["items"] = items
+    stats["items_per_second"] = round(items / sum(durations), 1) if durations else 0.0
+    return stats
+
+
+def scenario_backfill(ctx) -> Dict:
+    from backend.backfill import Backfill
+
+    until = datetime.now().replace(minute=0, second=0, microsecond=0)
+    backfill = Backfill(
+        query=f"bench {time.time()}",  # new run_key: no checkpoints reused
+        since=until - timedelta(days=ctx["backfill_days"]),
+        until=until,
+        window=timedelta(days=1),
+        sources=["gdelt", "newsapi"],
+        limits={"gdelt": {"rate": 1000}, "newsapi": {"rate": 1000}},
+    )
+    start = time.perf_counter()
+    summary = asyncio.run(backfill.run(report_interval=3600))
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": round(elapsed, 3),
+        "windows": summary["windows"],
+        "requests": summary["requests"],
+        "saved": summary["saved"],
+        "windows_per_second": round(summary["windows"] / elapsed, 2),
+        "articles_per_second": round(summary["saved"] / elapsed, 1),
+    }
+
+
+SCENARIO_FUNCS: Dict[str, Callable[[Dict], Dict]] = {
+    "news_hot": scenario_news_hot,
+    "news_warm": scenario_news_warm,
+    "news_cold": scenario_news_cold,
+    "chat": scenario_chat,
+    "ingest": scenario_ingest,
+    "backfill": scenario_backfill,
+}
+
+
+# --- Harness -----------------------------------------------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def start_api(port: int):
+    import uvicorn
+    from backend import main
+
+    # log_config=None keeps the application's logging setup
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning", log_config=None))
+    thread = threading.Thread(target=server.run, daemon=True, name="bench-api")
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return main, server, thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta com serviços externos falsos")
+    parser.add_argument("--rows", type=int, default=10_000, help="Tamanho do arquivo sintético (10k a 1M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário /news")
+    parser.add_argument("--chat-requests", type=int, default=20)
+    parser.add_argument("--ingest-runs", type=int, default=5)
+    parser.add_argument("--backfill-days", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fake-latency", type=float, default=50.0, help="Latência padrão dos serviços falsos (ms)")
+    parser.add_argument("--fake-errors", type=float, default=0.0, help="Taxa de erro padrão dos serviços falsos")
+    parser.add_argument("--fake", nargs="*", help="Por serviço, ex: gdelt:latency=300,jitter=50,errors=0.05,items=250")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/15"))
+    parser.add_argument("--output", help="Arquivo JSON de saída (default: stdout)")
+    args = parser.parse_args()
+
+    # Environment first: backend modules read their settings at import time
+    fakes = FakeServices(parse_route_configs(args.fake, args.fake_latency, args.fake_errors), seed=args.seed)
+    fakes.start()
+    fakes.apply_env()
+    os.environ.update({
+        "APP_API_KEY": API_KEY,
+        "EMBEDDED_WORKER": "false",
+        "JOB_QUEUE_BACKEND": "sqlite",
+        "REDIS_URL": args.redis_url,
+    })
+
+    archive = generate_archive(args.rows, args.seed)
+    workdir = tempfile.mkdtemp(prefix="bench-e2e-")
+    shutil.copytree(archive["path"], os.path.join(workdir, "archive"))
+    use_archive(os.path.join(workdir, "archive"))
+
+    main_module, server, thread = start_api(_free_port())
+    install_fake_ddgs()
+    if main_module.app.state.cache.available:
+        main_module.app.state.cache.client.flushdb()
+    ctx = {
+        "main": main_module,
+        "base_url": f"http://127.0.0.1:{server.config.port}",
+        "requests": args.requests,
+        "chat_requests": args.chat_requests,
+        "ingest_runs": args.ingest_runs,
+        "backfill_days": args.backfill_days,
+        "concurrency": args.concurrency,
+    }
+
+    results = {}
+    try:
+        for name in args.scenarios:
+            calls_before = dict(fakes.calls)
+            result = SCENARIO_FUNCS[name](ctx)
+            result["external_calls"] = {k: v - calls_before[k] for k, v in fakes.calls.items() if v != calls_before[k]}
+            results[name] = result
+            print(f"{name}: {result}", file=sys.stderr)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        fakes.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "benchmark": "e2e",
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "archive": {k: archive[k] for k in ("rows", "seed", "ingest_rows_per_second", "db_mb")},
+        "config": {
+            "concurrency": args.concurrency,
+            "fake_latency_ms": args.fake_latency,
+            "fake_errors": args.fake_errors,
+            "fake": args.fake or [],
+            "redis": main_module.app.state.cache.available,
+        },
+        "scenarios": results,
+    }
+    out = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(out)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: normalização de feeds em thread única vs. ProcessPoolExecutor.
+
+Uso:
+    python -m benchmarks.bench_normalize --entries 100000 --workers 1 2 4
+
+Gera feeds RSS e respostas GDELT sintéticos em memória (sem rede) e mede
+entradas/segundo para cada configuração. O resultado sai em JSON.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import normalize  # noqa: E402
+
+
+def synthetic_rss(feed_no: int, entries: int) -> bytes:
+    items = "".join(
+        f"<item><title>Operação {feed_no}-{i} da PCDF em Ceilândia</title>"
+        f"<link>https://exemplo.com.br/{feed_no}/{i}</link>"
+        f"<description>Polícia Civil prende suspeito de roubo em Ceilândia, caso {i}.</description>"
+        f"<pubDate>Mon, 06 Jan 2025 10:{i % 60:02d}:00 GMT</pubDate></item>"
+        for i in range(entries)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed {feed_no}</title>{items}</channel></rss>'.encode()
+
+
+def synthetic_gdelt(feed_no: int, entries: int) -> bytes:
+    return json.dumps({"articles": [
+        {"url": f"https://gdelt.exemplo/{feed_no}/{i}", "title": f"Tiroteio {feed_no}-{i} em Taguatinga",
+         "seendate": "20250106T101500Z", "domain": "exemplo.com.br"}
+        for i in range(entries)
+    ]}).encode()
+
+
+def build_payloads(total_entries: int, per_feed: int):
+    payloads = []
+    for feed_no in range(max(total_entries // per_feed, 1)):
+        kind = "rss" if feed_no % 2 == 0 else "gdelt"
+        body = synthetic_rss(feed_no, per_feed) if kind == "rss" else synthetic_gdelt(feed_no, per_feed)
+        payloads.append((kind, body))
+    return payloads
+
+
+def run(payloads, workers: int, chunk_size: int):
+    if workers <= 1:
+        start = time.perf_counter()
+        rows = normalize.normalize_payloads(payloads, chunk_size=chunk_size, use_pool=False)
+        return rows, time.perf_counter() - start
+    normalize._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    # Warm up the workers so spawn/import cost is not measured
+    list(normalize._pool.map(normalize._parse_chunk, [[payloads[0]]] * workers))
+    start = time.perf_counter()
+    rows = normalize.normalize_payloads(payloads, chunk_size=chunk_size, use_pool=True)
+    elapsed = time.perf_counter() - start
+    normalize._pool.shutdown()
+    normalize._pool = None
+    return rows, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--per-feed", type=int, default=250)
+    parser.add_argument("--chunk-size", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--output", help="Arquivo JSON de saída (default: stdout)")
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.entries, args.per_feed)
+    results = []
+    for workers in sorted(set(args.workers)):
+        rows, elapsed = run(payloads, workers, args.chunk_size)
+        results.append({
+            "workers": workers,
+            "entries": len(rows),
+            "seconds": round(elapsed, 3),
+            "entries_per_second": round(len(rows) / elapsed, 1),
+        })
+    report = {
+        "benchmark": "normalize_payloads",
+        "cpu_count": os.cpu_count(),
+        "payload_bytes": sum(len(p) for _, p in payloads),
+        "results": results,
+    }
+    out = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Custo de memória e CPU da representação interna dos artigos: NewsRecord
+(tupla nomeada) contra o NewsItem (Pydantic) que era usado em todo o fluxo.
+
+Uso:
+    python -m benchmarks.bench_records --items 100000 --output results/records.json
+
+Etapas, cada uma medida nas duas representações:
+    build   linhas normalizadas -> objetos (o que fetchers/backfill fazem)
+    read    SELECT * de um SQLite em memória -> objetos (search_db e afins)
+    encode  objetos -> corpo JSON de /news
+
+O tempo vem de uma execução sem tracemalloc; memória (pico e retida) e número
+de coletas do GC vêm de uma segunda execução com tracemalloc ligado.
+"""
+import gc
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import platform
+import tracemalloc
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.archive import synthetic_rows  # noqa: E402
+from benchmarks.bench_e2e import _git_commit  # noqa: E402
+
+
+def _gc_collections() -> int:
+    return sum(stat["collections"] for stat in gc.get_stats())
+
+
+def measure(func: Callable[[], object]) -> Dict:
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    collections = _gc_collections()
+    tracemalloc.start()
+    result = func()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = _gc_collections() - collections
+    del result
+    return {
+        "seconds": round(seconds, 4),
+        "peak_mb": round(peak / 1e6, 1),
+        "retained_mb": round(retained / 1e6, 1),
+        "gc_collections": collections,
+    }
+
+
+def run(count: int) -> Dict:
+    from fastapi.encoders import jsonable_encoder
+    from backend.models import NewsItem
+    from backend.normalize import NEWS_COLUMNS, NewsRecord, record_factory
+    from backend.codec import encode_news_rows
+
+    # Plain tuples, as they come out of the parsers before either representation
+    rows = [tuple(row) for row in synthetic_rows(count)]
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE noticias ({', '.join(NEWS_COLUMNS)})")
+    conn.executemany(f"INSERT INTO noticias VALUES ({', '.join('?' * len(NEWS_COLUMNS))})", rows)
+
+    def read(row_factory, convert):
+        cursor = conn.cursor()
+        cursor.row_factory = row_factory
+        return convert(cursor.execute("SELECT * FROM noticias").fetchall())
+
+    items = [NewsItem(**dict(zip(NEWS_COLUMNS, row))) for row in rows]
+    records = [NewsRecord._make(row) for row in rows]
+    stages = {
+        "build": {
+            "pydantic": lambda: [NewsItem(**dict(zip(NEWS_COLUMNS, row))) for row in rows],
+            "record": lambda: [NewsRecord._make(row) for row in rows],
+        },
+        "read": {
+            "pydantic": lambda: read(sqlite3.Row, lambda fetched: [NewsItem(**dict(r)) for r in fetched]),
+            "record": lambda: read(record_factory, lambda fetched: fetched),
+        },
+        "encode": {
+            "pydantic": lambda: json.dumps(jsonable_encoder(items)).encode(),
+            "record": lambda: encode_news_rows(records),
+        },
+    }
+
+    results = {}
+    for stage, variants in stages.items():
+        results[stage] = {name: measure(func) for name, func in variants.items()}
+        old, new = results[stage]["pydantic"], results[stage]["record"]
+        results[stage]["speedup"] = round(old["seconds"] / new["seconds"], 1) if new["seconds"] else None
+        results[stage]["peak_ratio"] = round(new["peak_mb"] / old["peak_mb"], 2) if old["peak_mb"] else None
+        print(f"{stage}: {results[stage]}", file=sys.stderr)
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória/CPU de NewsRecord vs NewsItem")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--output", help="Arquivo JSON de saída (default: stdout)")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "records",
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "items": args.items,
+        "stages": run(args.items),
+    }
+    out = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(out)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
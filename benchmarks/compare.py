@@ -0,0 +1,53 @@
+"""
+Compara dois resultados JSON de benchmarks/bench_e2e.py.
+
+Uso:
+    python -m benchmarks.compare results/base.json results/head.json --threshold 10
+
+Mostra p50/p99/throughput de cada cenário presente nos dois arquivos e sai com
+código 1 se algum p99 piorar mais que --threshold por cento.
+"""
+import sys
+import json
+import argparse
+
+METRICS = ("p50_ms", "p99_ms", "throughput_rps", "items_per_second", "articles_per_second")
+
+
+def _delta(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(base: dict, head: dict, threshold: float) -> bool:
+    regressed = False
+    print(f"{'scenario':<12} {'metric':<20} {base['commit']:>12} {head['commit']:>12} {'delta':>8}")
+    for name, old in base["scenarios"].items():
+        new = head["scenarios"].get(name)
+        if new is None or "skipped" in old or "skipped" in new:
+            continue
+        for metric in METRICS:
+            if metric not in old or metric not in new:
+                continue
+            delta = _delta(old[metric], new[metric])
+            flag = ""
+            if metric == "p99_ms" and delta > threshold:
+                flag, regressed = "  <-- regression", True
+            print(f"{name:<12} {metric:<20} {old[metric]:>12} {new[metric]:>12} {delta:>+7.1f}%{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dois resultados do bench_e2e")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Piora máxima tolerada no p99 (%%)")
+    args = parser.parse_args()
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    sys.exit(1 if compare(base, head, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
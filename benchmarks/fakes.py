@@ -0,0 +1,265 @@
+"""
+Servidor HTTP local que imita as dependências externas do backend.
+
+    Google News RSS   GET  /rss/search                         (GOOGLE_NEWS_RSS_URL)
+    GDELT Doc API     GET  /gdelt/api/v2/doc/doc               (GDELT_URL)
+    NewsAPI           GET  /newsapi/v2/everything              (NEWSAPI_URL)
+    DuckDuckGo        GET  /ddg/text                           (via FakeDDGS, ver install_fake_ddgs)
+    Groq              POST /groq/openai/v1/chat/completions    (GROQ_BASE_URL)
+    Gemini            POST /gemini/v1beta/models/<m>:generateContent (GOOGLE_GEMINI_BASE_URL)
+
+Cada rota tem latência (ms, com jitter) e taxa de erro configuráveis:
+
+    fakes = FakeServices({"gdelt": RouteConfig(latency_ms=300, error_rate=0.05)})
+    fakes.start(); fakes.apply_env()  # antes de importar backend.*
+
+Os artigos gerados são únicos a cada chamada (contador global), de modo que a
+ingestão agendada sempre encontra itens novos.
+"""
+import os
+import sys
+import json
+import time
+import random
+import threading
+import itertools
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.archive import synthetic_title  # noqa: E402
+
+SERVICES = ("rss", "gdelt", "newsapi", "ddg", "groq", "gemini")
+
+
+@dataclass
+class RouteConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    items: int = 10  # artigos por resposta (rss / gdelt / newsapi / ddg)
+
+
+class FakeServices:
+    def __init__(self, config: Optional[Dict[str, RouteConfig]] = None, seed: int = 0):
+        self.config = {name: RouteConfig() for name in SERVICES}
+        self.config.update(config or {})
+        self.random = random.Random(seed)
+        self._serial = itertools.count()
+        self.calls = {name: 0 for name in SERVICES}
+        self.errors = {name: 0 for name in SERVICES}
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    # --- Lifecycle ---------------------------------------------------------
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        fakes = self
+
+        class Handler(_Handler):
+            services = fakes
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="fake-services").start()
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def apply_env(self):
+        """Points the backend at this server; call before importing backend modules."""
+        base = self.base_url
+        os.environ.update({
+            "GOOGLE_NEWS_RSS_URL": f"{base}/rss/search",
+            "GDELT_URL": f"{base}/gdelt/api/v2/doc/doc",
+            "NEWSAPI_URL": f"{base}/newsapi/v2/everything",
+            "GROQ_BASE_URL": f"{base}/groq",
+            "GOOGLE_GEMINI_BASE_URL": f"{base}/gemini",
+            "FAKE_DDG_URL": f"{base}/ddg/text",
+            "NEWS_API_KEY": os.environ.get("NEWS_API_KEY", "bench"),
+            "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "bench"),
+            "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "bench"),
+        })
+
+    # --- Payloads ----------------------------------------------------------
+    def _articles(self, n: int):
+        now = datetime.now()
+        for _ in range(n):
+            i = next(self._serial)
+            yield i, synthetic_title(self.random), now - timedelta(minutes=self.random.randint(0, 1440))
+
+    def rss(self, cfg: RouteConfig) -> bytes:
+        items = "".join(
+            f"<item><title>{title}</title><link>https://rss.fake/{i}</link>"
+            f"<description>{title} (resumo {i})</description>"
+            f"<pubDate>{format_datetime(published)}</pubDate></item>"
+            for i, title, published in self._articles(cfg.items)
+        )
+        return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Fake</title>{items}</channel></rss>'.encode()
+
+    def gdelt(self, cfg: RouteConfig) -> bytes:
+        return json.dumps({"articles": [
+            {"url": f"https://gdelt.fake/{i}", "title": title, "seendate": f"{published:%Y%m%dT%H%M%SZ}",
+             "domain": "gdelt.fake"}
+            for i, title, published in self._articles(cfg.items)
+        ]}).encode()
+
+    def newsapi(self, cfg: RouteConfig) -> bytes:
+        return json.dumps({"status": "ok", "articles": [
+            {"url": f"https://newsapi.fake/{i}", "title": title, "publishedAt": f"{published:%Y-%m-%dT%H:%M:%SZ}",
+             "source": {"name": "Fake"}, "description": f"{title} (resumo {i})"}
+            for i, title, published in self._articles(cfg.items)
+        ]}).encode()
+
+    def ddg(self, cfg: RouteConfig) -> bytes:
+        return json.dumps([
+            {"title": title, "href": f"https://ddg.fake/{i}", "body": f"{title} (resumo {i})"}
+            for i, title, _ in self._articles(min(cfg.items, 5))
+        ]).encode()
+
+    def groq(self, request: Dict) -> bytes:
+        # First agent turn (tools offered) asks for a search; the second one answers
+        if request.get("tools"):
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": "call_bench", "type": "function",
+                "function": {"name": "buscar_noticias_seguranca_df", "arguments": json.dumps({"query": "roubo"})},
+            }]}
+            finish = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": "- Resposta sintética do benchmark."}
+            finish = "stop"
+        return json.dumps({
+            "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+        }).encode()
+
+    def gemini(self) -> bytes:
+        return json.dumps({"candidates": [{
+            "content": {"role": "model", "parts": [{"text": "Resposta sintética do Gemini."}]},
+            "finishReason": "STOP",
+        }]}).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    services: FakeServices = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _route(self) -> Optional[str]:
+        path = urlparse(self.path).path
+        for name, prefix in (("rss", "/rss/"), ("gdelt", "/gdelt/"), ("newsapi", "/newsapi/"),
+                             ("ddg", "/ddg/"), ("groq", "/groq/"), ("gemini", "/gemini/")):
+            if path.startswith(prefix):
+                return name
+        return None
+
+    def _respond(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, request_body: Optional[Dict] = None):
+        fakes = self.services
+        name = self._route()
+        if name is None:
+            return self._respond(404, b'{"error": "unknown route"}')
+        cfg = fakes.config[name]
+        fakes.calls[name] += 1
+        delay = cfg.latency_ms + fakes.random.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if cfg.error_rate and fakes.random.random() < cfg.error_rate:
+            fakes.errors[name] += 1
+            return self._respond(cfg.error_status, b'{"error": "injected failure"}')
+        if name == "rss":
+            return self._respond(200, fakes.rss(cfg), "application/rss+xml")
+        if name == "groq":
+            return self._respond(200, fakes.groq(request_body or {}))
+        if name == "gemini":
+            return self._respond(200, fakes.gemini())
+        return self._respond(200, getattr(fakes, name)(cfg))
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        self._handle(json.loads(raw) if raw else {})
+
+
+class FakeDDGS:
+    """Drop-in for ddgs.DDGS (context manager + .text) backed by the fake server."""
+
+    def __init__(self, *args, **kwargs):
+        self.client = httpx.Client(timeout=10.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.client.close()
+
+    def text(self, query: str, **kwargs):
+        resp = self.client.get(os.environ["FAKE_DDG_URL"], params={"q": query})
+        resp.raise_for_status()
+        return resp.json()
+
+
+def install_fake_ddgs():
+    """DDG has no base-URL override, so the backend modules get FakeDDGS instead."""
+    from backend import agent, fetchers
+
+    fetchers.DDGS = FakeDDGS
+    agent.DDGS = FakeDDGS
+
+
+def parse_route_configs(values, latency_ms: float = 0.0, error_rate: float = 0.0) -> Dict[str, RouteConfig]:
+    """--fake gdelt:latency=300,errors=0.05 rss:latency=50 -> {name: RouteConfig}"""
+    configs = {name: RouteConfig(latency_ms=latency_ms, error_rate=error_rate) for name in SERVICES}
+    for value in values or []:
+        name, _, options = value.partition(":")
+        cfg = configs[name]
+        for option in filter(None, options.split(",")):
+            key, _, raw = option.partition("=")
+            field = {"latency": "latency_ms", "jitter": "jitter_ms", "errors": "error_rate",
+                     "status": "error_status", "items": "items"}[key]
+            setattr(cfg, field, type(getattr(cfg, field))(raw))
+    return configs
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sobe os serviços falsos para testes manuais")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fake", nargs="*", help="Config por serviço, ex: gdelt:latency=300,errors=0.05")
+    args = parser.parse_args()
+    fakes = FakeServices(parse_route_configs(args.fake))
+    fakes.start(port=args.port)
+    print(f"Fake services on {fakes.base_url} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fakes.stop()
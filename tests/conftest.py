@@ -0,0 +1,13 @@
+import pytest
+
+from backend.semantic import SemanticIndex
+
+
+@pytest.fixture
+def tmp_db(monkeypatch, tmp_path):
+    """Real SQLite file (for code that opens connections from several threads)"""
+    import backend.database as database
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr("backend.semantic._index", SemanticIndex(str(tmp_path / "embeddings")))
+    database.init_db()
+    return database
@@ -0,0 +1,54 @@
+import os
+
+# Same key as the other API tests: backend.main reads it at import time
+os.environ["APP_API_KEY"] = "test_key"
+
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.admission import ApiKey
+from backend.main import app
+from backend.normalize import NewsRecord
+
+client = TestClient(app)
+
+
+def record(news_id, title):
+    return NewsRecord(news_id, title, f"http://t/{news_id}", "2025-01-06T10:00:00", "Test", "", "pt")
+
+
+def test_saved_searches_match_new_batches_once(tmp_db, monkeypatch):
+    """Rules are matched against each saved batch; alerts are per owner, deduplicated and paged by id"""
+    monkeypatch.setitem(main.API_KEYS, "chave_outra", ApiKey("outra"))
+    headers = {"X-API-Key": main.APP_API_KEY}
+
+    shooting = client.post("/alerts/rules", headers=headers,
+                           json={"name": "Tiroteio SN", "q": "Tiroteio", "region": "sol nascente"})
+    assert shooting.status_code == 201
+    assert shooting.json()["region"] == "Sol Nascente/Pôr do Sol"
+    robbery = client.post("/alerts/rules", headers=headers, json={"name": "Roubos PCDF", "agency": "pcdf",
+                                                                  "crime_type": "roubo"}).json()
+    assert client.post("/alerts/rules", headers=headers, json={"name": "vazia"}).status_code == 400
+
+    batch = [
+        record("a", "Tiroteio deixa um ferido no Sol Nascente"),
+        record("b", "Tiroteio em Taguatinga"),
+        record("c", "PCDF prende autores de roubo a ônibus"),
+    ]
+    assert tmp_db.save_rows(batch) == 3
+    alerts = client.get("/alerts", headers=headers).json()
+    assert [(a["rule_name"], a["news_id"]) for a in alerts] == [("Tiroteio SN", "a"), ("Roubos PCDF", "c")]
+    assert [a["news_id"] for a in client.get(f"/alerts?after={alerts[0]['id']}", headers=headers).json()] == ["c"]
+    assert client.get("/alerts", headers={"X-API-Key": "chave_outra"}).json() == []
+
+    # A rule added later only sees later batches; already archived articles are not re-alerted
+    client.post("/alerts/rules", headers=headers, json={"name": "Taguatinga", "region": "Taguatinga"})
+    assert tmp_db.save_rows(batch + [record("d", "Roubo a residência em Taguatinga")]) == 1
+    alerts = client.get("/alerts", headers=headers).json()
+    assert [(a["rule_name"], a["news_id"]) for a in alerts][2:] == [("Taguatinga", "d")]
+    assert len(alerts) == 3
+
+    assert client.delete(f"/alerts/rules/{robbery['id']}", headers={"X-API-Key": "chave_outra"}).status_code == 404
+    assert client.delete(f"/alerts/rules/{robbery['id']}", headers=headers).status_code == 200
+    assert [a["news_id"] for a in client.get("/alerts", headers=headers).json()] == ["a", "d"]
+    assert [r["name"] for r in client.get("/alerts/rules", headers=headers).json()] == ["Tiroteio SN", "Taguatinga"]
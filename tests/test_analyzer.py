@@ -0,0 +1,80 @@
+import threading
+import time
+
+from backend.analyzer import analyze
+from backend.fetchers import NewsFetcher
+from backend.normalize import NewsRecord
+
+
+def _row(i, title, snippet=""):
+    return NewsRecord(f"id{i}", title, f"http://t/{i}", f"2025-01-0{i}T10:00:00", "Test", snippet, "pt")
+
+
+def test_equivalent_queries_share_one_key():
+    assert {analyze(q).key for q in ("Ceilândia", " ceilandia ", "CEILÂNDIA")} == {"ceilandia"}
+    # Acronyms/slang resolve to one canonical term; stopwords drop out
+    assert analyze("PM-DF na Taguá").key == analyze("Polícia Militar em Taguatinga").key == "pmdf taguatinga"
+    assert analyze("roubo no DF").key == "roubo distrito federal"
+    assert analyze("de").key == "de"
+    assert analyze("!!!").terms == ()
+    assert analyze("assalto Ceilândia").external_query(region="Ceilândia") == "assalto ceilandia distrito federal"
+
+
+def test_external_query_keeps_the_users_wording():
+    """Synonyms are for the key and local lookups; search engines get what was typed (folded) + DF context"""
+    assert analyze("PM").key == "pm"  # any state's PM, not the PMDF
+    assert analyze("PM São Paulo").external_query() == "pm sao paulo distrito federal"
+    assert analyze("pf").key == "policia federal"
+    assert analyze("pf").external_query() == "pf distrito federal"
+    assert analyze("roubo no DF").external_query() == "roubo no df"
+
+
+def test_keyword_search_folds_accents_and_expands_synonyms(tmp_db):
+    tmp_db.save_rows([
+        _row(1, "Assalto em Ceilândia", "Polícia Militar prende suspeitos"),
+        _row(2, "Operação contra o PCC", "Facção atuava no Entorno"),
+        _row(3, "PCDF investiga roubos na Tagua", ""),
+    ])
+    def ids(q):
+        return [r.id for r in tmp_db.search_db(q)]
+
+    assert ids("CEILANDIA") == ids("ceilândia") == ids(" Ceilândia ") == ["id1"]
+    assert ids("pm df ceilandia") == ["id1"]
+    # Prefixes for words ("roubo" -> "roubos"), whole words for short acronyms ("pc" is not "PCC")
+    assert ids("roubo taguatinga") == ["id3"]
+    assert ids("pc") == []
+    assert ids("Polícia Civil") == ["id3"]
+    assert ids("!!!") == []
+
+
+def test_keyword_index_is_backfilled_on_upgrade(tmp_db):
+    tmp_db.save_rows([_row(1, "Assalto em Ceilândia")])
+    conn = tmp_db.get_connection()
+    conn.execute("DELETE FROM noticia_search")
+    conn.execute("PRAGMA user_version = 2")
+    conn.commit()
+    conn.close()
+    assert tmp_db.search_db("ceilandia") == []
+    tmp_db.init_db()
+    assert [r.id for r in tmp_db.search_db("ceilandia")] == ["id1"]
+
+
+def test_equivalent_external_searches_share_one_call(monkeypatch):
+    fetcher = NewsFetcher()
+    calls = []
+
+    def slow_ddg(query):
+        calls.append(query)
+        time.sleep(0.2)
+        return [_row(1, "Assalto em Ceilândia")]
+
+    monkeypatch.setattr(fetcher, "fetch_ddg", slow_ddg)
+    results = []
+    threads = [threading.Thread(target=lambda q=q: results.append(fetcher.search_external(analyze(q))))
+               for q in ("Ceilândia", "ceilandia", "CEILÂNDIA ")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == ["ceilandia distrito federal"]
+    assert [len(r) for r in results] == [1, 1, 1]
@@ -37,3 +37,144 @@ def test_chat_authorized():
     # We expect 200 or 500 (if Groq fails), but NOT 401
     response = client.get("/chat?q=ola", headers=headers)
     assert response.status_code != 401
+
+def test_metrics_exposes_news_tiers():
+    """/metrics requires the key and reports the tier that answered /news"""
+    assert client.get("/metrics").status_code == 401
+    headers = {"X-API-Key": "test_key"}
+    client.get("/news?region=ceilandia", headers=headers)
+    response = client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'news_request_seconds_count{tier=' in response.text
+    assert "# TYPE fetch_seconds histogram" in response.text
+
+def test_profile_header_records_span_trace():
+    """X-Profile: 1 stores a span trace retrievable from /debug/profiles"""
+    headers = {"X-API-Key": "test_key"}
+    response = client.get("/news?region=ceilandia", headers={**headers, "X-Profile": "1"})
+    profile_id = response.headers["X-Profile-Id"]
+
+    profiles = client.get("/debug/profiles?path=/news", headers=headers).json()
+    profile = next(p for p in profiles if p["id"] == profile_id)
+    assert profile["reason"] == "header"
+    assert profile["spans"][0]["name"] == "db:recent"
+    assert profile["duration_ms"] >= profile["spans"][0]["duration_ms"]
+
+    # Without the header (and no sampling) nothing is recorded
+    response = client.get("/news?region=ceilandia", headers=headers)
+    assert "X-Profile-Id" not in response.headers
+
+def test_profiles_are_only_for_profile_keys(monkeypatch):
+    """A partner key can neither turn profiling on nor read other clients' profiles"""
+    from backend import main
+    from backend.admission import ApiKey
+
+    monkeypatch.setitem(main.API_KEYS, "chave_parceiro", ApiKey("parceiro"))
+    headers = {"X-API-Key": "chave_parceiro"}
+    response = client.get("/news?region=ceilandia", headers={**headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert client.get("/debug/profiles", headers=headers).status_code == 403
+    assert client.get("/debug/profiles", headers={"X-API-Key": "test_key"}).status_code == 200
+
+def test_api_key_quota_returns_429_with_retry_after(monkeypatch):
+    """Keys from APP_API_KEYS carry their own per-minute quota"""
+    from backend import main
+    from backend.admission import parse_api_keys
+
+    keys = parse_api_keys("parceiro=chave_parceiro:2:1,quebrada=sem_dois_pontos:x", "test_key")
+    assert set(keys) == {"test_key", "chave_parceiro"}
+    monkeypatch.setattr(main, "API_KEYS", keys)
+
+    headers = {"X-API-Key": "chave_parceiro"}
+    assert [client.get("/news?region=ceilandia", headers=headers).status_code for _ in range(2)] == [200, 200]
+    response = client.get("/news?region=ceilandia", headers=headers)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # Other keys are unaffected
+    assert client.get("/news?region=ceilandia", headers={"X-API-Key": "test_key"}).status_code == 200
+
+
+def test_saturated_chat_is_shed_while_news_stays_available(monkeypatch):
+    """A full /chat class answers 503 + Retry-After at once; /news has its own slots"""
+    from backend import admission
+
+    chat = admission.RouteLimiter(admission.RouteClass("chat", concurrency=1, queue=0, queue_timeout=0.1))
+    chat.in_flight = 1  # one LLM call already running
+    monkeypatch.setitem(admission._limiters, "chat", chat)
+
+    headers = {"X-API-Key": "test_key"}
+    response = client.get("/chat?q=ola", headers=headers)
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.get("/news?region=ceilandia", headers=headers).status_code == 200
+    assert client.get("/").status_code == 200
+    assert 'admission_rejected_total{route_class="chat",reason="saturated"}' in client.get("/metrics", headers=headers).text
+
+
+def test_refused_requests_give_back_quota_and_key_slot(monkeypatch):
+    """A 503 from a full route neither spends the key's quota nor leaves its slot taken"""
+    from backend import admission, main
+
+    keys = admission.parse_api_keys("parceiro=chave_parceiro:1:1")
+    monkeypatch.setattr(main, "API_KEYS", keys)
+    chat = admission.RouteLimiter(admission.RouteClass("chat", concurrency=1, queue=0, queue_timeout=0.1))
+    chat.in_flight = 1
+    monkeypatch.setitem(admission._limiters, "chat", chat)
+
+    headers = {"X-API-Key": "chave_parceiro"}
+    assert client.get("/chat?q=ola", headers=headers).status_code == 503
+    assert keys["chave_parceiro"].in_flight == 0
+    # The one request of the minute is still available
+    assert client.get("/news?region=ceilandia", headers=headers).status_code == 200
+    assert client.get("/news?region=ceilandia", headers=headers).status_code == 429
+
+
+def test_route_limiter_queue_deadline_and_handoff():
+    """Waiters get freed slots in order; past the deadline or a full queue they are refused"""
+    import asyncio
+    from backend.admission import RouteClass, RouteLimiter
+
+    async def scenario():
+        limiter = RouteLimiter(RouteClass("news", concurrency=1, queue=1, queue_timeout=0.05))
+        assert await limiter.acquire()
+        # Queue full: refused without waiting
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert await limiter.acquire() is False
+        # Slot released to the queued request, which then holds it
+        limiter.release(0.01)
+        assert await waiting and limiter.in_flight == 1
+        # Nobody releases: the deadline expires and the queue is left clean
+        assert await limiter.acquire() is False
+        assert not limiter.waiters
+        limiter.release(0.01)
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_news_etag_304_and_compression(tmp_db):
+    """Same result -> same ETag; If-None-Match gives a bodiless 304; large bodies are compressed"""
+    from backend.normalize import NewsRecord
+
+    tmp_db.save_rows([NewsRecord(f"op-{i}", f"Operação especial {i} na Ceilândia", f"http://t/{i}",
+                                 "2025-01-06T10:00:00", "Test", "Trecho da notícia " * 5, "pt") for i in range(30)])
+    headers = {"X-API-Key": "test_key"}
+    url = "/news?q=especial&mode=keyword&limit=30"
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200 and len(first.json()) == 30
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["cache-control"] == "private, no-cache"  # keyword results are not cached server-side
+    etag = first.headers["etag"]
+
+    revalidated = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    plain = client.get(url, headers={**headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == etag and plain.json() == first.json()
+    assert client.get(url, headers={**headers, "If-None-Match": 'W/"other"'}).status_code == 200
@@ -0,0 +1,88 @@
+import json
+import asyncio
+import httpx
+from datetime import datetime, timedelta
+
+from backend.backfill import Backfill
+
+
+def gdelt_transport(calls):
+    def handler(request):
+        calls.append(request.url.params["startdatetime"])
+        start = request.url.params["startdatetime"]
+        articles = [
+            {"url": f"http://gdelt.test/{start}/{i}", "title": f"Roubo {start}-{i} em Ceilândia",
+             "seendate": f"{start[:8]}T120000Z", "domain": "gdelt.test"}
+            for i in range(2)
+        ]
+        return httpx.Response(200, content=json.dumps({"articles": articles}).encode())
+    return httpx.MockTransport(handler)
+
+
+def test_backfill_walks_windows_and_resumes(tmp_db):
+    """Each window is fetched once; a second run finds nothing pending"""
+    calls = []
+    args = dict(query="roubo", since=datetime(2025, 1, 1), until=datetime(2025, 1, 4),
+                window=timedelta(days=1), sources=["gdelt"], limits={"gdelt": {"rate": 1000}})
+
+    summary = asyncio.run(Backfill(**args).run(transport=gdelt_transport(calls)))
+    assert sorted(calls) == ["20250101000000", "20250102000000", "20250103000000"]
+    assert summary["saved"] == 6
+
+    conn = tmp_db.get_connection()
+    statuses = {r["status"] for r in conn.execute("SELECT status FROM backfill_checkpoints")}
+    count = conn.execute("SELECT COUNT(*) FROM noticias").fetchone()[0]
+    conn.close()
+    assert statuses == {"done"}
+    assert count == 6
+
+    calls.clear()
+    summary = asyncio.run(Backfill(**args).run(transport=gdelt_transport(calls)))
+    assert calls == []
+    assert summary["saved"] == 0
+
+
+def test_backfill_normalizes_windows_in_batches(tmp_db, monkeypatch):
+    """Responses are normalized several at a time; checkpoints follow the saved batch"""
+    from backend import backfill
+
+    batches, normalize_payloads = [], backfill.normalize_payloads
+
+    def normalize(payloads):
+        batches.append(len(payloads))
+        conn = tmp_db.get_connection()
+        statuses = {r["status"] for r in conn.execute("SELECT status FROM backfill_checkpoints")}
+        conn.close()
+        assert statuses == {"pending"}  # not marked done before its rows are saved
+        return normalize_payloads(payloads)
+
+    monkeypatch.setattr(backfill, "BACKFILL_BATCH_PAYLOADS", 10)
+    monkeypatch.setattr(backfill, "normalize_payloads", normalize)
+    args = dict(query="roubo", since=datetime(2025, 1, 1), until=datetime(2025, 1, 4),
+                window=timedelta(days=1), sources=["gdelt"], limits={"gdelt": {"rate": 1000}})
+    summary = asyncio.run(Backfill(**args).run(transport=gdelt_transport([])))
+    assert batches == [3]
+    assert summary["saved"] == 6
+
+
+def test_skipped_newsapi_windows_run_once_a_key_is_set(tmp_db, monkeypatch):
+    pages = []
+
+    def handler(request):
+        pages.append(request.url.params["from"])
+        return httpx.Response(200, content=json.dumps({"status": "ok", "articles": []}).encode())
+
+    args = dict(query="roubo", since=datetime(2025, 1, 1), until=datetime(2025, 1, 3),
+                window=timedelta(days=1), sources=["newsapi"], limits={"newsapi": {"rate": 1000}})
+    monkeypatch.delenv("NEWS_API_KEY", raising=False)
+    asyncio.run(Backfill(**args).run(transport=httpx.MockTransport(handler)))
+    assert pages == []
+
+    monkeypatch.setenv("NEWS_API_KEY", "test")
+    summary = asyncio.run(Backfill(**args).run(transport=httpx.MockTransport(handler)))
+    assert sorted(pages) == ["2025-01-01T00:00:00", "2025-01-02T00:00:00"]
+    assert summary["windows"] == 2
+    conn = tmp_db.get_connection()
+    statuses = {r["status"] for r in conn.execute("SELECT status FROM backfill_checkpoints")}
+    conn.close()
+    assert statuses == {"done"}
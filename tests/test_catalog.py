@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+from backend import catalog
+from backend.normalize import NewsRecord
+
+
+class FakeFetcher:
+    """fetch_<source>(query) -> records; GDELT and RSS return overlapping articles"""
+
+    def __init__(self):
+        self.calls = []
+        self.since = {}
+
+    def _records(self, source, query, urls):
+        self.calls.append((source, query))
+        return [NewsRecord(f"id-{u}", f"{query} {u}", f"http://t/{u}", "2025-01-06T10:00:00", source, "", "pt")
+                for u in urls]
+
+    def fetch_gdelt(self, query, since=None):
+        self.since[query] = since
+        urls = [f"{query}-{c}" for c in "abcd"] if "Gama" in query else []
+        return self._records("gdelt", query, urls)
+
+    def fetch_google_rss(self, query):
+        return self._records("google_rss", query, [f"{query}-a"])
+
+
+def test_catalog_budget_dedupe_and_adaptive_interval(tmp_db, monkeypatch):
+    """Due entries run within the budget, shared results count once, idle entries back off"""
+    entries = catalog.catalog_entries(topics=["roubo"], sources=["gdelt", "google_rss"], regions=["Gama"],
+                                      region_topics=["roubo"], region_sources=["gdelt", "google_rss"])
+    monkeypatch.setattr(catalog, "catalog_entries", lambda: entries)
+    fetcher = FakeFetcher()
+    now = datetime(2025, 1, 6, 12, 0)
+
+    # Budget caps the external calls; general (whole-DF) queries go first and GDELT gets the query
+    records = catalog.run_catalog(fetcher, budget=2, now=now)
+    assert sorted(fetcher.calls) == [("gdelt", "roubo Distrito Federal"), ("google_rss", "roubo Distrito Federal")]
+    assert len(records) == 1
+    tmp_db.save_rows(records)
+
+    fetcher.calls.clear()
+    records = catalog.run_catalog(fetcher, budget=10, now=now + timedelta(minutes=1))
+    assert len(fetcher.calls) == 2
+    # "roubo Gama-a" comes back from both sources but is returned (and credited) once
+    assert len(records) == 4
+    tmp_db.save_rows(records)
+
+    rows = {(r["source"], r["region"]): r for r in catalog.catalog_stats()}
+    assert sum(rows[(source, "Gama")]["last_new"] for source in ("gdelt", "google_rss")) == 4
+    # Three or more new items -> sooner; general entries keep the cron cadence even with nothing new
+    assert rows[("gdelt", "Gama")]["interval_minutes"] == max(catalog.INITIAL_INTERVAL_MINUTES // 2,
+                                                              catalog.MIN_INTERVAL_MINUTES)
+    assert rows[("gdelt", "Distrito Federal")]["last_new"] == 0
+    assert rows[("gdelt", "Distrito Federal")]["interval_minutes"] == catalog.GENERAL_INTERVAL_MINUTES
+
+    # Nothing due until the earliest next_run_at
+    fetcher.calls.clear()
+    assert catalog.run_catalog(fetcher, now=now + timedelta(hours=1)) == []
+    assert fetcher.calls == []
+
+    # Everything is archived now: every entry reports zero new items and the RA ones back off
+    gama_interval = rows[("gdelt", "Gama")]["interval_minutes"]
+    catalog.run_catalog(fetcher, now=now + timedelta(days=30))
+    assert len(fetcher.calls) == 4
+    rows = {(r["source"], r["region"]): r for r in catalog.catalog_stats()}
+    assert all(r["last_new"] == 0 for r in rows.values())
+    assert rows[("gdelt", "Gama")]["interval_minutes"] == gama_interval * 2
+    assert rows[("gdelt", "Distrito Federal")]["interval_minutes"] == catalog.GENERAL_INTERVAL_MINUTES
+    # GDELT is asked for everything since the entry's last run, however late this one is
+    assert fetcher.since["roubo Distrito Federal"] == now
+    assert fetcher.since["roubo Gama"] == now + timedelta(minutes=1)
+
+
+def test_general_entries_go_first_and_default_round_fits_budget(tmp_db, monkeypatch):
+    entries = catalog.catalog_entries()
+    assert len(entries) <= catalog.CATALOG_BUDGET
+    general = [e for e in entries if e["region"] == catalog.GENERAL_REGION]
+    assert len(general) == len(catalog.CATALOG_TOPICS) * len(catalog.CATALOG_SOURCES)
+
+    # Per-RA entries overdue for days still wait behind the general ones that are due
+    now = datetime(2025, 1, 6, 11, 0)
+    catalog.sync_catalog(now=now - timedelta(days=5))
+    conn = tmp_db.get_connection()
+    conn.execute("UPDATE query_catalog SET next_run_at = ? WHERE region = ?",
+                 ((now + timedelta(minutes=5)).isoformat(), catalog.GENERAL_REGION))
+    conn.commit()
+    conn.close()
+    due = catalog.due_entries(len(general), now)
+    assert {e["region"] for e in due} == {catalog.GENERAL_REGION}
@@ -0,0 +1,143 @@
+import asyncio
+import httpx
+
+from backend import content
+from backend.normalize import NewsRecord
+
+ARTICLE = """
+<html><head><title>Operação</title><script>var tracking = "x";</script></head><body>
+<nav><p>Início | Cidades | Polícia | Esportes | Entretenimento | Contato</p></nav>
+<article>
+  <h1>PCDF desarticula quadrilha em Ceilândia</h1>
+  <div class="materia">
+    <p>A Polícia Civil do Distrito Federal deflagrou nesta manhã uma operação contra uma quadrilha de receptadores.</p>
+    <p>Segundo os investigadores, o grupo revendia celulares roubados em feiras da região administrativa.</p>
+    <p>Curto demais.</p>
+  </div>
+  <aside><p>Leia também: outras notícias da semana que você não pode perder no nosso portal.</p></aside>
+</article>
+<footer><p>Todos os direitos reservados ao portal de notícias fictício usado nos testes.</p></footer>
+</body></html>
+"""
+
+
+def site_transport(requests):
+    def handler(request):
+        requests.append(request.url.path)
+        path = request.url.path
+        if path == "/robots.txt":
+            return httpx.Response(200, text="User-agent: *\nDisallow: /privado/\n")
+        if path == "/artigo":
+            return httpx.Response(200, text=ARTICLE, headers={"content-type": "text/html; charset=utf-8"})
+        if path == "/enorme":
+            return httpx.Response(200, content=b"<p>" + b"x" * (content.CONTENT_MAX_BYTES + 10),
+                                  headers={"content-type": "text/html"})
+        if path == "/arquivo.pdf":
+            return httpx.Response(200, content=b"%PDF", headers={"content-type": "application/pdf"})
+        return httpx.Response(404)
+    return httpx.MockTransport(handler)
+
+
+def test_extract_text_keeps_main_block():
+    """Boilerplate (nav/aside/footer/scripts) and short paragraphs are dropped"""
+    text = content.extract_text(ARTICLE.encode())
+    assert text.startswith("A Polícia Civil do Distrito Federal deflagrou")
+    assert "celulares roubados" in text
+    assert "Leia também" not in text and "direitos reservados" not in text and "Curto demais" not in text
+
+
+def test_content_fetch_stores_compressed_text_and_feeds_fulltext(tmp_db):
+    """robots.txt, size and type caps are honoured; stored text is searchable and readable"""
+    urls = {"ok": "http://site.test/artigo", "robots": "http://site.test/privado/x",
+            "big": "http://site.test/enorme", "pdf": "http://site.test/arquivo.pdf", "missing": "http://site.test/404"}
+    tmp_db.save_rows([NewsRecord(key, f"Notícia {key}", url, "2025-01-06T10:00:00", "Test", "", "pt")
+                      for key, url in urls.items()])
+
+    requests = []
+    summary = asyncio.run(content.run(limit=10, transport=site_transport(requests), use_pool=False))
+    assert summary["attempted"] == 5 and summary["stored"] == 1
+    assert summary["robots"] == 1 and summary["too_large"] == 1 and summary["not_html"] == 1
+    assert summary["http_error"] == 1
+    assert requests.count("/robots.txt") == 1
+    assert "/privado/x" not in requests
+
+    # Every attempt is recorded: nothing is pending on the next run
+    assert content.pending_articles() == []
+    text = content.get_contents(["ok", "robots"])
+    assert list(text) == ["ok"] and "receptadores" in text["ok"]
+
+    # Words that only exist in the article body (accents folded) reach the hybrid ranking
+    assert tmp_db._fulltext_candidates("receptadores celulares", 10) == ["ok"]
+    assert [r.id for r in tmp_db.hybrid_search_db("receptadores")] == ["ok"]
+
+
+def test_transient_failures_are_retried_with_backoff(tmp_db):
+    """5xx/timeouts come back after the backoff; 4xx and robots refusals are final"""
+    from datetime import datetime, timedelta
+
+    urls = {"flaky": "http://site.test/instavel", "gone": "http://site.test/404"}
+    tmp_db.save_rows([NewsRecord(key, f"Notícia {key}", url, "2025-01-06T10:00:00", "Test", "", "pt")
+                      for key, url in urls.items()])
+    up = []
+
+    def handler(request):
+        if request.url.path == "/instavel":
+            if not up:
+                return httpx.Response(503)
+            return httpx.Response(200, text=ARTICLE, headers={"content-type": "text/html; charset=utf-8"})
+        return httpx.Response(404)
+
+    transport = httpx.MockTransport(handler)
+    summary = asyncio.run(content.run(limit=10, transport=transport, use_pool=False))
+    assert summary["http_error"] == 2 and summary["stored"] == 0
+
+    now = datetime.now()
+    assert content.pending_articles(now=now) == []
+    later = now + timedelta(minutes=content.CONTENT_RETRY_MINUTES + 1)
+    assert content.pending_articles(now=later) == [("flaky", urls["flaky"])]
+
+    up.append(True)
+    results = asyncio.run(content.ContentFetcher(transport=transport, use_pool=False).fetch_many(
+        content.pending_articles(now=later)))
+    assert content.save_contents(results, now=later) == 1
+    assert content.pending_articles(now=later + timedelta(days=30)) == []
+    assert "receptadores" in content.get_contents(["flaky"])["flaky"]
+
+
+def test_retries_stop_after_max_attempts(tmp_db):
+    from datetime import datetime, timedelta
+
+    tmp_db.save_rows([NewsRecord("x", "Notícia", "http://site.test/x", "2025-01-06T10:00:00", "Test", "", "pt")])
+    now = datetime.now()
+    for attempt in range(content.CONTENT_MAX_ATTEMPTS):
+        assert content.pending_articles(now=now) == [("x", "http://site.test/x")]
+        content.save_contents([{"news_id": "x", "status": "error", "http_status": None, "text": ""}], now=now)
+        now += timedelta(minutes=content.CONTENT_RETRY_MINUTES * 2 ** attempt + 1)
+    assert content.pending_articles(now=now + timedelta(days=365)) == []
+
+
+def test_redirects_check_robots_and_limits_per_hop(tmp_db):
+    """Aggregator links are followed hop by hop; the publisher's robots.txt applies to the target"""
+    requests = []
+    site = site_transport(requests)
+
+    def handler(request):
+        if request.url.host == "news.google.com":
+            requests.append(f"google{request.url.path}")
+            targets = {"/rss/articles/a": "http://site.test/artigo", "/rss/articles/b": "http://site.test/privado/x",
+                       "/rss/articles/loop": "/rss/articles/loop"}
+            if request.url.path in targets:
+                return httpx.Response(302, headers={"location": targets[request.url.path]})
+            return httpx.Response(404)
+        return site.handle_request(request)
+
+    fetcher = content.ContentFetcher(transport=httpx.MockTransport(handler), use_pool=False)
+    results = asyncio.run(fetcher.fetch_many([
+        ("a", "https://news.google.com/rss/articles/a"), ("b", "https://news.google.com/rss/articles/b"),
+        ("loop", "https://news.google.com/rss/articles/loop"),
+    ]))
+    assert [r["status"] for r in results] == ["ok", "robots", "too_many_redirects"]
+    assert "receptadores" in results[0]["text"]
+    assert "/privado/x" not in requests
+    assert requests.count("/robots.txt") == 1 and requests.count("google/robots.txt") == 1
+    assert set(fetcher.domain_limits) == {"news.google.com", "site.test"}
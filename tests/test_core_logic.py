@@ -4,7 +4,9 @@ import os
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 from backend.models import NewsItem
-from backend.database import get_connection, save_to_db, search_db, init_db
+from backend.database import get_connection, save_to_db, search_db, init_db, semantic_search_db, hybrid_search_db, get_stats
+from backend.semantic import SemanticIndex
+from backend.enrichment import extract_tags, canonical_tag
 
 # --- Tests de Banco de Dados ---
 # Usamos um banco em memória para isolamento total
@@ -13,10 +15,11 @@ from backend.database import get_connection, save_to_db, search_db, init_db
 # Since app logic calls get_connection() every time, we must patch get_connection to return the SAME connection object.
 
 @pytest.fixture
-def mock_db_path(monkeypatch):
+def mock_db_path(monkeypatch, tmp_path):
     """Override get_connection using a custom proxy class"""
     
-    real_conn = sqlite3.connect(":memory:")
+    # check_same_thread=False: hybrid ranking queries from a worker pool
+    real_conn = sqlite3.connect(":memory:", check_same_thread=False)
     real_conn.row_factory = sqlite3.Row
     
     class ConnectionProxy:
@@ -44,6 +47,8 @@ def mock_db_path(monkeypatch):
     proxy = ConnectionProxy(real_conn)
     
     monkeypatch.setattr("backend.database.get_connection", lambda: proxy)
+    # Índice vetorial isolado por teste
+    monkeypatch.setattr("backend.semantic._index", SemanticIndex(str(tmp_path / "embeddings")))
     
     # Initialize DB
     init_db()
@@ -99,6 +104,126 @@ def test_db_deduplication(mock_db_path):
     results = search_db("Original")
     assert len(results) == 1, "Deduplication failed (found multiple or error)"
 
+def test_semantic_search_matches_synonyms(mock_db_path):
+    """Semantic mode should find articles that share meaning, not substrings"""
+    items = [
+        NewsItem(id="sem_1", title="Assassinato na Ceilândia", url="http://a.com",
+                 publishedAt=datetime.now(), source="Test", snippet="Jovem foi morto a tiros"),
+        NewsItem(id="sem_2", title="Feira cultural no Plano Piloto", url="http://b.com",
+                 publishedAt=datetime.now(), source="Test", snippet="Evento reúne artesãos"),
+    ]
+    save_to_db(items)
+
+    assert search_db("homicídio em Ceilândia") == []
+    results = semantic_search_db("homicídio em Ceilandia")
+    assert [r.id for r in results] == ["sem_1"]
+
+def test_hybrid_ranking_prefers_relevant_and_recent(mock_db_path):
+    """Items found by both paths rank first; recency breaks near-ties"""
+    from datetime import timedelta
+    now = datetime.now()
+    items = [
+        NewsItem(id="old_both", title="Tiroteio em Taguatinga", url="http://a.com",
+                 publishedAt=now - timedelta(days=60), source="Test", snippet="Disparos na madrugada"),
+        NewsItem(id="new_both", title="Tiroteio em Taguatinga deixa feridos", url="http://b.com",
+                 publishedAt=now, source="Test", snippet="Disparos perto da feira"),
+        NewsItem(id="vector_only", title="Baleado em Taguatinga", url="http://c.com",
+                 publishedAt=now, source="Test", snippet="Homem atingido por tiros"),
+        NewsItem(id="unrelated", title="Feira de livros no Plano Piloto", url="http://d.com",
+                 publishedAt=now, source="Test", snippet="Evento cultural"),
+    ]
+    save_to_db(items)
+
+    results = hybrid_search_db("Tiroteio em Taguatinga", limit=3)
+    ids = [r.id for r in results]
+    assert ids[0] == "new_both"
+    assert "unrelated" not in ids
+    assert ids.index("new_both") < ids.index("old_both")
+
+def test_gazetteer_extracts_longest_whole_word_tags():
+    """Aho-Corasick gazetteer: accent-insensitive, whole words, longest overlap wins"""
+    tags = extract_tags("PCDF prende suspeito de assassinato no Riacho Fundo II; Guaraná apreendido")
+    assert ("agency", "PCDF") in tags
+    assert ("crime_type", "homicídio") in tags
+    assert ("region", "Riacho Fundo II") in tags
+    assert ("region", "Riacho Fundo") not in tags
+    assert ("region", "Guará") not in tags
+    assert canonical_tag("region", "ceilandia ") == "Ceilândia"
+
+def test_ambiguous_names_need_df_context():
+    """Club names, "golpe de Estado", other states' police: tagged only with DF context"""
+    assert extract_tags("Gama vence o Cruzeiro; senador fala em golpe; PF e Polícia Militar de SP na Sia") == set()
+    tags = extract_tags("Golpista preso no Gama pela PM do DF; Cruzeiro Velho e SIA Trecho 3 sem ocorrências")
+    assert tags == {("region", "Gama"), ("region", "Cruzeiro"), ("region", "SIA"), ("agency", "PMDF"),
+                    ("crime_type", "estelionato")}
+    # The canonical names still work as filters
+    assert canonical_tag("region", "gama") == "Gama" and canonical_tag("agency", "pf") == "PF"
+
+def test_homonymous_cities_outside_df_are_not_tagged():
+    """Santa Maria/RS, Planaltina/GO and Sobradinho/BA are not the DF regions"""
+    assert extract_tags("Enchente em Santa Maria (RS); chuva em Planaltina de Goiás; seca em Sobradinho, na Bahia") == set()
+    tags = extract_tags("Tiroteio em Santa Maria-DF; PM atende Planaltina/DF e o Hospital Regional de Sobradinho")
+    assert {t for t in tags if t[0] == "region"} == {("region", "Santa Maria"), ("region", "Planaltina"),
+                                                     ("region", "Sobradinho")}
+    assert canonical_tag("region", "santa maria") == "Santa Maria"
+    assert canonical_tag("region", "planaltina") == "Planaltina"
+
+def test_search_filters_resolve_through_tags(mock_db_path):
+    """region/agency filters narrow results via the noticia_tags index"""
+    items = [
+        NewsItem(id="tag_1", title="PMDF prende assaltante em Ceilândia", url="http://a.com",
+                 publishedAt=datetime.now(), source="Test", snippet="Roubo a ônibus"),
+        NewsItem(id="tag_2", title="PCDF investiga roubo em Taguatinga", url="http://b.com",
+                 publishedAt=datetime.now(), source="Test", snippet="Roubo a comércio"),
+    ]
+    save_to_db(items)
+
+    assert [r.id for r in search_db("Roubo", filters={"region": "Ceilândia"})] == ["tag_1"]
+    assert [r.id for r in search_db("Roubo", filters={"agency": "PCDF", "crime_type": "roubo"})] == ["tag_2"]
+    assert search_db("Roubo", filters={"region": "Gama"}) == []
+
+def test_rollups_follow_ingest(mock_db_path):
+    """/stats data comes from rollup_counts, updated once per new article"""
+    items = [
+        NewsItem(id="roll_1", title="Roubo em Ceilândia", url="http://a.com",
+                 publishedAt=datetime.now(), source="Fonte A", snippet=""),
+        NewsItem(id="roll_2", title="Furto em Ceilândia", url="http://b.com",
+                 publishedAt=datetime.now(), source="Fonte B", snippet=""),
+    ]
+    save_to_db(items)
+    save_to_db(items)  # duplicates must not be counted twice
+
+    regions = get_stats("region", days=7)
+    assert regions["totals"][0]["value"] == "Ceilândia"
+    assert regions["totals"][0]["count"] == 2
+    crimes = {t["value"]: t["count"] for t in get_stats("crime_type", days=7)["totals"]}
+    assert crimes == {"roubo": 1, "furto": 1}
+    assert get_stats("total", days=7)["series"][0]["count"] == 2
+
+def test_semantic_ivf_matches_bruteforce(tmp_path):
+    """Probing every IVF list must return the same ranking as a full scan"""
+    index = SemanticIndex(str(tmp_path / "ivf"))
+    texts = [f"Ocorrência {i} em região {i % 7} com {i % 5} presos" for i in range(300)]
+    index.add([f"id_{i}" for i in range(300)], texts)
+    brute = index.search("ocorrência região 3 presos", k=5, min_score=-1)
+
+    index.build_ivf(nlist=8)
+    probed = index.search("ocorrência região 3 presos", k=5, min_score=-1, nprobe=8)
+    assert [i for i, _ in probed] == [i for i, _ in brute]
+
+def test_semantic_add_drops_a_partial_write(tmp_path):
+    """A writer killed between the vector and id appends must not shift later rows"""
+    index = SemanticIndex(str(tmp_path / "partial"))
+    index.add(["a"], ["Homicídio no Gama"])
+    with open(index.vectors_path, "ab") as f:
+        f.write(b"\0" * (index.encoder.dim * 2 + 3))  # one vector (and a bit) with no id
+    assert len(index) == 1
+
+    index.add(["b"], ["Roubo em Ceilândia"])
+    assert len(index) == 2 and index.ids_from(0) == ["a", "b"]
+    assert os.path.getsize(index.vectors_path) == 2 * index.encoder.dim * 2
+    assert index.search("Roubo em Ceilândia", k=1)[0][0] == "b"
+
 # --- Tests de Fetcher (Parsing) ---
 from backend.fetchers import NewsFetcher
 
@@ -124,3 +249,98 @@ def test_google_rss_parsing(mock_parse):
     assert len(items) == 1
     assert items[0].title == "Crimes drop in DF"
     assert items[0].source == "Google News RSS"
+
+def test_normalize_payloads_dedupes_rows():
+    """Raw GDELT/NewsAPI bodies become insert-ready tuples, deduplicated by id"""
+    import json
+    from backend.normalize import normalize_payloads, NEWS_COLUMNS
+    gdelt = json.dumps({"articles": [
+        {"url": "http://x.com/1", "title": "Roubo no Gama", "seendate": "20250106T101500Z", "domain": "x.com"},
+        {"url": "http://x.com/1", "title": "Roubo no Gama", "seendate": "20250106T101500Z", "domain": "x.com"},
+    ]}).encode()
+    newsapi = json.dumps({"status": "ok", "articles": [
+        {"url": "http://y.com/2", "title": "Furto em Taguatinga", "publishedAt": "2025-01-06T09:00:00Z",
+         "source": {"name": "Y"}, "description": None},
+    ]}).encode()
+
+    rows = normalize_payloads([("gdelt", gdelt), ("newsapi", newsapi)], use_pool=False)
+    assert len(rows) == 2
+    first = dict(zip(NEWS_COLUMNS, rows[0]))
+    assert first["publishedAt"] == "2025-01-06T10:15:00"
+    assert first["snippet"] == "Domain: x.com"
+    assert rows[1][4] == "NewsAPI (Y)"
+
+def test_histogram_buckets_and_exposition():
+    """Observations land in cumulative buckets; timers work as decorator and context manager"""
+    from backend.metrics import histogram, render_metrics
+    hist = histogram("test_op_seconds", "test", ("op",), buckets=(0.1, 1.0))
+    child = hist.labels("a")
+    child.observe(0.05)
+    child.observe(0.5)
+    child.observe(5)
+    with hist.labels("b").time():
+        pass
+    assert hist.labels("b").timed(lambda: 42)() == 42
+
+    text = render_metrics()
+    assert 'test_op_seconds_bucket{op="a",le="0.1"} 1' in text
+    assert 'test_op_seconds_bucket{op="a",le="1.0"} 2' in text
+    assert 'test_op_seconds_bucket{op="a",le="+Inf"} 3' in text
+    assert 'test_op_seconds_count{op="b"} 2' in text
+
+def test_metrics_and_profiles_are_shared_across_processes(tmp_path, monkeypatch):
+    """With METRICS_DIR, /metrics sums every process's file and /debug/profiles reads them all"""
+    import json
+    from backend import metrics, profiling
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    total = metrics.counter("test_shared_total", "test", ("kind",))
+    total.labels("a").inc(2)
+    # Another live process, and one gone for long
+    (tmp_path / "999-aaaa.json").write_text(json.dumps({"test_shared_total": {"a": 3, "b": 1}}))
+    gone = tmp_path / "998-bbbb.json"
+    gone.write_text(json.dumps({"test_shared_total": {"a": 10}}))
+    os.utime(gone, (0, 0))
+
+    for _ in range(2):  # the dead process is folded once, not counted twice
+        text = metrics.render_metrics()
+        assert 'test_shared_total{kind="a"} 15.0' in text and 'test_shared_total{kind="b"} 1.0' in text
+    assert not gone.exists() and (tmp_path / "dead.json").exists()
+
+    monkeypatch.setattr(profiling, "PROFILES_DIR", str(tmp_path / "profiles"))
+    (tmp_path / "profiles").mkdir()
+    other = {"id": "other", "timestamp": "2000-01-01T00:00:00", "path": "/news", "spans": []}
+    (tmp_path / "profiles" / "999-aaaa.jsonl").write_text(json.dumps(other) + "\n")
+    trace = profiling.start_trace()
+    mine = profiling.finish_trace(trace, "GET", "/news", "", 200, "header")
+    assert [p["id"] for p in profiling.recent_profiles(path="/news")] == [mine["id"], "other"]
+
+def test_codec_rows_match_pydantic_encoding(mock_db_path):
+    """Rows encoded straight from SQLite produce the same JSON as the NewsItem path"""
+    import json
+    from backend.codec import encode_news_rows
+    save_to_db([
+        NewsItem(id="c1", title="Roubo em Ceilândia", url="http://c/1", publishedAt=datetime(2025, 1, 6, 10, 15),
+                 source="Test", snippet="Snippet"),
+        NewsItem(id="c2", title="Roubo no Gama", url="http://c/2", publishedAt=datetime(2025, 1, 5, 8, 0, 0, 123456),
+                 source="Test", snippet="Snippet"),
+    ])
+    records = search_db("Roubo")
+    expected = [NewsItem(**r._asdict()).model_dump(mode="json") for r in records]
+    assert len(expected) == 2
+    assert json.loads(encode_news_rows(records)) == expected
+
+def test_keyword_and_recent_pagination(mock_db_path):
+    """limit/offset page through keyword matches and the recent listing, newest first"""
+    from datetime import timedelta
+    from backend.database import get_recent_news_db
+    now = datetime.now()
+    save_to_db([
+        NewsItem(id=f"page_{i}", title=f"Roubo em Ceilândia {i}", url=f"http://p/{i}",
+                 publishedAt=now - timedelta(hours=i), source="Test", snippet="Snippet")
+        for i in range(5)
+    ])
+    assert [r.id for r in search_db("Roubo", limit=2, offset=2)] == ["page_2", "page_3"]
+    assert [r.id for r in search_db("Roubo", limit=2, offset=4)] == ["page_4"]
+    assert len(search_db("Roubo")) == 5
+    assert [r.id for r in get_recent_news_db(limit=3, offset=3)] == ["page_3", "page_4"]
+    assert [r.id for r in get_recent_news_db(limit=3, filters={"region": "Ceilândia"}, offset=1)] == ["page_1", "page_2", "page_3"]
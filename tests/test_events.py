@@ -0,0 +1,68 @@
+import asyncio
+
+from backend import events
+from backend.normalize import NewsRecord
+
+
+def test_filter_index_matches_terms_and_tags_in_one_pass():
+    """A subscription matches when all its terms (whole words, accents folded) and tags are present"""
+    async def scenario():
+        broker = events.EventBroker()
+        drugs = broker.subscribe(q="Tráfico drogas")
+        ceilandia = broker.subscribe(filters={"region": "Ceilândia"})
+        gama_op = broker.subscribe(q="operação", filters={"region": "Gama"})
+        everything = broker.subscribe()
+        index = events.FilterIndex(broker.subscriptions)
+
+        matched = index.match("PCDF prende suspeitos de trafico de drogas na Ceilândia", {("region", "Ceilândia")})
+        assert set(matched) == {drugs, ceilandia, everything}
+        # "operações" is not the word "operação"; the region alone is not enough
+        assert set(index.match("Operações no Gama", {("region", "Gama")})) == {everything}
+        assert set(index.match("Operação da PMDF no Gama", {("region", "Gama")})) == {gama_op, everything}
+
+        # Same analyzer as /news: stopwords are not required, synonyms and prefixes match
+        pm = broker.subscribe(q="roubo na Ceilândia com a PM-DF")
+        index = events.FilterIndex(broker.subscriptions)
+        assert pm in index.match("Polícia Militar prende autores de roubos em Ceilândia", set())
+        assert pm not in index.match("Roubos em Ceilândia; PM de Goiás investiga", set())  # "pm df" as whole words
+
+    asyncio.run(scenario())
+
+
+def test_saved_articles_reach_matching_subscribers(tmp_db, monkeypatch):
+    """Without Redis, save_rows delivers new articles to this process's subscribers"""
+    monkeypatch.setattr(events, "_get_publisher", lambda: None)
+    monkeypatch.setattr(events, "broker", events.EventBroker())
+
+    async def scenario():
+        sub = events.broker.subscribe(q="receptadores", filters={"region": "Ceilândia"})
+        other = events.broker.subscribe(filters={"region": "Gama"})
+        rows = [
+            NewsRecord("a", "Receptadores presos na Ceilândia", "http://t/a", "2025-01-06T10:00:00", "T", "", "pt"),
+            NewsRecord("b", "Receptadores presos em Taguatinga", "http://t/b", "2025-01-06T10:00:00", "T", "", "pt"),
+        ]
+        loop = asyncio.get_running_loop()
+        assert await loop.run_in_executor(None, tmp_db.save_rows, rows) == 2
+        # Already archived: no second announcement
+        assert await loop.run_in_executor(None, tmp_db.save_rows, rows[:1]) == 0
+
+        stream = events.sse_stream(sub, lambda: asyncio.sleep(0, result=False))
+        assert await stream.__anext__() == b"retry: 5000\n\n"
+        chunk = await asyncio.wait_for(stream.__anext__(), 1)
+        assert chunk.startswith(b"event: news\ndata: ") and b'"id":"a"' in chunk and b"Ceil" in chunk
+        assert sub.queue.empty() and other.queue.empty()
+
+        await stream.aclose()
+        assert sub not in events.broker.subscriptions
+
+    asyncio.run(scenario())
+
+
+def test_events_endpoint_refuses_over_subscriber_limit(monkeypatch):
+    from fastapi.testclient import TestClient
+    from backend.main import app, API_KEYS
+
+    monkeypatch.setattr(events, "EVENTS_MAX_SUBSCRIBERS", 0)
+    key = next(iter(API_KEYS))
+    response = TestClient(app).get("/events?region=ceilandia", headers={"X-API-Key": key})
+    assert response.status_code == 503 and response.headers["Retry-After"] == "30"
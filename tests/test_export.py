@@ -0,0 +1,66 @@
+import os
+import pyarrow as pa
+import pyarrow.dataset as ds
+from datetime import datetime, timedelta
+
+os.environ["APP_API_KEY"] = "test_key"
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.export import export_parquet
+
+
+def _row(i, published):
+    return (f"id{i}", f"Roubo {i} em Ceilândia", f"http://t/{i}", published, "Test", "PCDF investiga", "pt")
+
+
+def test_export_parquet_partitions_by_month_and_resumes(tmp_db, tmp_path):
+    out = str(tmp_path / "exports")
+    tmp_db.save_rows([_row(1, "2025-09-30T10:00:00"), _row(2, "2025-10-01T08:00:00"), _row(3, "2025-10-02T08:00:00")])
+
+    first = export_parquet(out, batch_rows=2)
+    assert first["rows"]["noticias"] == 3
+    news = ds.dataset(os.path.join(out, "noticias"), partitioning="hive").to_table()
+    assert sorted(news.column("month").to_pylist()) == ["2025-09", "2025-10", "2025-10"]
+    tags = ds.dataset(os.path.join(out, "noticia_tags"), partitioning="hive").to_table()
+    assert ("region", "Ceilândia") in set(zip(tags.column("kind").to_pylist(), tags.column("tag").to_pylist()))
+
+    # Incremental: only what arrived after the watermark
+    assert export_parquet(out)["rows"] == {}
+    tmp_db.save_rows([_row(4, "2025-10-03T08:00:00")])
+    second = export_parquet(out)
+    assert second["rows"]["noticias"] == 1
+    news = ds.dataset(os.path.join(out, "noticias"), partitioning="hive").to_table()
+    assert sorted(news.column("id").to_pylist()) == ["id1", "id2", "id3", "id4"]
+
+
+def test_export_cursor_is_not_reused_after_deletes(tmp_db, tmp_path):
+    from backend.retention import move_to_cold
+
+    out = str(tmp_path / "exports")
+    now, old = datetime.now().isoformat(), (datetime.now() - timedelta(days=800)).isoformat()
+    # The backfilled old article holds the highest rowid, then leaves the hot table
+    tmp_db.save_rows([_row(1, now), _row(2, now), _row(3, old)])
+    assert export_parquet(out)["rows"]["noticias"] == 3
+    assert move_to_cold(months=12) == 1
+
+    tmp_db.save_rows([_row(4, now)])
+    assert export_parquet(out)["rows"]["noticias"] == 1
+    news = ds.dataset(os.path.join(out, "noticias"), partitioning="hive").to_table()
+    assert sorted(news.column("id").to_pylist()) == ["id1", "id2", "id3", "id4"]
+
+
+def test_export_endpoint_streams_arrow_ipc(tmp_db):
+    tmp_db.save_rows([_row(i, datetime(2025, 10, i).isoformat()) for i in range(1, 4)])
+    client = TestClient(app)
+    headers = {"X-API-Key": "test_key"}
+
+    response = client.get("/export", headers=headers)
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 3
+    watermark = int(response.headers["X-Export-Watermark"])
+
+    tmp_db.save_rows([_row(9, "2025-10-09T00:00:00")])
+    response = client.get(f"/export?after={watermark}", headers=headers)
+    assert pa.ipc.open_stream(response.content).read_all().column("id").to_pylist() == ["id9"]
@@ -0,0 +1,101 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+os.environ["APP_API_KEY"] = "test_key"
+
+from fastapi.testclient import TestClient
+
+from backend import freshness
+from backend.jobs import SQLiteJobQueue
+from backend.main import app
+from backend.normalize import NewsRecord
+from backend.worker import run_once
+
+client = TestClient(app)
+HEADERS = {"X-API-Key": "test_key"}
+
+
+def _row(i, title, days_ago):
+    published = (datetime.now() - timedelta(days=days_ago)).isoformat(timespec="seconds")
+    return NewsRecord(f"id{i}", title, f"http://t/{i}", published, "Test", "", "pt")
+
+
+@pytest.fixture
+def job_queue(tmp_db, monkeypatch):
+    queue = SQLiteJobQueue()
+    monkeypatch.setattr("backend.jobs._queue", queue)
+    return queue
+
+
+@pytest.fixture
+def ddg(monkeypatch):
+    """External search calls, answered with `ddg.items`, for both the API and the worker."""
+    calls = []
+
+    def fake_ddg(query):
+        calls.append(query)
+        if fake_ddg.error:
+            raise fake_ddg.error
+        return list(fake_ddg.items)
+
+    fake_ddg.items, fake_ddg.calls, fake_ddg.error = [], calls, None
+    monkeypatch.setattr(app.state.fetcher, "fetch_ddg", fake_ddg)
+    monkeypatch.setattr("backend.worker.fetcher.fetch_ddg", fake_ddg)
+    return fake_ddg
+
+
+def test_decide(tmp_db):
+    now = datetime.now()
+    assert freshness.decide("roubo", now - timedelta(hours=2), now) == freshness.FRESH
+    assert freshness.decide("roubo", now - timedelta(days=20), now) == freshness.STALE
+    assert freshness.decide("roubo", None, now) == freshness.MISS
+
+    freshness.record_fetch("roubo", 0, now - timedelta(minutes=5))
+    # Old news, but the sources were just asked; nothing local and just asked: negative
+    assert freshness.decide("roubo", now - timedelta(days=20), now) == freshness.FRESH
+    assert freshness.decide("roubo", None, now) == freshness.NEGATIVE
+    later = now + timedelta(minutes=freshness.REFRESH_MIN_INTERVAL_MINUTES)
+    assert freshness.decide("roubo", now - timedelta(days=20), later) == freshness.STALE
+    assert freshness.decide("roubo", None, later) == freshness.MISS
+
+
+def test_stale_results_are_served_and_refreshed_in_background(tmp_db, job_queue, ddg):
+    tmp_db.save_rows([_row(1, "Roubo em Ceilândia", days_ago=30)])
+    ddg.items = [_row(2, "Roubo a ônibus em Ceilândia", days_ago=0)]
+    url = "/news?q=roubo ceilandia&mode=keyword"
+
+    # Old local result right away; the external search is left to a job (enqueued once)
+    assert [n["id"] for n in client.get(url, headers=HEADERS).json()] == ["id1"]
+    assert [n["id"] for n in client.get(url, headers=HEADERS).json()] == ["id1"]
+    assert ddg.calls == []
+    assert run_once(job_queue, "test-worker") is True
+    assert run_once(job_queue, "test-worker") is False
+    assert ddg.calls == ["roubo ceilandia distrito federal"]
+
+    assert [n["id"] for n in client.get(url, headers=HEADERS).json()] == ["id2", "id1"]
+    assert run_once(job_queue, "test-worker") is False
+
+
+def test_empty_external_search_is_negatively_cached(job_queue, ddg):
+    url = "/news?q=fercal&mode=keyword"
+    assert client.get(url, headers=HEADERS).json() == []
+    assert client.get(url, headers=HEADERS).json() == []
+    assert ddg.calls == ["fercal distrito federal"]
+    assert run_once(job_queue, "test-worker") is False
+
+
+def test_failed_external_search_is_not_negatively_cached(tmp_db, job_queue, ddg):
+    ddg.error = RuntimeError("ratelimit")
+    url = "/news?q=fercal&mode=keyword"
+    assert client.get(url, headers=HEADERS).json() == []
+    assert client.get(url, headers=HEADERS).json() == []
+    assert ddg.calls == ["fercal distrito federal"] * 2
+    assert freshness.last_fetch("fercal distrito federal") is None
+
+    # Same for the background refresh: the job fails and the query stays stale
+    tmp_db.save_rows([_row(1, "Roubo em Ceilândia", days_ago=30)])
+    client.get("/news?q=roubo ceilandia&mode=keyword", headers=HEADERS)
+    assert run_once(job_queue, "test-worker") is True
+    assert freshness.last_fetch("roubo ceilandia distrito federal") is None
@@ -0,0 +1,101 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from backend.retention import move_to_cold, prune_jobs, prune_logs, incremental_vacuum
+
+
+def _row(i, published):
+    return (f"id{i}", f"Assalto {i} em Taguatinga", f"http://t/{i}", published.isoformat(), "Test", "PMDF", "pt")
+
+
+def test_old_articles_move_to_cold_tier_and_stay_searchable(tmp_db):
+    now = datetime.now()
+    tmp_db.save_rows([_row(1, now - timedelta(days=800)), _row(2, now - timedelta(days=2))])
+
+    assert move_to_cold(months=12) == 1
+    conn = tmp_db.get_connection()
+    assert [r["id"] for r in conn.execute("SELECT id FROM noticias")] == ["id2"]
+    conn.close()
+    cold = sqlite3.connect(tmp_db.cold_db_path())
+    assert cold.execute("SELECT COUNT(*) FROM noticia_tags WHERE news_id = 'id1'").fetchone()[0] > 0
+    cold.close()
+
+    # Reads go through the UNION view; re-ingesting a cold id is still a duplicate
+    assert {i.id for i in tmp_db.search_db("Assalto")} == {"id1", "id2"}
+    assert [i.id for i in tmp_db.get_news_by_ids(["id1"], {"region": "Taguatinga"})] == ["id1"]
+    assert tmp_db.save_rows([_row(1, now - timedelta(days=800))]) == 0
+
+
+def test_cold_tier_is_still_exported_and_embedded(tmp_db, tmp_path):
+    from backend import semantic
+    from backend.export import export_parquet
+
+    now = datetime.now()
+    tmp_db.save_rows([_row(1, now - timedelta(days=800)), _row(2, now - timedelta(days=2))])
+    # Moved (and the file vacuumed) before any export ran
+    assert move_to_cold(months=12) == 1
+    incremental_vacuum(tmp_db.DB_PATH)
+    assert export_parquet(str(tmp_path / "exports"))["rows"]["noticias"] == 2
+
+    # Encoder change: the index is rebuilt from both tiers
+    semantic.get_index().rebuild([])
+    tmp_db._ensure_semantic_index()
+    assert len(semantic.get_index()) == 2
+
+
+def test_upgrade_retags_both_tiers_and_moves_rollups(tmp_db):
+    """Tags from the old gazetteer ("golpe" -> estelionato) are dropped in both tiers, with their rollups"""
+    now = datetime.now()
+    old_day, new_day = now - timedelta(days=800), now - timedelta(days=2)
+    rows = [("g1", "Senador fala em golpe", "http://t/g1", old_day.isoformat(), "Test", "", "pt"),
+            ("g2", "Golpista preso em Taguatinga", "http://t/g2", new_day.isoformat(), "Test", "", "pt")]
+    tmp_db.save_rows(rows)
+    move_to_cold(months=12)
+    cold = sqlite3.connect(tmp_db.cold_db_path())
+    cold.execute("INSERT INTO noticia_tags (news_id, kind, tag) VALUES ('g1', 'crime_type', 'estelionato')")
+    cold.commit()
+    conn = tmp_db.get_connection()
+    conn.execute("INSERT INTO rollup_counts VALUES ('crime_type', ?, 'estelionato', 1)", (old_day.isoformat()[:10],))
+    conn.execute("PRAGMA user_version = 5")
+    conn.commit()
+    conn.close()
+
+    tmp_db.init_db()
+    assert cold.execute("SELECT COUNT(*) FROM noticia_tags WHERE news_id = 'g1'").fetchone()[0] == 0
+    cold.close()
+    totals = {t["value"]: t["count"] for t in tmp_db.get_stats("crime_type", days=3650)["totals"]}
+    assert totals == {"estelionato": 1}  # g2 only
+    assert [r.id for r in tmp_db.get_news_by_ids(["g1", "g2"], {"crime_type": "estelionato"})] == ["g2"]
+
+
+def test_prune_logs_and_incremental_vacuum(tmp_db):
+    conn = tmp_db.get_connection()
+    old = (datetime.now() - timedelta(days=60)).isoformat()
+    conn.executemany("INSERT INTO logs (timestamp, level, message) VALUES (?, 'INFO', ?)",
+                     [(old, "x" * 500) for _ in range(2000)])
+    conn.commit()
+    conn.close()
+
+    assert prune_logs(days=30, batch_rows=500) == 2000
+    incremental_vacuum(tmp_db.DB_PATH)  # first run converts to auto_vacuum=INCREMENTAL
+    conn = sqlite3.connect(tmp_db.DB_PATH)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    conn.close()
+
+
+def test_prune_jobs_keeps_unfinished_ones(tmp_db):
+    old, recent = (datetime.now() - timedelta(days=30)).isoformat(), datetime.now().isoformat()
+    conn = tmp_db.get_connection()
+    conn.executemany("""
+        INSERT INTO jobs (id, kind, payload, status, dedupe_key, attempts, created_at, finished_at)
+        VALUES (?, 'fetch_all', '{}', ?, ?, 1, ?, ?)
+    """, [("done-old", "done", "k1", old, old), ("failed-old", "failed", "k2", old, old),
+          ("done-new", "done", "k3", recent, recent), ("queued-old", "queued", "k4", old, None)])
+    conn.commit()
+    conn.close()
+
+    assert prune_jobs(days=7, batch_rows=1) == 2
+    conn = tmp_db.get_connection()
+    assert {r["id"] for r in conn.execute("SELECT id FROM jobs")} == {"done-new", "queued-old"}
+    conn.close()
@@ -9,22 +9,34 @@ os.environ["APP_API_KEY"] = "test_key"
 os.environ["REDIS_URL"] = "redis://localhost:6379/0" 
 
 # Import AFTER env setup
-from backend.main import app, scheduler
+from backend.main import app
+from backend.jobs import SQLiteJobQueue, cron_tick_key
+from backend.worker import run_once
 
 client = TestClient(app)
 
+@pytest.fixture
+def job_queue(monkeypatch, tmp_path):
+    """Isolated SQLite-backed job queue"""
+    import backend.database as database
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "jobs.db"))
+    database.init_db()
+    queue = SQLiteJobQueue()
+    monkeypatch.setattr("backend.jobs._queue", queue)
+    return queue
+
 @pytest.fixture
 def mock_fetcher():
-    with patch("backend.main.fetcher") as mock:
+    with patch("backend.worker.fetcher") as mock:
         yield mock
 
 @pytest.fixture
 def mock_save_db():
-    with patch("backend.main.save_to_db") as mock:
+    with patch("backend.worker.save_to_db") as mock:
         yield mock
 
-def test_force_fetch_endpoint(mock_fetcher, mock_save_db):
-    """Test /force-fetch triggers the job immediately"""
+def test_force_fetch_endpoint(job_queue, mock_fetcher, mock_save_db):
+    """Test /force-fetch enqueues a job and returns its id without running it"""
     
     # Mock return of fetch_all
     mock_fetcher.fetch_all.return_value = [
@@ -35,18 +47,37 @@ def test_force_fetch_endpoint(mock_fetcher, mock_save_db):
     response = client.post("/force-fetch", headers=headers)
     
     assert response.status_code == 200
-    assert response.json()["status"] == "Fetch triggered"
-    
-    # Verify fetcher was called
+    assert response.json()["status"] == "queued"
+    job_id = response.json()["job_id"]
+    # Request returned before any fetching happened
+    mock_fetcher.fetch_all.assert_not_called()
+    assert client.get(f"/jobs/{job_id}", headers=headers).json()["status"] == "queued"
+
+    # A worker picks it up
+    assert run_once(job_queue, "test-worker") is True
     mock_fetcher.fetch_all.assert_called_once()
-    # Verify save_to_db was called
     mock_save_db.assert_called_once()
 
-def test_scheduler_jobs_configured():
+    status = client.get(f"/jobs/{job_id}", headers=headers).json()
+    assert status["status"] == "done"
+    assert status["result"] == {"fetched": 1}
+    assert run_once(job_queue, "test-worker") is False
+
+def test_cron_tick_enqueues_once(job_queue):
+    """Several processes firing the same tick share one job"""
+    tick = datetime(2026, 1, 1, 11, 0, 2)
+    first = job_queue.enqueue("fetch_all", dedupe_key=cron_tick_key("fetch_all", tick))
+    second = job_queue.enqueue("fetch_all", dedupe_key=cron_tick_key("fetch_all", tick.replace(second=40)))
+    assert first == second
+    assert job_queue.claim("w1")["id"] == first
+    assert job_queue.claim("w2") is None
+
+def test_scheduler_jobs_configured(monkeypatch):
     """Verify that jobs are scheduled for 11:00 and 23:00"""
+    monkeypatch.setenv("EMBEDDED_WORKER", "false")
     with TestClient(app):
         # Startup event runs here, so jobs should be added
-        jobs = scheduler.get_jobs()
+        jobs = app.state.scheduler.get_jobs()
         # We expect at least 2 jobs
         assert len(jobs) >= 2
         
@@ -61,3 +92,55 @@ def test_scheduler_jobs_configured():
         
         assert has_11, f"Job for 11:00 not found in {job_descriptions}"
         assert has_23, f"Job for 23:00 not found in {job_descriptions}"
+
+def test_scheduler_leader_lease(job_queue):
+    """One lease holder at a time; an expired lease is taken over; the leader runs the scheduler"""
+    import time
+    from backend.leader import LeaderLease
+
+    a, b = LeaderLease("test", holder="a", ttl=30), LeaderLease("test", holder="b", ttl=30)
+    now = time.time()
+    assert a.acquire(now) is True
+    assert b.acquire(now) is False
+    assert a.acquire(now + 10) is True  # renewal
+    # a stopped renewing (crashed): b takes over once the lease expires
+    assert b.acquire(now + 41) is True
+    assert a.acquire(now + 42) is False
+    b.release()
+    assert a.acquire(now + 43) is True
+    a.release()
+
+    with TestClient(app) as c:
+        deadline = time.time() + 5
+        while not c.get("/").json()["scheduler_leader"] and time.time() < deadline:
+            time.sleep(0.05)
+        assert c.get("/").json()["scheduler_leader"] is True
+        assert app.state.scheduler.state == 1  # STATE_RUNNING (resumed in the leader)
+        # Another worker process contends and loses
+        assert LeaderLease("scheduler", holder="other-worker").acquire() is False
+    # Shutdown released the lease for the next worker
+    assert LeaderLease("scheduler", holder="other-worker").acquire() is True
+
+
+def test_redis_cache_reprobes_after_failure():
+    """An operation error opens the circuit; the next successful probe closes it"""
+    from backend.cache import RedisCache
+
+    class FlakyRedis:
+        down = True
+
+        def ping(self):
+            if self.down:
+                raise ConnectionError("down")
+
+        def setex(self, key, ttl, value):
+            raise ConnectionError("reset")
+
+    cache = RedisCache()
+    cache.client = FlakyRedis()
+    assert cache.probe() is False and cache.get_with_ttl("k") == (None, 0)
+    cache.client.down = False
+    assert cache.probe() is True
+    cache.set("k", b"[]", 60)
+    assert cache.available is False
+    assert cache.probe() is True
@@ -0,0 +1,220 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import storage
+from backend.normalize import NewsRecord
+
+try:
+    import asyncpg  # noqa: F401
+except ImportError:
+    asyncpg = None
+
+
+def _row(i, title, days_ago=1, snippet="PCDF"):
+    published = (datetime.now() - timedelta(days=days_ago)).isoformat(timespec="seconds")
+    return NewsRecord(f"id{i}", title, f"http://t/{i}", published, "Test", snippet, "pt")
+
+
+def test_backend_is_chosen_by_database_url():
+    assert isinstance(storage.create_storage(""), storage.SQLiteStorage)
+    with pytest.raises(ValueError):
+        storage.create_storage("mysql://localhost/agente")
+
+
+def test_sqlite_storage_goes_through_the_archive(tmp_db):
+    store = storage.SQLiteStorage()
+    assert store.save_items([_row(1, "Roubo em Ceilândia")]) == 1
+    assert store.existing_ids(["id1", "id9"]) == {"id1"}
+    assert [r.id for r in store.search("Roubo", filters={"region": "Ceilândia"})] == ["id1"]
+
+
+@pytest.fixture(scope="module")
+def pg_url(tmp_path_factory):
+    """TEST_DATABASE_URL (e.g. a postgres container), else an embedded server via `pgserver` if installed."""
+    if asyncpg is None:
+        pytest.skip("asyncpg not installed")
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        yield url
+        return
+    pgserver = pytest.importorskip("pgserver")
+    server = pgserver.get_server(str(tmp_path_factory.mktemp("pg")), cleanup_mode="stop")
+    yield server.get_uri()
+    server.cleanup()
+
+
+@pytest.fixture
+def pg(pg_url, tmp_db):
+    # tmp_db: query_fetches, article text and the embedding index stay node-local
+    from backend import semantic
+    from backend.pg_storage import PostgresStorage
+
+    store = PostgresStorage(pg_url, pool_size=2)
+    store._run(store._pool.execute(
+        "TRUNCATE noticias, noticia_tags, rollup_counts, logs, leases, alert_rules, alerts, query_catalog, jobs"
+    ))
+    # Startup synced the previous test's articles: this node starts over
+    index = semantic.get_index()
+    index.rebuild([])
+    if os.path.exists(index.prefix + ".pgsync.json"):
+        os.remove(index.prefix + ".pgsync.json")
+    yield store
+    store.close()
+
+
+def test_postgres_ingest_is_deduplicated_with_tags_and_rollups(pg):
+    rows = [_row(1, "Roubo em Ceilândia"), _row(2, "Homicídio no Gama", snippet="PMDF"), _row(1, "Roubo em Ceilândia")]
+    assert pg.save_rows(rows) == 2
+    assert pg.save_rows(rows + [_row(3, "Assalto em Taguatinga")]) == 1
+    assert pg.existing_ids(["id1", "id3", "id9"]) == {"id1", "id3"}
+
+    stats = pg.stats("region", days=7)
+    assert {t["value"]: t["count"] for t in stats["totals"]} == {"Ceilândia": 1, "Gama": 1, "Taguatinga": 1}
+    assert sum(s["count"] for s in pg.stats("total", days=7)["series"]) == 3
+
+
+def test_postgres_search_recent_and_ranking(pg):
+    pg.save_rows([
+        _row(1, "Roubo em Ceilândia", days_ago=3),
+        _row(2, "Roubos a ônibus em Ceilândia", days_ago=1),
+        _row(3, "Homicídio no Gama", days_ago=2, snippet="PMDF"),
+    ])
+    # Accents/case folded and Portuguese stemming: "ceilandia roubo" matches "Roubos ... Ceilândia"
+    assert [r.id for r in pg.search("ceilandia roubo")] == ["id2", "id1"]
+    assert [r.id for r in pg.search("roubo", limit=1, offset=1)] == ["id1"]
+    assert [r.id for r in pg.search("homicidio", filters={"agency": "PMDF"})] == ["id3"]
+    assert pg.search("homicidio", filters={"agency": "PCDF"}) == []
+    # Same analyzer as SQLite: "Polícia Militar" finds "PMDF"
+    assert [r.id for r in pg.search("Polícia Militar")] == ["id3"]
+
+    assert [r.id for r in pg.recent(limit=2)] == ["id2", "id3"]
+    assert [r.id for r in pg.recent(filters={"region": "Gama"})] == ["id3"]
+    assert [r.id for r in pg.get_by_ids(["id3", "id9", "id1"])] == ["id3", "id1"]
+
+    hybrid = [r.id for r in pg.hybrid_search("roubo Ceilândia", limit=2)]
+    assert set(hybrid) == {"id1", "id2"}
+    # Saved rows reach the (node-local) embedding index
+    assert [r.id for r in pg.semantic_search("Homicídio no Gama", limit=1)] == ["id3"]
+
+
+def test_postgres_logs_are_written_without_blocking(pg):
+    pg.insert_log("INFO", "hello")
+    for _ in range(50):
+        if pg._run(pg._pool.fetchval("SELECT COUNT(*) FROM logs WHERE message = 'hello'")):
+            break
+        time.sleep(0.02)
+    else:
+        pytest.fail("log line not written")
+
+
+def test_postgres_index_sync_picks_up_other_nodes_articles(pg):
+    assert pg.save_rows([_row(1, "Roubo em Ceilândia")]) == 1
+    assert pg.sync_index() == 0  # saved here, already indexed
+
+    # Another node's ingest, including one whose transaction started a minute ago
+    pg._run(pg._pool.execute("""
+        INSERT INTO noticias (id, title, url, "publishedAt", source, snippet, language, ingested_at) VALUES
+        ('id2', 'Homicídio no Gama', 'http://t/2', '2024-01-01T10:00:00', 'Test', 'PMDF', 'pt', now()),
+        ('id3', 'Assalto em Taguatinga', 'http://t/3', '2024-01-01T10:00:00', 'Test', '', 'pt', now() - interval '1 minute')
+    """))
+    assert pg.sync_index() == 2
+    assert pg.sync_index() == 0
+    assert [r.id for r in pg.semantic_search("Homicídio no Gama", limit=1)] == ["id2"]
+
+
+def test_postgres_leases_are_shared(pg):
+    now = time.time()
+    assert pg.acquire_lease("scheduler", "node-a", 30, now)
+    assert not pg.acquire_lease("scheduler", "node-b", 30, now + 1)
+    assert pg.acquire_lease("scheduler", "node-a", 30, now + 10)  # renewal
+    assert pg.acquire_lease("scheduler", "node-b", 30, now + 41)  # expired
+    pg.release_lease("scheduler", "node-a")  # no longer the holder: no-op
+    assert not pg.acquire_lease("scheduler", "node-a", 30, now + 42)
+    pg.release_lease("scheduler", "node-b")
+    assert pg.acquire_lease("scheduler", "node-a", 30, now + 43)
+
+
+def test_postgres_alerts(pg):
+    rule = pg.create_alert_rule("streamlit", "Roubos", "roubo", {"region": "Ceilândia"})
+    other = pg.create_alert_rule("parceiro", "Gama", None, {"region": "Gama"})
+    assert [r["id"] for r in pg.list_alert_rules("streamlit")] == [rule["id"]]
+    assert len(pg.list_alert_rules()) == 2
+
+    now = datetime.now().isoformat()
+    pg.insert_alerts([(rule["id"], "id1", now), (rule["id"], "id2", now), (other["id"], "id1", now)])
+    pg.insert_alerts([(rule["id"], "id1", now)])  # already alerted
+    page = pg.alerts_page("streamlit", None, 0, 10)
+    assert [(a["rule_name"], a["news_id"]) for a in page] == [("Roubos", "id1"), ("Roubos", "id2")]
+    assert [a["news_id"] for a in pg.alerts_page(None, rule["id"], page[0]["id"], 10)] == ["id2"]
+
+    assert not pg.delete_alert_rule(rule["id"], owner="parceiro")
+    assert pg.delete_alert_rule(rule["id"], owner="streamlit")
+    assert pg.alerts_page(None, None, 0, 10)[0]["rule_id"] == other["id"]
+
+
+def test_postgres_catalog(pg):
+    now = datetime.now().isoformat(timespec="seconds")
+    entries = [
+        {"id": "a", "source": "google", "topic": "roubo", "region": "Gama", "query": "roubo gama"},
+        {"id": "b", "source": "google", "topic": "roubo", "region": "Distrito Federal", "query": "roubo df"},
+    ]
+    pg.sync_catalog(entries, 60, now)
+    pg.sync_catalog(entries, 60, now)  # idempotent
+    assert [e["id"] for e in pg.due_catalog_entries(10, now)] == ["b", "a"]
+    later = (datetime.now() + timedelta(hours=1)).isoformat(timespec="seconds")
+    pg.update_catalog_entries([(120, later, now, 5, 2, 2, "b")])
+    assert [e["id"] for e in pg.due_catalog_entries(10, now)] == ["a"]
+    stats = pg.catalog_stats()
+    assert (stats[0]["query"], stats[0]["runs"], stats[0]["total_new"]) == ("roubo df", 1, 2)
+
+    pg.sync_catalog(entries[:1], 60, now)
+    assert [e["query"] for e in pg.catalog_stats()] == ["roubo gama"]
+
+
+def test_postgres_job_queue(pg):
+    from backend.pg_storage import PostgresJobQueue
+
+    queue = PostgresJobQueue(pg)
+    job_id = queue.enqueue("fetch_all", {"a": 1}, dedupe_key="cron:fetch_all:1")
+    assert queue.enqueue("fetch_all", {"a": 1}, dedupe_key="cron:fetch_all:1") == job_id
+    job = queue.claim("w1")
+    assert (job["id"], job["payload"], job["attempts"]) == (job_id, {"a": 1}, 0)
+    assert queue.claim("w2") is None
+    queue.complete(job_id, {"new": 3})
+    assert (queue.get(job_id)["status"], queue.get(job_id)["result"]) == ("done", {"new": 3})
+
+
+def test_postgres_archive_jobs(pg, monkeypatch):
+    """fetch_content, export and retention read the shared tables, not the node's empty SQLite"""
+    from backend import content, export, pg_storage, retention
+
+    pg.save_rows([_row(1, "Roubo em Ceilândia", days_ago=2), _row(2, "Homicídio no Gama", days_ago=1)])
+    monkeypatch.setattr(storage, "_storage", pg)
+
+    # Content attempts are node-local: a settled one is skipped, a due retry is not
+    assert content.pending_articles(10) == [("id2", "http://t/2"), ("id1", "http://t/1")]
+    content.save_contents([{"news_id": "id2", "status": "ok", "http_status": 200, "text": "texto"}])
+    assert content.pending_articles(10) == [("id1", "http://t/1")]
+
+    # Just-ingested rows wait out the commit slack before they can be exported
+    assert list(export.iter_batches("noticias")) == []
+    monkeypatch.setattr(pg_storage, "INDEX_SYNC_SLACK_SECONDS", 0)
+    upto = export.current_watermark()
+    batches = list(export.iter_batches("noticias", upto=upto, batch_rows=1))
+    assert [b.num_rows for b in batches] == [1, 1]
+    assert sorted(i for b in batches for i in b.column("id").to_pylist()) == ["id1", "id2"]
+    tags = list(export.iter_batches("noticia_tags", upto=upto))
+    assert ("id2", "region", "Gama") in zip(*(tags[0].column(c).to_pylist() for c in ("news_id", "kind", "tag")))
+
+    old = (datetime.now() - timedelta(days=90)).isoformat()
+    pg._run(pg._pool.execute("INSERT INTO logs (timestamp, level, message) VALUES ($1, 'INFO', 'old')", old))
+    pg._run(pg._pool.execute("""
+        INSERT INTO jobs (id, kind, payload, status, attempts, created_at, finished_at)
+        VALUES ('j1', 'fetch_all', '{}', 'done', 1, $1, $1), ('j2', 'fetch_all', '{}', 'queued', 0, $1, NULL)
+    """, old))
+    summary = retention.run_retention()
+    assert summary == {"logs_pruned": 1, "jobs_pruned": 1}
+    assert pg._run(pg._pool.fetchval("SELECT COUNT(*) FROM noticias")) == 2